@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class BlogsConfig(AppConfig):
     name = 'apps.blogs'
+
+    def ready(self):
+        """Invalidate cached read responses when blog content changes and check the view count cache."""
+        from . import signals, view_counts  # noqa: F401
@@ -0,0 +1,203 @@
+"""
+Reading stats and excerpts computed from post content.
+
+``analyze_content`` parses the HTML (or plain text) of a post once, feeding
+it to an ``HTMLParser`` and a SHA-256 hash in the same pass, and returns the
+word and paragraph counts, the estimated read time, a plain-text excerpt
+and the content hash. The hash is stored on the post so an update that
+leaves the content untouched, and a backfill re-run, skip the parse.
+"""
+import hashlib
+import math
+import re
+from html.parser import HTMLParser
+
+from django.utils.text import Truncator
+
+from apps.core.response_cache import bump_resource_versions
+from .models import Post
+
+# Bump when the stats or the excerpt change, so stored hashes no longer
+# match and ``backfill_content_stats`` recomputes every post.
+CONTENT_PIPELINE_VERSION = 1
+EXCERPT_LENGTH = 280
+WORDS_PER_MINUTE = 200
+FEED_CHUNK_SIZE = 64 * 1024
+
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'ol', 'p', 'pre', 'section',
+    'table', 'td', 'th', 'tr', 'ul',
+}
+SKIPPED_TAGS = {'script', 'style', 'template', 'noscript'}
+PARAGRAPH_BREAK = re.compile(r'\n[ \t\r\f\v]*\n')
+WHITESPACE = re.compile(r'\s+')
+
+
+class ContentStats:
+    def __init__(self, word_count, paragraph_count, read_time, excerpt, content_hash):
+        self.word_count = word_count
+        self.paragraph_count = paragraph_count
+        self.read_time = read_time
+        self.excerpt = excerpt
+        self.content_hash = content_hash
+
+    def as_fields(self):
+        """The ``Post`` field values, for ``save(**...)`` or ``update(**...)``."""
+        return {
+            'word_count': self.word_count,
+            'paragraph_count': self.paragraph_count,
+            'read_time': self.read_time,
+            'excerpt': self.excerpt,
+            'content_hash': self.content_hash,
+        }
+
+
+class ContentParser(HTMLParser):
+    """
+    Counts words and paragraphs of the visible text and keeps its first
+    ``excerpt_length`` characters. A paragraph is a block element or a
+    blank-line separated run of text that contains at least one word, so
+    markup and plain text are counted alike.
+    """
+
+    def __init__(self, excerpt_length=EXCERPT_LENGTH):
+        super().__init__(convert_charrefs=True)
+        self.excerpt_length = excerpt_length
+        self.word_count = 0
+        self.paragraph_count = 0
+        self._skipping = 0
+        self._in_word = False
+        self._paragraph_has_text = False
+        self._excerpt = []
+        self._excerpt_size = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in BLOCK_TAGS or tag == 'br':
+            self._break(paragraph=tag != 'br')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS or tag == 'br':
+            self._break(paragraph=tag != 'br')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in BLOCK_TAGS:
+            self._break(paragraph=True)
+
+    def handle_data(self, data):
+        if self._skipping:
+            return
+        for i, block in enumerate(PARAGRAPH_BREAK.split(data)):
+            if i:
+                self._break(paragraph=True)
+            self._add_text(block)
+
+    def close(self):
+        super().close()
+        self._break(paragraph=True)
+
+    @property
+    def excerpt(self):
+        text = WHITESPACE.sub(' ', ''.join(self._excerpt)).strip()
+        return Truncator(text).chars(self.excerpt_length)
+
+    def _add_text(self, text):
+        words = text.split()
+        if not words:
+            self._in_word = False
+            return
+        # A word split by inline markup ("<b>bold</b>er") is still one word.
+        joined = self._in_word and not text[0].isspace()
+        self.word_count += len(words) - joined
+        self._in_word = not text[-1].isspace()
+        self._paragraph_has_text = True
+        if self._excerpt_size <= self.excerpt_length:
+            self._excerpt.append(text)
+            self._excerpt_size += len(text)
+
+    def _break(self, paragraph):
+        self._in_word = False
+        if self._excerpt_size <= self.excerpt_length:
+            self._excerpt.append(' ')
+        if paragraph and self._paragraph_has_text:
+            self.paragraph_count += 1
+            self._paragraph_has_text = False
+
+
+def read_time(word_count):
+    """Estimated minutes to read ``word_count`` words, at least 1 for any text."""
+    return math.ceil(word_count / WORDS_PER_MINUTE) if word_count else 0
+
+
+def content_hash(content):
+    return _hasher(content or '').hexdigest()
+
+
+def analyze_content(content):
+    content = content or ''
+    parser = ContentParser()
+    digest = _hasher('')
+    for start in range(0, len(content), FEED_CHUNK_SIZE):
+        chunk = content[start:start + FEED_CHUNK_SIZE]
+        digest.update(chunk.encode())
+        parser.feed(chunk)
+    parser.close()
+    return ContentStats(
+        word_count=parser.word_count,
+        paragraph_count=parser.paragraph_count,
+        read_time=read_time(parser.word_count),
+        excerpt=parser.excerpt,
+        content_hash=digest.hexdigest(),
+    )
+
+
+def content_updates(post, content):
+    """
+    The field values to save when ``post`` gets ``content``, or an empty dict
+    when its stored hash shows the content (and pipeline) are unchanged.
+    """
+    if post.content_hash and post.content_hash == content_hash(content):
+        return {}
+    return analyze_content(content).as_fields()
+
+
+def backfill_content_stats(chunk_size=1000, force=False, dry_run=False):
+    """
+    Compute the stats of every post whose stored hash is missing or stale
+    (every post with ``force``), streaming posts with ``iterator()`` and
+    saving them with one ``bulk_update`` per chunk. Returns
+    ``(scanned, updated)``.
+    """
+    fields = list(ContentStats(0, 0, 0, '', '').as_fields())
+    queryset = Post.objects.order_by('pk').only('pk', 'content', 'content_hash')
+    scanned = updated = 0
+    pending = []
+    for post in queryset.iterator(chunk_size=chunk_size):
+        scanned += 1
+        updates = analyze_content(post.content).as_fields() if force else content_updates(post, post.content)
+        if not updates:
+            continue
+        for name, value in updates.items():
+            setattr(post, name, value)
+        pending.append(post)
+        if len(pending) >= chunk_size:
+            updated += _save_stats(pending, fields, dry_run)
+            pending = []
+    updated += _save_stats(pending, fields, dry_run)
+    if updated and not dry_run:
+        bump_resource_versions('posts')
+    return scanned, updated
+
+
+def _save_stats(posts, fields, dry_run):
+    if posts and not dry_run:
+        Post.objects.bulk_update(posts, fields)
+    return len(posts)
+
+
+def _hasher(content):
+    return hashlib.sha256(f"v{CONTENT_PIPELINE_VERSION}:{content}".encode())
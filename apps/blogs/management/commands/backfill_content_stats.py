@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.blogs.content import backfill_content_stats
+
+
+class Command(BaseCommand):
+    help = "Compute word counts, read time, excerpt and content hash for existing posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Number of posts read and updated per query."
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Recompute every post, not only those whose content hash is missing or stale."
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report how many posts would change without writing anything."
+        )
+
+    def handle(self, *args, **options):
+        scanned, updated = backfill_content_stats(
+            chunk_size=options['chunk_size'],
+            force=options['force'],
+            dry_run=options['dry_run']
+        )
+        verb = "would be updated" if options['dry_run'] else "updated"
+        self.stdout.write(f"{updated}/{scanned} posts {verb}")
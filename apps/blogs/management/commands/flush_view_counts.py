@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.blogs.view_counts import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = "Write buffered post and comment view counts to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help="Keep running and flush every N seconds instead of once."
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            flushed = flush_view_counts()
+            for label, count in flushed.items():
+                self.stdout.write(f"{label}: {count} views flushed")
+            if not interval:
+                break
+            time.sleep(interval)
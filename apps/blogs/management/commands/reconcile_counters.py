@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.blogs.reconcile import COUNTERS, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized counters and fix the rows that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--counter',
+            choices=[counter.label for counter in COUNTERS],
+            action='append',
+            dest='counters',
+            help="Only reconcile this counter (repeatable)."
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help="Number of rows recomputed per query."
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report drift without writing anything."
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help="Keep running and reconcile every N seconds instead of once."
+        )
+
+    def handle(self, *args, **options):
+        counters = [
+            counter for counter in COUNTERS
+            if not options['counters'] or counter.label in options['counters']
+        ]
+        interval = options['interval']
+        while True:
+            report = reconcile_counters(
+                counters,
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run']
+            )
+            for drift in report.values():
+                self.stdout.write(
+                    f"{drift.label}: {drift.drifted}/{drift.scanned} rows drifted, "
+                    f"total drift {drift.total_drift}, max {drift.max_drift}"
+                )
+                for pk, stored, actual in drift.samples:
+                    self.stdout.write(f"  pk={pk}: {stored} -> {actual}")
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,76 @@
+# Generated by Django 6.0 on 2026-10-17 13:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_reaction_counts(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Reaction = apps.get_model('blogs', 'Reaction')
+
+    for model_name in ('post', 'comment'):
+        content_type = ContentType.objects.filter(app_label='blogs', model=model_name).first()
+        if content_type is None:
+            continue
+
+        def count_of(reaction_type):
+            reactions = Reaction.objects.filter(content_type=content_type, object_id=OuterRef('pk'))
+            if reaction_type:
+                reactions = reactions.filter(reaction_type=reaction_type)
+            return Coalesce(
+                Subquery(
+                    reactions.order_by().values('object_id').annotate(total=Count('*')).values('total'),
+                    output_field=IntegerField()
+                ),
+                Value(0)
+            )
+
+        apps.get_model('blogs', model_name).objects.update(
+            reaction_count=count_of(None),
+            upvote_count=count_of('upvote'),
+            downvote_count=count_of('downvote'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0010_comment_blogs_comme_post_id_cac06e_idx_and_more'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='reaction',
+            name='reaction_type',
+            field=models.CharField(choices=[('upvote', 'Upvote'), ('downvote', 'Downvote')], default='upvote', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='reaction',
+            index=models.Index(fields=['content_type', 'object_id', 'reaction_type', 'created_at'], name='blogs_react_content_11d7a1_idx'),
+        ),
+        migrations.RunPython(backfill_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -64,10 +64,14 @@ class Post(models.Model):
     subtitle = models.CharField(max_length=500, blank=True)
     slug = models.SlugField(unique=True)
     content = models.TextField(blank=True)
+    excerpt = models.CharField(max_length=300, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
     thumbnail = models.URLField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICE, default=DRAFT)
     comment_count = models.PositiveIntegerField(default=0)
     reaction_count = models.PositiveIntegerField(default=0)
+    upvote_count = models.PositiveIntegerField(default=0)
+    downvote_count = models.PositiveIntegerField(default=0)
     bookmark_count = models.PositiveIntegerField(default=0)
     views_count = models.PositiveIntegerField(default=0)
     word_count = models.PositiveIntegerField(default=0)
@@ -83,6 +87,9 @@ class Post(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together=("author", "slug")
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     
     def __str__(self):
@@ -94,6 +101,8 @@ class Comment(models.Model):
     content = models.TextField()
     reply_count = models.PositiveIntegerField(default=0)
     reaction_count = models.PositiveIntegerField(default=0)
+    upvote_count = models.PositiveIntegerField(default=0)
+    downvote_count = models.PositiveIntegerField(default=0)
     views_count = models.PositiveIntegerField(default=0)
     parent = models.ForeignKey(
         "self",
@@ -107,6 +116,9 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user} on {self.post}"
@@ -120,7 +132,7 @@ class Reaction(models.Model):
         ('downvote', "Downvote"),
     ]
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reactions')
-    reaction_type= models.CharField(max_length=10, default='upvote')
+    reaction_type= models.CharField(max_length=10, choices=REACTION_TYPE_CHOICE, default='upvote')
     content_type = models.ForeignKey(
         ContentType,
         on_delete=models.CASCADE
@@ -135,6 +147,9 @@ class Reaction(models.Model):
     class Meta:
         unique_together=("user", "content_type", "object_id")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'reaction_type', 'created_at']),
+        ]
     
     def __str__(self):
         return f"Reaction by {self.user} on {self.post}"
@@ -0,0 +1,160 @@
+"""
+Reconciliation of denormalized counters.
+
+Every counter is described by a ``Counter``: the field holding it, the model
+whose rows it counts, the foreign key pointing back at the counted object
+and an optional filter. ``reconcile_counters`` walks each target table in
+primary-key chunks, recomputes the chunk's counters with one grouped
+``COUNT`` per counter (restricted to the chunk's key range, so the
+foreign-key indexes are used), and bulk-updates only the rows that drifted.
+Memory is bounded by the chunk size however large the tables are.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.core.authentication import invalidate_cached_user
+from apps.core.models import Follow, User
+from apps.core.response_cache import bump_resource_versions
+from .models import Bookmark, Category, Comment, Post, Reaction
+from .utils import get_content_type_id
+
+
+class Counter:
+    def __init__(self, model, field_name, source, group_by, condition=None):
+        self.model = model
+        self.field_name = field_name
+        self.source = source
+        self.group_by = group_by
+        self.condition = condition
+
+    @property
+    def label(self):
+        return f"{self.model._meta.model_name}.{self.field_name}"
+
+    def get_condition(self):
+        return self.condition() if callable(self.condition) else self.condition
+
+    def count(self, low, high):
+        """Actual counts for target pks in ``[low, high]``, keyed by pk."""
+        queryset = self.source.objects.filter(**{
+            f'{self.group_by}__gte': low,
+            f'{self.group_by}__lte': high,
+        })
+        condition = self.get_condition()
+        if condition is not None:
+            queryset = queryset.filter(condition)
+        return dict(
+            queryset.order_by().values(self.group_by).annotate(
+                total=Count('*')
+            ).values_list(self.group_by, 'total')
+        )
+
+
+def _reactions_on(model, reaction_type=None):
+    def condition():
+        q = Q(content_type_id=get_content_type_id(model))
+        if reaction_type:
+            q &= Q(reaction_type=reaction_type)
+        return q
+    return condition
+
+
+COUNTERS = [
+    Counter(Post, 'comment_count', Comment, 'post_id', Q(parent__isnull=True)),
+    Counter(Post, 'reaction_count', Reaction, 'object_id', _reactions_on(Post)),
+    Counter(Post, 'upvote_count', Reaction, 'object_id', _reactions_on(Post, 'upvote')),
+    Counter(Post, 'downvote_count', Reaction, 'object_id', _reactions_on(Post, 'downvote')),
+    Counter(Post, 'bookmark_count', Bookmark, 'post_id'),
+    Counter(Comment, 'reply_count', Comment, 'parent_id'),
+    Counter(Comment, 'reaction_count', Reaction, 'object_id', _reactions_on(Comment)),
+    Counter(Comment, 'upvote_count', Reaction, 'object_id', _reactions_on(Comment, 'upvote')),
+    Counter(Comment, 'downvote_count', Reaction, 'object_id', _reactions_on(Comment, 'downvote')),
+    Counter(Category, 'posts_count', Post, 'category_id', Q(is_deleted=False)),
+    Counter(User, 'followers_count', Follow, 'following_id'),
+    Counter(User, 'following_count', Follow, 'follower_id'),
+    Counter(User, 'posts_count', Post, 'author_id', Q(is_deleted=False)),
+]
+
+
+class Drift:
+    def __init__(self, label):
+        self.label = label
+        self.scanned = 0
+        self.drifted = 0
+        self.total_drift = 0
+        self.max_drift = 0
+        self.samples = []
+
+    def record(self, pk, stored, actual):
+        delta = actual - stored
+        self.drifted += 1
+        self.total_drift += abs(delta)
+        self.max_drift = max(self.max_drift, abs(delta))
+        if len(self.samples) < 5:
+            self.samples.append((pk, stored, actual))
+
+
+def _reconcile_chunk(model, counters, pks, dry_run, report):
+    low, high = pks[0], pks[-1]
+    fields = [counter.field_name for counter in counters]
+    with transaction.atomic():
+        rows = model.objects.filter(pk__in=pks).order_by('pk')
+        if not dry_run:
+            rows = rows.select_for_update()
+        stored = {row[0]: row[1:] for row in rows.values_list('pk', *fields)}
+        actual = [counter.count(low, high) for counter in counters]
+
+        changed = {}
+        for pk, values in stored.items():
+            for index, counter in enumerate(counters):
+                report[counter.label].scanned += 1
+                expected = actual[index].get(pk, 0)
+                if values[index] != expected:
+                    report[counter.label].record(pk, values[index], expected)
+                    changed.setdefault(pk, {})[counter.field_name] = expected
+
+        if changed and not dry_run:
+            drifted_fields = sorted({name for values in changed.values() for name in values})
+            objs = []
+            for pk, values in changed.items():
+                current = dict(zip(fields, stored[pk]))
+                current.update(values)
+                objs.append(model(pk=pk, **{name: current[name] for name in drifted_fields}))
+            model.objects.bulk_update(objs, drifted_fields)
+    return changed
+
+
+def reconcile_counters(counters=None, chunk_size=2000, dry_run=False):
+    """
+    Recompute ``counters`` (default: all of ``COUNTERS``) and fix the rows
+    that drifted. Returns a ``{label: Drift}`` report.
+    """
+    counters = counters or COUNTERS
+    report = {counter.label: Drift(counter.label) for counter in counters}
+
+    by_model = {}
+    for counter in counters:
+        by_model.setdefault(counter.model, []).append(counter)
+
+    changed_models = set()
+    for model, model_counters in by_model.items():
+        last_pk = None
+        while True:
+            pks = model.objects.order_by('pk')
+            if last_pk is not None:
+                pks = pks.filter(pk__gt=last_pk)
+            pks = list(pks.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+
+            changed = _reconcile_chunk(model, model_counters, pks, dry_run, report)
+            if changed and not dry_run:
+                changed_models.add(model)
+                if model is User:
+                    for pk in changed:
+                        invalidate_cached_user(pk)
+
+    if changed_models:
+        bump_resource_versions('posts', 'categories')
+    return report
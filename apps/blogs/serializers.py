@@ -1,8 +1,15 @@
-from django.contrib.auth.models import ContentType
-from rest_framework import generics, serializers
+import asyncio
 
-from apps.core.serializers import UserSerializer, UserSummarySerializer
+from rest_framework import serializers
+
+from apps.core.representation import SparseFieldsMixin
+from apps.core.serializers import UserCardSerializer, UserSerializer, UserSummarySerializer, ViewerStateListSerializer
 from .models import Category, Comment, Post, Reaction, Bookmark, Tag
+from apps.core.utils import aprime_following_state, prime_following_state
+from .utils import (
+    aprime_post_viewer_state, get_comment_viewer_state, get_post_viewer_state, prime_comment_viewer_state,
+    prime_post_viewer_state
+)
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,7 +25,10 @@ class TagSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return super().create(validated_data)
 
-class PostSerializer(serializers.ModelSerializer):
+VIEWER_STATE_FIELDS = {'is_liked', 'is_bookmarked'}
+
+
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSummarySerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     tags = serializers.ListField(
@@ -40,38 +50,77 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['id', 'content', 'subtitle', 'title', 'author', 'tags', 'tag_objects', 'category', 'category_id', 'slug', 'thumbnail', 'status', 'comment_count', 'reaction_count', 'bookmark_count', 'views_count', 'word_count', 'paragraph_count', 'read_time', 'is_liked', 'is_bookmarked', 'created_at', 'updated_at' ]
-        read_only_fields = ['author', 'category', 'comment_count', 'reaction_count', 'bookmark_count', 'views_count']
+        fields = ['id', 'content', 'subtitle', 'title', 'author', 'tags', 'tag_objects', 'category', 'category_id', 'slug', 'thumbnail', 'excerpt', 'status', 'comment_count', 'reaction_count', 'upvote_count', 'downvote_count', 'bookmark_count', 'views_count', 'word_count', 'paragraph_count', 'read_time', 'is_liked', 'is_bookmarked', 'created_at', 'updated_at' ]
+        read_only_fields = ['author', 'category', 'excerpt', 'comment_count', 'reaction_count', 'upvote_count', 'downvote_count', 'bookmark_count', 'views_count', 'word_count', 'paragraph_count', 'read_time']
+        list_serializer_class = ViewerStateListSerializer
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         return super().create(validated_data)
 
+    def prepare_queryset(self, queryset):
+        if 'content' not in self.fields:
+            queryset = queryset.defer('content')
+        return queryset
+
+    def prime_viewer_state(self, posts):
+        if VIEWER_STATE_FIELDS & self.fields.keys():
+            prime_post_viewer_state(self.context, posts)
+        if 'author' in self.fields:
+            prime_following_state(self.context, [post.author for post in posts])
+
+    async def aprime_viewer_state(self, posts):
+        primers = []
+        if VIEWER_STATE_FIELDS & self.fields.keys():
+            primers.append(aprime_post_viewer_state(self.context, posts))
+        if 'author' in self.fields:
+            primers.append(aprime_following_state(self.context, [post.author for post in posts]))
+        await asyncio.gather(*primers)
+
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        post_id = obj.id
-        post = generics.get_object_or_404(Post, pk=post_id)
-        post_type = ContentType.objects.get_for_model(Post)
-        if not request or not request.user.is_authenticated:
-            return False
-
-        return Reaction.objects.filter(
-            user=request.user,
-            content_type=post_type,
-            object_id=post.id
-        ).exists()
+        return obj.pk in get_post_viewer_state(self.context, obj)['liked']
 
     def get_is_bookmarked(self, obj):
-        request = self.context.get('request')
-        post_id = obj.id
-        post = generics.get_object_or_404(Post, pk=post_id)
-        if not request or not request.user.is_authenticated:
-            return False
+        return obj.pk in get_post_viewer_state(self.context, obj)['bookmarked']
+
+
+class PostCardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact post for feeds and result lists (``?view=card``): the stored
+    excerpt instead of the content, only the author's name and avatar, and
+    the category and tag slugs. The content column itself is never loaded.
+    """
+    author = UserCardSerializer(read_only=True)
+    category = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    tags = serializers.SlugRelatedField(slug_field='slug', many=True, read_only=True)
+    is_liked = serializers.SerializerMethodField()
+    is_bookmarked = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'subtitle', 'slug', 'thumbnail', 'excerpt', 'author', 'category', 'tags', 'comment_count', 'reaction_count', 'bookmark_count', 'views_count', 'read_time', 'is_liked', 'is_bookmarked', 'created_at']
+        list_serializer_class = ViewerStateListSerializer
+
+    def prepare_queryset(self, queryset):
+        return queryset.only(
+            'title', 'subtitle', 'slug', 'thumbnail', 'excerpt', 'comment_count', 'reaction_count', 'bookmark_count',
+            'views_count', 'read_time', 'created_at', 'author', 'author__first_name', 'author__last_name',
+            'author__profile_pic_url', 'category', 'category__slug'
+        )
+
+    def prime_viewer_state(self, posts):
+        if VIEWER_STATE_FIELDS & self.fields.keys():
+            prime_post_viewer_state(self.context, posts)
+
+    async def aprime_viewer_state(self, posts):
+        if VIEWER_STATE_FIELDS & self.fields.keys():
+            await aprime_post_viewer_state(self.context, posts)
 
-        return Bookmark.objects.filter(
-            user=request.user,
-            post=post
-        ).exists()
+    def get_is_liked(self, obj):
+        return obj.pk in get_post_viewer_state(self.context, obj)['liked']
+
+    def get_is_bookmarked(self, obj):
+        return obj.pk in get_post_viewer_state(self.context, obj)['bookmarked']
 
 class PostSummarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -91,8 +140,13 @@ class CommentSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'user', 'content', 'parent_id', 'is_liked', 'reply_count', 'reaction_count', 'views_count', 'created_at', 'updated_at']
-        read_only_fields = ['post', 'user', 'reply_count', 'reaction_count', 'views_count', 'created_at', 'updated_at']
+        fields = ['id', 'post', 'user', 'content', 'parent_id', 'is_liked', 'reply_count', 'reaction_count', 'upvote_count', 'downvote_count', 'views_count', 'created_at', 'updated_at']
+        read_only_fields = ['post', 'user', 'reply_count', 'reaction_count', 'upvote_count', 'downvote_count', 'views_count', 'created_at', 'updated_at']
+        list_serializer_class = ViewerStateListSerializer
+
+    def prime_viewer_state(self, comments):
+        prime_comment_viewer_state(self.context, comments)
+        prime_following_state(self.context, [comment.user for comment in comments])
 
     def validate_parent(self, parent):
         if parent.parent is not None:
@@ -102,18 +156,20 @@ class CommentSerializer(serializers.ModelSerializer):
         return parent
 
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        comment_id = obj.id
-        comment = generics.get_object_or_404(Comment, pk=comment_id)
-        comment_type = ContentType.objects.get_for_model(Comment)
-        if not request or not request.user.is_authenticated:
-            return False
-
-        return Reaction.objects.filter(
-            user=request.user,
-            content_type=comment_type,
-            object_id=comment.id
-        ).exists()
+        return obj.pk in get_comment_viewer_state(self.context, obj)['liked']
+
+
+class CommentThreadSerializer(CommentSerializer):
+    """A top-level comment with its newest replies (``recent_replies``)."""
+    replies = CommentSerializer(source='recent_replies', many=True, read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['replies']
+
+    def prime_viewer_state(self, comments):
+        super().prime_viewer_state(
+            list(comments) + [reply for comment in comments for reply in comment.recent_replies]
+        )
 
 class ReactionSerializer(serializers.ModelSerializer):
     user = UserSummarySerializer(read_only=True)
@@ -122,6 +178,10 @@ class ReactionSerializer(serializers.ModelSerializer):
         model = Reaction
         fields = ['id', 'user', 'reaction_type', 'created_at']
         read_only_fields = ['user', 'created_at']
+        list_serializer_class = ViewerStateListSerializer
+
+    def prime_viewer_state(self, reactions):
+        prime_following_state(self.context, [reaction.user for reaction in reactions])
 
 class BookmarkSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -131,3 +191,12 @@ class BookmarkSerializer(serializers.ModelSerializer):
         model = Bookmark
         fields = ['id', 'user', 'post', 'created_at']
         read_only_fields = ['user', 'post', 'created_at']
+        list_serializer_class = ViewerStateListSerializer
+
+    def prime_viewer_state(self, bookmarks):
+        posts = [bookmark.post for bookmark in bookmarks]
+        prime_post_viewer_state(self.context, posts)
+        prime_following_state(
+            self.context,
+            [bookmark.user for bookmark in bookmarks] + [post.author for post in posts]
+        )
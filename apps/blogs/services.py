@@ -0,0 +1,190 @@
+import re
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.core.response_cache import bump_resource_versions
+from apps.search.autocomplete import index_objects
+from apps.search.index import update_post_document
+from apps.search.models import AutocompleteEntry
+from .models import Post, Reaction, Tag
+from .utils import get_content_type_id
+
+
+def post_resource(slug):
+    """
+    Response-cache resource of a single post. Counter changes bump only this
+    one; post lists pick them up when their cached pages expire.
+    """
+    return f'post:{slug}'
+
+
+def normalize_tag_name(name):
+    return re.sub(r'\s+', ' ', name).strip().lower()
+
+
+def tag_slug(name):
+    return name.replace(' ', '-')
+
+
+def resolve_tags(names):
+    """
+    Return Tag objects for ``names`` in the order given, creating the missing
+    ones. Costs at most three queries however many tags are passed, and a tag
+    created concurrently by another request is picked up instead of raising
+    an IntegrityError.
+    """
+    names = list(dict.fromkeys(
+        normalized for normalized in map(normalize_tag_name, names) if normalized
+    ))
+    if not names:
+        return []
+
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=tag_slug(name)) for name in missing],
+            ignore_conflicts=True
+        )
+        bump_resource_versions('tags')
+        # Names that collapse to an existing slug ("Machine Learning" and
+        # "machine-learning") resolve to the tag that already owns the slug.
+        slugs = [tag_slug(name) for name in missing]
+        created = Tag.objects.filter(Q(name__in=missing) | Q(slug__in=slugs))
+        by_slug = {}
+        for tag in created:
+            by_slug[tag.slug] = tag
+            if tag.name in missing:
+                tags[tag.name] = tag
+        for name in missing:
+            if name not in tags and tag_slug(name) in by_slug:
+                tags[name] = by_slug[tag_slug(name)]
+        # bulk_create sends no post_save, so index the new tags for autocomplete here.
+        index_objects(AutocompleteEntry.TAG, [tags[name] for name in missing if name in tags])
+
+    return list(dict.fromkeys(tags[name] for name in names if name in tags))
+
+
+def set_post_tags(post, names, replace=True):
+    """
+    Set the tags of ``post`` from ``names`` with one bulk insert. Pass
+    ``replace=False`` for a new post, which has no tags to remove.
+    """
+    tags = resolve_tags(names)
+    through = Post.tags.through
+    if replace:
+        through.objects.filter(post=post).exclude(tag__in=tags).delete()
+    through.objects.bulk_create(
+        [through(post=post, tag=tag) for tag in tags],
+        ignore_conflicts=True
+    )
+    # bulk_create sends no m2m_changed, so refresh the search document here.
+    getattr(post, '_prefetched_objects_cache', {}).pop('tags', None)
+    update_post_document(post)
+    return tags
+
+
+def reaction_counter_updates(added=None, removed=None):
+    """
+    ``update()`` kwargs that keep ``reaction_count`` and the per-type counts
+    (``upvote_count``, ``downvote_count``) of a Post or Comment in step when a
+    reaction of type ``added`` is created, one of type ``removed`` is deleted,
+    or both when a reaction switches type.
+    """
+    updates = {}
+    if added:
+        updates[f'{added}_count'] = F(f'{added}_count') + 1
+    if removed:
+        updates[f'{removed}_count'] = Greatest(F(f'{removed}_count') - 1, 0)
+    if added and not removed:
+        updates['reaction_count'] = F('reaction_count') + 1
+    elif removed and not added:
+        updates['reaction_count'] = Greatest(F('reaction_count') - 1, 0)
+    return updates
+
+
+def _insert_reaction(user, content_type_id, object_id, reaction_type, created_at):
+    """INSERT the reaction unless the user already reacted; return its id or None."""
+    if connection.vendor in ('postgresql', 'sqlite'):
+        qn = connection.ops.quote_name
+        opts = Reaction._meta
+        columns = [
+            opts.get_field(name).column
+            for name in ('user', 'content_type', 'object_id', 'reaction_type', 'created_at')
+        ]
+        unique = [opts.get_field(name).column for name in ('user', 'content_type', 'object_id')]
+        sql = (
+            f"INSERT INTO {qn(opts.db_table)} ({', '.join(map(qn, columns))}) "
+            f"VALUES (%s, %s, %s, %s, %s) "
+            f"ON CONFLICT ({', '.join(map(qn, unique))}) DO NOTHING "
+            f"RETURNING {qn(opts.pk.column)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                user.pk, content_type_id, object_id, reaction_type,
+                connection.ops.adapt_datetimefield_value(created_at),
+            ])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    try:
+        with transaction.atomic():
+            return Reaction.objects.create(
+                user=user,
+                content_type_id=content_type_id,
+                object_id=object_id,
+                reaction_type=reaction_type,
+                created_at=created_at
+            ).pk
+    except IntegrityError:
+        return None
+
+
+def toggle_reaction(user, target, reaction_type):
+    """
+    Toggle ``user``'s reaction on ``target`` (a Post or Comment): reacting
+    again with the same type removes the reaction, another type switches it.
+    The reaction row and the target's counters change in one transaction, so
+    concurrent double-taps can never leave ``reaction_count`` out of step
+    with the Reaction rows.
+
+    Returns ``(reaction, created)``; ``reaction`` is None when it was removed.
+    """
+    content_type_id = get_content_type_id(type(target))
+    lookup = {'user': user, 'content_type_id': content_type_id, 'object_id': target.pk}
+    counters = type(target).objects.filter(pk=target.pk)
+
+    with transaction.atomic():
+        while True:
+            now = timezone.now()
+            reaction_id = _insert_reaction(user, content_type_id, target.pk, reaction_type, now)
+            if reaction_id is not None:
+                counters.update(**reaction_counter_updates(added=reaction_type))
+                reaction, created = Reaction(
+                    pk=reaction_id, reaction_type=reaction_type, created_at=now, **lookup
+                ), True
+                break
+
+            existing = Reaction.objects.select_for_update().filter(**lookup).first()
+            if existing is None:
+                # Removed by a concurrent toggle after our INSERT conflicted.
+                continue
+            if existing.reaction_type == reaction_type:
+                existing.delete()
+                counters.update(**reaction_counter_updates(removed=reaction_type))
+                reaction, created = None, False
+            else:
+                counters.update(**reaction_counter_updates(
+                    added=reaction_type, removed=existing.reaction_type
+                ))
+                existing.reaction_type = reaction_type
+                existing.save(update_fields=['reaction_type'])
+                reaction, created = existing, False
+            break
+
+    if isinstance(target, Post):
+        bump_resource_versions(post_resource(target.slug))
+    return reaction, created
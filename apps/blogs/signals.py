@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.models import User
+from apps.core.response_cache import bump_resource_versions
+from .models import Bookmark, Category, Comment, Post, Reaction, Tag
+from .services import post_resource
+from .utils import get_content_type_id
+
+# User fields embedded in post payloads as the author.
+POST_AUTHOR_FIELDS = {'email', 'first_name', 'last_name', 'profile_pic_url', 'bio', 'about'}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_responses(sender, **kwargs):
+    # Category payloads include posts_count.
+    bump_resource_versions('posts', 'categories')
+
+
+def _invalidate_post(post_id):
+    slug = Post.objects.filter(pk=post_id).values_list('slug', flat=True).first()
+    if slug is not None:
+        bump_resource_versions(post_resource(slug))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Bookmark)
+@receiver(post_delete, sender=Bookmark)
+def invalidate_post_counters(sender, instance, created=True, **kwargs):
+    # Only the post's counters change, and only when a row is added or
+    # removed (post_delete sends no ``created``).
+    if created:
+        _invalidate_post(instance.post_id)
+
+
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+def invalidate_reaction_counters(sender, instance, **kwargs):
+    if instance.content_type_id == get_content_type_id(Post):
+        _invalidate_post(instance.object_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_post_authors(sender, instance, update_fields=None, **kwargs):
+    # Logins and counter updates save other fields only.
+    if update_fields is not None and not POST_AUTHOR_FIELDS & set(update_fields):
+        return
+    bump_resource_versions('posts')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, **kwargs):
+    bump_resource_versions('categories', 'posts')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_responses(sender, **kwargs):
+    bump_resource_versions('tags', 'posts')
@@ -1,3 +1,294 @@
-from django.test import TestCase
+import importlib
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.models import User
+from apps.core.response_cache import get_resource_versions
+from . import services, view_counts
+from .content import EXCERPT_LENGTH, analyze_content, content_updates
+from .models import Bookmark, Category, Comment, Post, Reaction
+from .services import post_resource, toggle_reaction
+from .utils import get_content_type_id
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ToggleReactionConcurrencyTests(TransactionTestCase):
+    users = 8
+    toggles = 5
+
+    def setUp(self):
+        author = User.objects.create_user(email='author@example.com', password='pw')
+        category = Category.objects.create(name='Tech', slug='tech')
+        self.post = Post.objects.create(
+            author=author, category=category, title='Post', slug='post', status=Post.PUBLISHED
+        )
+        self.reactors = [
+            User.objects.create_user(email=f'user{i}@example.com', password='pw')
+            for i in range(self.users)
+        ]
+
+    def test_concurrent_toggles_keep_counters_in_step(self):
+        # Two threads per user, one upvoting and one downvoting, so every
+        # user double-taps against itself while all users hit the same post.
+        jobs = [
+            (user, reaction_type)
+            for user in self.reactors
+            for reaction_type in ('upvote', 'downvote')
+        ]
+        barrier = threading.Barrier(len(jobs))
+        errors = []
+
+        def hammer(user, reaction_type):
+            try:
+                barrier.wait()
+                for _ in range(self.toggles):
+                    toggle_reaction(user, self.post, reaction_type)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=hammer, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.post.refresh_from_db()
+        reactions = Reaction.objects.filter(
+            content_type_id=get_content_type_id(Post),
+            object_id=self.post.pk
+        )
+        self.assertEqual(self.post.reaction_count, reactions.count())
+        self.assertEqual(self.post.upvote_count, reactions.filter(reaction_type='upvote').count())
+        self.assertEqual(self.post.downvote_count, reactions.filter(reaction_type='downvote').count())
+
+
+class ToggleReactionTests(TestCase):
+    """The toggle paths, including a double-tap whose INSERT conflicts, on any backend."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(email='author@example.com', password='pw')
+        category = Category.objects.create(name='Tech', slug='tech')
+        cls.post = Post.objects.create(
+            author=author, category=category, title='Post', slug='post', status=Post.PUBLISHED
+        )
+        cls.user = User.objects.create_user(email='reader@example.com', password='pw')
+
+    def assertCounters(self, upvotes, downvotes):
+        self.post.refresh_from_db()
+        reactions = Reaction.objects.filter(content_type_id=get_content_type_id(Post), object_id=self.post.pk)
+        self.assertEqual(
+            (self.post.upvote_count, self.post.downvote_count, self.post.reaction_count),
+            (upvotes, downvotes, upvotes + downvotes)
+        )
+        self.assertEqual(
+            (reactions.filter(reaction_type='upvote').count(), reactions.filter(reaction_type='downvote').count()),
+            (upvotes, downvotes)
+        )
+
+    def test_toggle_adds_switches_and_removes(self):
+        reaction, created = toggle_reaction(self.user, self.post, 'upvote')
+        self.assertTrue(created)
+        self.assertCounters(1, 0)
+        reaction, created = toggle_reaction(self.user, self.post, 'downvote')
+        self.assertEqual((reaction.reaction_type, created), ('downvote', False))
+        self.assertCounters(0, 1)
+        reaction, created = toggle_reaction(self.user, self.post, 'downvote')
+        self.assertEqual((reaction, created), (None, False))
+        self.assertCounters(0, 0)
+
+    def test_duplicate_insert_is_ignored(self):
+        content_type_id = get_content_type_id(Post)
+        now = timezone.now()
+        first = services._insert_reaction(self.user, content_type_id, self.post.pk, 'upvote', now)
+        self.assertIsNotNone(first)
+        self.assertIsNone(services._insert_reaction(self.user, content_type_id, self.post.pk, 'downvote', now))
+        self.assertEqual(list(Reaction.objects.values_list('pk', 'reaction_type')), [(first, 'upvote')])
+
+    def test_interleaved_double_tap_leaves_no_reaction(self):
+        # The second tap's whole toggle runs just before the first tap inserts,
+        # so the first tap's INSERT conflicts and it removes the reaction.
+        insert = services._insert_reaction
+        second_tap = []
+
+        def racing_insert(*args):
+            if not second_tap:
+                second_tap.append(None)
+                second_tap.append(toggle_reaction(self.user, self.post, 'upvote'))
+            return insert(*args)
+
+        with mock.patch.object(services, '_insert_reaction', side_effect=racing_insert):
+            reaction, created = toggle_reaction(self.user, self.post, 'upvote')
+        self.assertTrue(second_tap[1][1])
+        self.assertEqual((reaction, created), (None, False))
+        self.assertCounters(0, 0)
+
+
+# LocMemCache is shared by the threads of this process, standing in for the
+# Redis cache that web workers and the flush worker share in production.
+@override_settings(
+    VIEW_COUNT_BUFFERED=True,
+    VIEW_COUNT_CACHE_ALIAS='view-counts',
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'view-counts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'view-counts'},
+    },
+)
+class ViewCountBufferTests(TransactionTestCase):
+    workers = 6
+    views = 50
+
+    def setUp(self):
+        view_counts.get_cache().clear()
+        author = User.objects.create_user(email='author@example.com', password='pw')
+        category = Category.objects.create(name='Tech', slug='tech')
+        self.posts = [
+            Post.objects.create(author=author, category=category, title=f'Post {i}', slug=f'post-{i}')
+            for i in range(3)
+        ]
+        self.comment = Comment.objects.create(post=self.posts[0], user=author, content='Hi')
+
+    def test_no_views_are_lost_across_flushes_and_restarts(self):
+        barrier = threading.Barrier(self.workers)
+        errors = []
+
+        def browse(worker):
+            try:
+                barrier.wait()
+                for i in range(self.views):
+                    view_counts.record_view(Post, self.posts[(worker + i) % len(self.posts)].pk)
+                    view_counts.record_view(Comment, self.comment.pk)
+                    if i % 10 == worker:
+                        view_counts.flush_view_counts()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=browse, args=(worker,)) for worker in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        # A restarted worker starts from fresh module state; whatever is still
+        # pending must come from the shared cache.
+        importlib.reload(view_counts)
+        view_counts.flush_view_counts()
+
+        total = self.workers * self.views
+        self.assertEqual(sum(Post.objects.values_list('views_count', flat=True)), total)
+        self.assertEqual(Comment.objects.get().views_count, total)
+        for post in self.posts:
+            self.assertEqual(view_counts.get_pending_views(Post, post.pk), 0)
+
+    @override_settings(VIEW_COUNT_BUFFERED=False)
+    def test_unbuffered_views_are_written_immediately(self):
+        self.assertEqual(view_counts.record_view(Post, self.posts[0].pk), 1)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views_count, 1)
+        self.assertEqual(view_counts.check_view_count_cache(None), [])
+
+    def test_buffering_over_a_per_process_cache_is_flagged(self):
+        warnings = view_counts.check_view_count_cache(None)
+        self.assertEqual([warning.id for warning in warnings], ['blogs.W001'])
+
+
+class PostDeleteTests(TestCase):
+    def test_repeated_delete_decrements_counters_once(self):
+        author = User.objects.create_user(email='author@example.com', password='pw')
+        category = Category.objects.create(name='Tech', slug='tech')
+        Post.objects.create(author=author, category=category, title='Kept', slug='kept')
+        post = Post.objects.create(author=author, category=category, title='Gone', slug='gone')
+        User.objects.filter(pk=author.pk).update(posts_count=2)
+        Category.objects.filter(pk=category.pk).update(posts_count=2)
+
+        client = APIClient()
+        client.force_authenticate(author)
+        self.assertEqual(client.delete(f'/api/posts/{post.pk}/delete/').status_code, 204)
+        self.assertEqual(client.delete(f'/api/posts/{post.pk}/delete/').status_code, 404)
+
+        author.refresh_from_db()
+        category.refresh_from_db()
+        self.assertEqual((author.posts_count, category.posts_count), (1, 1))
+
+
+class ResponseCacheInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='pw')
+        cls.reader = User.objects.create_user(email='reader@example.com', password='pw')
+        category = Category.objects.create(name='Tech', slug='tech')
+        cls.post = Post.objects.create(
+            author=cls.author, category=category, title='Post', slug='post', status=Post.PUBLISHED
+        )
+
+    def versions(self):
+        names = ['posts', post_resource(self.post.slug)]
+        return [version for version, _ in map(get_resource_versions(names).get, names)]
+
+    def assertBumps(self, expected, write):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        self.assertEqual(
+            [after - previous for previous, after in zip(before, self.versions())],
+            expected
+        )
+
+    def test_counter_writes_only_bump_their_post(self):
+        self.assertBumps([0, 1], lambda: toggle_reaction(self.reader, self.post, 'upvote'))
+        self.assertBumps([0, 1], lambda: Reaction.objects.filter(user=self.reader).delete())
+        self.assertBumps([0, 1], lambda: Comment.objects.create(post=self.post, user=self.reader, content='Hi'))
+        self.assertBumps([0, 0], lambda: Comment.objects.filter(post=self.post).update(content='Edited'))
+        self.assertBumps([0, 1], lambda: Bookmark.objects.create(post=self.post, user=self.reader))
+
+    def test_only_author_fields_bump_post_lists(self):
+        self.reader.last_login = timezone.now()
+        self.assertBumps([0, 0], lambda: self.reader.save(update_fields=['last_login']))
+        self.author.first_name = 'Ada'
+        self.assertBumps([1, 0], lambda: self.author.save(update_fields=['first_name']))
+        self.assertBumps([1, 0], self.author.save)
+
+    def test_cached_post_detail_picks_up_its_counters(self):
+        client = APIClient()
+        url = f'/api/posts/{self.post.slug}/'
+        self.assertEqual(client.get(url).json()['reaction_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_reaction(self.reader, self.post, 'upvote')
+        self.assertEqual(client.get(url).json()['reaction_count'], 1)
+
+
+class ContentPipelineTests(SimpleTestCase):
+    def test_html_and_plain_text_are_counted_alike(self):
+        html = analyze_content(
+            '<h2>Intro</h2><p>One <b>bold</b>er word.</p><script>var x = 1;</script>'
+            '<p>Two &amp; three</p><ul><li>four</li></ul>'
+        )
+        self.assertEqual(html.word_count, 8)
+        self.assertEqual(html.paragraph_count, 4)
+        self.assertEqual(html.excerpt, 'Intro One bolder word. Two & three four')
+
+        plain = analyze_content('First paragraph here.\n\n  \nSecond one.\n')
+        self.assertEqual((plain.word_count, plain.paragraph_count, plain.read_time), (5, 2, 1))
+
+    def test_excerpt_is_truncated_and_read_time_rounds_up(self):
+        stats = analyze_content('<p>' + 'word ' * 401 + '</p>')
+        self.assertEqual(stats.read_time, 3)
+        self.assertEqual(len(stats.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(stats.excerpt.endswith('…'))
+        self.assertEqual(analyze_content('').as_fields()['read_time'], 0)
+
+    def test_unchanged_content_is_not_reprocessed(self):
+        post = Post(content='<p>Hello world</p>', **analyze_content('<p>Hello world</p>').as_fields())
+        self.assertEqual(content_updates(post, '<p>Hello world</p>'), {})
+        self.assertEqual(content_updates(post, '<p>Hello there world</p>')['word_count'], 3)
@@ -7,6 +7,7 @@ urlpatterns = [
     path('posts/<int:id>/update/', views.PostsUpdateView.as_view(), name='update-post'),
     path('posts/<int:id>/delete/', views.PostDeleteView.as_view(), name='delete-post'),
     path('posts/<int:id>/comments/', views.CommentsListCreateView.as_view(), name='list-create-post-comments'),
+    path('posts/<int:id>/thread/', views.CommentThreadView.as_view(), name='post-comment-thread'),
     path('posts/<int:id>/reactions/', views.PostReactionListCreateView.as_view(), name='list-create-post-reactions'),
     path('posts/<int:id>/bookmark/', views.BookmarkCreateView.as_view(), name='create-post-bookmark'),
     path('posts/<int:id>/bookmark/delete/', views.BookmarkDeleteView.as_view(), name='delete-bookmark'),
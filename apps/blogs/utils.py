@@ -0,0 +1,111 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+
+from apps.core.utils import alist, get_viewer
+from .models import Bookmark, Comment, Post, Reaction
+
+POST_VIEWER_STATE_KEY = 'post_viewer_state'
+COMMENT_VIEWER_STATE_KEY = 'comment_viewer_state'
+
+
+def get_content_type_id(model):
+    """ContentType id of ``model``, cached per process by ContentTypeManager."""
+    return ContentType.objects.get_for_model(model).id
+
+
+def _unresolved_post_state(context, posts):
+    state = context.setdefault(POST_VIEWER_STATE_KEY, {
+        'resolved': set(),
+        'liked': set(),
+        'bookmarked': set(),
+    })
+    return state, {post.pk for post in posts if post is not None} - state['resolved']
+
+
+def _post_state_querysets(user, post_ids, post_type_id):
+    return {
+        'liked': Reaction.objects.filter(
+            user=user,
+            content_type_id=post_type_id,
+            object_id__in=post_ids
+        ).values_list('object_id', flat=True),
+        'bookmarked': Bookmark.objects.filter(
+            user=user,
+            post_id__in=post_ids
+        ).values_list('post_id', flat=True),
+    }
+
+
+def prime_post_viewer_state(context, posts):
+    """
+    Resolve is_liked / is_bookmarked for every post in ``posts`` with one
+    Reaction query and one Bookmark query, and cache the result in the
+    serializer context so each row can read it without hitting the database.
+    """
+    state, post_ids = _unresolved_post_state(context, posts)
+    if not post_ids:
+        return state
+
+    user = get_viewer(context)
+    if user is not None:
+        for key, queryset in _post_state_querysets(user, post_ids, get_content_type_id(Post)).items():
+            state[key].update(queryset)
+
+    state['resolved'].update(post_ids)
+    return state
+
+
+async def aprime_post_viewer_state(context, posts):
+    """``prime_post_viewer_state`` for async views; both queries run concurrently."""
+    state, post_ids = _unresolved_post_state(context, posts)
+    if not post_ids:
+        return state
+
+    user = get_viewer(context)
+    if user is not None:
+        post_type_id = await sync_to_async(get_content_type_id)(Post)
+        querysets = _post_state_querysets(user, post_ids, post_type_id)
+        results = await asyncio.gather(*(alist(queryset) for queryset in querysets.values()))
+        for key, values in zip(querysets, results):
+            state[key].update(values)
+
+    state['resolved'].update(post_ids)
+    return state
+
+
+def get_post_viewer_state(context, post):
+    state = context.get(POST_VIEWER_STATE_KEY)
+    if state is None or post.pk not in state['resolved']:
+        state = prime_post_viewer_state(context, [post])
+    return state
+
+
+def prime_comment_viewer_state(context, comments):
+    """Resolve is_liked for every comment in ``comments`` with one Reaction query."""
+    state = context.setdefault(COMMENT_VIEWER_STATE_KEY, {
+        'resolved': set(),
+        'liked': set(),
+    })
+    comment_ids = {comment.pk for comment in comments if comment is not None} - state['resolved']
+    if not comment_ids:
+        return state
+
+    user = get_viewer(context)
+    if user is not None:
+        state['liked'].update(Reaction.objects.filter(
+            user=user,
+            content_type_id=get_content_type_id(Comment),
+            object_id__in=comment_ids
+        ).values_list('object_id', flat=True))
+
+    state['resolved'].update(comment_ids)
+    return state
+
+
+def get_comment_viewer_state(context, comment):
+    state = context.get(COMMENT_VIEWER_STATE_KEY)
+    if state is None or comment.pk not in state['resolved']:
+        state = prime_comment_viewer_state(context, [comment])
+    return state
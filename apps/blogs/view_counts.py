@@ -0,0 +1,194 @@
+"""
+Write-behind buffer for Post / Comment view counts.
+
+Views are counted with an atomic ``incr`` on a per-object key in the shared
+cache instead of an ``UPDATE ... views_count + 1`` per request. The first
+pending view of an object appends its pk to a per-model log, and
+``flush_view_counts`` drains the log, subtracts exactly what it read from
+each counter and applies the totals with one ``bulk_update`` per model. Flushing is left to
+the ``flush_view_counts`` command so no request pays for it.
+
+Pending counts live only in the cache, so buffering is on
+(``VIEW_COUNT_BUFFERED``) only when that cache is shared by every worker
+and outlives them, such as Redis. Otherwise each view is written straight
+to the database as before, and a system check warns when buffering is
+turned on over a per-process cache.
+"""
+import logging
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from apps.core.response_cache import bump_resource_versions
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+BUFFERED_MODELS = (Post, Comment)
+FLUSH_LOCK_TIMEOUT = 60
+MAX_GAP_RETRIES = 3
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_cache():
+    return caches[getattr(settings, 'VIEW_COUNT_CACHE_ALIAS', 'default')]
+
+
+def is_buffered():
+    return getattr(settings, 'VIEW_COUNT_BUFFERED', False)
+
+
+@checks.register(checks.Tags.caches)
+def check_view_count_cache(app_configs, **kwargs):
+    if not is_buffered():
+        return []
+    alias = getattr(settings, 'VIEW_COUNT_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [checks.Warning(
+        f"VIEW_COUNT_BUFFERED is on but the '{alias}' cache ({backend}) is per process.",
+        hint="Buffered views are lost on restart and split between workers; "
+             "point VIEW_COUNT_CACHE_ALIAS at a shared cache such as Redis.",
+        id='blogs.W001',
+    )]
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _count_key(model, pk):
+    return f"view-count:{_label(model)}:{pk}"
+
+
+def _seq_key(model):
+    return f"view-count:{_label(model)}:seq"
+
+
+def _log_key(model, seq):
+    return f"view-count:{_label(model)}:log:{seq}"
+
+
+def _flushed_key(model):
+    return f"view-count:{_label(model)}:flushed"
+
+
+def _gaps_key(model):
+    return f"view-count:{_label(model)}:gaps"
+
+
+def _incr(cache, key, delta=1):
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The key was evicted between add() and incr().
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def _mark_dirty(cache, model, pk):
+    seq = _incr(cache, _seq_key(model))
+    cache.set(_log_key(model, seq), pk, timeout=None)
+
+
+def record_view(model, pk):
+    """
+    Count one view of ``model`` ``pk`` and return the number of views that
+    are not reflected in an object loaded before it (including this one).
+    """
+    if not is_buffered():
+        model.objects.filter(pk=pk).update(views_count=F('views_count') + 1)
+        return 1
+    cache = get_cache()
+    pending = _incr(cache, _count_key(model, pk))
+    if pending == 1:
+        _mark_dirty(cache, model, pk)
+    return pending
+
+
+def get_pending_views(model, pk):
+    if not is_buffered():
+        return 0
+    return get_cache().get(_count_key(model, pk), 0)
+
+
+def _dirty_pks(cache, model):
+    flushed = cache.get(_flushed_key(model), 0)
+    seq = cache.get(_seq_key(model), 0)
+    gaps = cache.get(_gaps_key(model), {})
+
+    candidates = dict(gaps)
+    for n in range(flushed + 1, seq + 1):
+        candidates.setdefault(n, 0)
+    if not candidates:
+        return set()
+
+    log_keys = {_log_key(model, n): n for n in candidates}
+    found = cache.get_many(list(log_keys))
+
+    # A log entry can be missing because its writer has bumped the sequence
+    # but not stored the pk yet; retry those on the next few flushes.
+    new_gaps = {
+        n: attempts + 1
+        for n, attempts in candidates.items()
+        if _log_key(model, n) not in found and attempts + 1 < MAX_GAP_RETRIES
+    }
+    cache.set(_gaps_key(model), new_gaps, timeout=None)
+    cache.set(_flushed_key(model), max(seq, flushed), timeout=None)
+    cache.delete_many(list(found))
+    return set(found.values())
+
+
+def _flush_model(cache, model):
+    drained = {}
+    for pk in _dirty_pks(cache, model):
+        key = _count_key(model, pk)
+        pending = cache.get(key, 0)
+        if not pending:
+            continue
+        # Subtract only what was read so concurrent views are kept; if any
+        # arrived in between they did not register themselves, so do it here.
+        if cache.decr(key, pending) > 0:
+            _mark_dirty(cache, model, pk)
+        drained[pk] = pending
+
+    if not drained:
+        return 0
+
+    objs = [model(pk=pk, views_count=F('views_count') + count) for pk, count in drained.items()]
+    try:
+        with transaction.atomic():
+            model.objects.bulk_update(objs, ['views_count'], batch_size=500)
+    except Exception:
+        logger.exception("Error flushing %s view counts, re-buffering", _label(model))
+        for pk, count in drained.items():
+            if _incr(cache, _count_key(model, pk), count) == count:
+                _mark_dirty(cache, model, pk)
+        return 0
+    return sum(drained.values())
+
+
+def flush_view_counts():
+    """
+    Write every buffered view count to the database. Returns a mapping of
+    model label to the number of views flushed; only one process flushes
+    at a time.
+    """
+    cache = get_cache()
+    if not cache.add('view-count:flush-lock', 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return {}
+    try:
+        flushed = {_label(model): _flush_model(cache, model) for model in BUFFERED_MODELS}
+        if any(flushed.values()):
+            bump_resource_versions('posts')
+        return flushed
+    finally:
+        cache.delete('view-count:flush-lock')
@@ -1,8 +1,8 @@
 
-from django.db.models import F
+from django.db import transaction
+from django.db.models import F, Prefetch
 from rest_framework import generics, filters, permissions, pagination, status
 from rest_framework.response import Response
-from django.contrib.contenttypes.models import ContentType
 from rest_framework.views import APIView
 
 from .permissions import IsCommentOwner, IsOwner, IsBookmarkOwner
@@ -10,20 +10,29 @@ from .throttles import (
     PostCreateRateThrottle, PostUpdateRateThrottle, PostReadRateThrottle, PostReadAnonRateThrottle,
     CommentCreateRateThrottle, ReactionRateThrottle, BookmarkRateThrottle
 )
+from apps.core.metrics import MetricsMixin
+from apps.core.representation import CardViewMixin
+from apps.core.response_cache import CachedResponseMixin
 from apps.notifications.utils import create_notification
+from .content import analyze_content, content_updates
+from .services import post_resource, set_post_tags, toggle_reaction
+from .utils import get_content_type_id
+from .view_counts import record_view
 
-from .serializers import CommentSerializer, PostSerializer, CategorySerializer, ReactionSerializer, BookmarkSerializer, TagSerializer
+from .serializers import CommentSerializer, CommentThreadSerializer, PostCardSerializer, PostSerializer, CategorySerializer, ReactionSerializer, BookmarkSerializer, TagSerializer
 
 from .models import Post, Category, Comment, Reaction, Bookmark, Tag
 from apps.core.models import User
 # Create your views here
 
-class PostsListCreateView(generics.ListCreateAPIView):
+class PostsListCreateView(MetricsMixin, CardViewMixin, generics.ListCreateAPIView):
     queryset = Post.objects.active()
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'content']
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 10
     
     def get_throttles(self):
         if self.request.method == 'GET':
@@ -34,7 +43,7 @@ class PostsListCreateView(generics.ListCreateAPIView):
     
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related("author")
+        qs = super().get_queryset().select_related("author", "category").prefetch_related("tags")
         status = self.request.query_params.get('status')
         category = self.request.query_params.get('category')
         if status == 'draft':
@@ -46,22 +55,17 @@ class PostsListCreateView(generics.ListCreateAPIView):
         return qs
 
     def perform_create(self, serializer):
-        print(serializer.validated_data)
-        validated_data = serializer.validated_data
-        print(validated_data)
-        tag_names = validated_data.pop("tags", [])
-        tags = []
-        for name in tag_names:
-            tag, _ = Tag.objects.get_or_create(
-                name=name.lower().strip(),
-                defaults={"slug": name.lower().replace(" ", "-")}
-            )
-            tags.append(tag)
-        serializer.save(author=self.request.user, tags=tags)
-        category = generics.get_object_or_404(Category, pk=validated_data['category'].id)
-        print(category)
+        tag_names = serializer.validated_data.pop("tags", [])
+        stats = analyze_content(serializer.validated_data.get('content', ''))
+        post = serializer.save(author=self.request.user, **stats.as_fields())
+        set_post_tags(post, tag_names, replace=False)
         Category.objects.filter(
-                pk=validated_data['category'].id
+                pk=post.category_id
+            ).update(
+                posts_count=F("posts_count") + 1
+            )
+        User.objects.filter(
+                pk=post.author_id
             ).update(
                 posts_count=F("posts_count") + 1
             )
@@ -76,47 +80,69 @@ class PostsUpdateView(generics.UpdateAPIView):
     lookup_url_kwarg='id'
 
     def perform_update(self, serializer):
-        instance = serializer.save();
-        instance.save()
+        tag_names = serializer.validated_data.pop("tags", None)
+        content = serializer.validated_data.get('content')
+        stats = content_updates(serializer.instance, content) if content is not None else {}
+        instance = serializer.save(**stats)
+        if tag_names is not None:
+            set_post_tags(instance, tag_names)
 
 class PostDeleteView(generics.DestroyAPIView):
-    queryset= Post.objects.all()
+    queryset= Post.objects.active()
     serializer_class = PostSerializer
     permission_classes = [IsOwner]
     lookup_field = 'pk'
     lookup_url_kwarg='id'
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        print("instance", instance)
+        # Re-check under a row lock so concurrent DELETEs of the same post
+        # decrement the counters once.
+        if not Post.objects.select_for_update().filter(pk=instance.pk, is_deleted=False).exists():
+            return
         instance.is_deleted = True
         instance.save(update_fields=['is_deleted'])
-        category = generics.get_object_or_404(Category, pk=instance.category)
-        print(category)
-        Category.objects.filter(pk=category.id, 
-        posts_count__gt=0).update(
-                posts_count=F("posts_count") + 1
-        )
+        Category.objects.filter(
+                pk=instance.category_id,
+                posts_count__gt=0
+            ).update(
+                posts_count=F("posts_count") - 1
+            )
+        User.objects.filter(
+                pk=instance.author_id,
+                posts_count__gt=0
+            ).update(
+                posts_count=F("posts_count") - 1
+            )
 
-class PostRetrieveView(generics.RetrieveAPIView):
+class PostRetrieveView(MetricsMixin, CachedResponseMixin, generics.RetrieveAPIView):
     queryset= Post.objects.all()
     serializer_class = PostSerializer
     throttle_classes = [PostReadRateThrottle]
     lookup_field = 'slug'
     lookup_url_kwarg='slug'
-    
+    cache_resources = ('posts',)
+    query_budget = 16
+
+    def get_cache_resources(self):
+        return (*self.cache_resources, post_resource(self.kwargs['slug']))
+
+    def response_cache_hit(self, request, data):
+        # The cached payload shows views_count as of the last flush.
+        record_view(Post, data['id'])
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment views count
-        Post.objects.filter(pk=instance.pk).update(views_count=F('views_count') + 1)
-        # Refresh instance to get updated views_count
-        instance.refresh_from_db()
+        # With a shared cache, views are buffered and written back by flush_view_counts
+        instance.views_count += record_view(Post, instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
-class CommentsListCreateView(generics.ListCreateAPIView):
+class CommentsListCreateView(MetricsMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 8
     
     def get_throttles(self):
         if self.request.method == 'GET':
@@ -126,13 +152,13 @@ class CommentsListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         order_type = self.request.query_params.get('order_type')
         post_id = self.kwargs["id"]
-        queryset = Comment.objects.filter(post_id=post_id,parent__isnull=True).select_related('user')
+        queryset = Comment.objects.filter(post_id=post_id,parent__isnull=True).select_related('user', 'post')
         if order_type == 'relevant':
-            return queryset.extra(
-                select={'engagement_score': 'reaction_count + reply_count + views_count'}
-            ).orderby('-engagement_score', '-created_at')
+            return queryset.annotate(
+                engagement_score=F('reaction_count') + F('reply_count') + F('views_count')
+            ).order_by('-engagement_score', '-created_at')
         elif order_type == 'recent':
-            return queryset.orderby('-created_at')
+            return queryset.order_by('-created_at')
         return queryset
 
     def perform_create(self, serializer):
@@ -154,28 +180,49 @@ class CommentsListCreateView(generics.ListCreateAPIView):
             target_object=post
         )
 
-class RetrieveCommentView(generics.RetrieveAPIView):
+class CommentThreadView(MetricsMixin, generics.ListAPIView):
+    """
+    Top-level comments of a post, each with its newest ``?replies=N`` replies
+    (default 3, at most 20). Replies for the whole page are loaded in one
+    query partitioned by parent with ROW_NUMBER(), so a page costs the same
+    number of queries however many comments it holds.
+    """
+    serializer_class = CommentThreadSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 10
+    throttle_classes = [PostReadRateThrottle]
+    default_reply_limit = 3
+    max_reply_limit = 20
+
+    def get_reply_limit(self):
+        try:
+            limit = int(self.request.query_params.get('replies', self.default_reply_limit))
+        except ValueError:
+            limit = self.default_reply_limit
+        return max(0, min(limit, self.max_reply_limit))
+
+    def get_queryset(self):
+        post = generics.get_object_or_404(Post, pk=self.kwargs['id'])
+        replies = Comment.objects.select_related('user', 'post').order_by('-created_at', '-id')
+        return Comment.objects.filter(
+            post=post,
+            parent__isnull=True
+        ).select_related('user', 'post').prefetch_related(
+            Prefetch('replies', queryset=replies[:self.get_reply_limit()], to_attr='recent_replies')
+        )
+
+class RetrieveCommentView(MetricsMixin, generics.RetrieveAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 9
     lookup_field = 'pk'
     lookup_url_kwarg = 'id'
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment views count
-        Comment.objects.filter(pk=instance.pk).update(views_count=F('views_count') + 1)
-        # Refresh instance to get updated views_count
-        instance.refresh_from_db()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
-    
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        # Increment views count
-        Comment.objects.filter(pk=instance.pk).update(views_count=F('views_count') + 1)
-        # Refresh instance to get updated views_count
-        instance.refresh_from_db()
+        # With a shared cache, views are buffered and written back by flush_view_counts
+        instance.views_count += record_view(Comment, instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -194,21 +241,25 @@ class DeleteCommentView(generics.DestroyAPIView):
     lookup_url_kwarg = 'id'
 
     def perform_destroy(self, instance):
-        parent = instance.parent
-        if parent:
-            Comment.objects.filter(pk=parent.pk).update(
+        if instance.parent_id:
+            Comment.objects.filter(pk=instance.parent_id, reply_count__gt=0).update(
                 reply_count=F("reply_count") - 1
-        )
+            )
+        else:
+            Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+                comment_count=F("comment_count") - 1
+            )
         instance.delete()
 
-class RepliesListCreateView(generics.ListCreateAPIView):
+class RepliesListCreateView(MetricsMixin, generics.ListCreateAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 8
     throttle_classes = [CommentCreateRateThrottle]
 
     def get_queryset(self):
-        return Comment.objects.filter(parent_id=self.kwargs['id']).select_related('user')
+        return Comment.objects.filter(parent_id=self.kwargs['id']).select_related('user', 'post')
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -229,9 +280,10 @@ class RepliesListCreateView(generics.ListCreateAPIView):
             target_object=parent
         )
 
-class PostReactionListCreateView(generics.ListCreateAPIView):
+class PostReactionListCreateView(MetricsMixin, generics.ListCreateAPIView):
     serializer_class = ReactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
     
     def get_throttles(self):
         if self.request.method == 'GET':
@@ -242,44 +294,23 @@ class PostReactionListCreateView(generics.ListCreateAPIView):
         reaction_type = self.request.query_params.get('reaction_type')
         post_id = self.kwargs['id']
         post = generics.get_object_or_404(Post, pk=post_id)
-        if reaction_type == 'upvote':
-            return Reaction.objects.filter(object_id=post.id, reaction_type=reaction_type).select_related('user')
-        elif reaction_type == 'downvote':
-            return Reaction.objects.filter(object_id=post.id, reaction_type=reaction_type).select_related('user')
-        
-        return Reaction.objects.filter(object_id=post.id).select_related('user')
+        queryset = Reaction.objects.filter(
+            content_type_id=get_content_type_id(Post),
+            object_id=post.id
+        )
+        if reaction_type in ('upvote', 'downvote'):
+            queryset = queryset.filter(reaction_type=reaction_type)
+        return queryset.select_related('user')
     
     def perform_create(self, serializer):
-        post_id = self.kwargs['id']
-        post = generics.get_object_or_404(Post, pk=post_id)
-        post_type = ContentType.objects.get_for_model(Post)
-        reaction_type = serializer.validated_data['reaction_type']
-        reaction = Reaction.objects.filter(
-            user=self.request.user,
-            content_type=post_type,
-            object_id=post.id
-        ).first()
-
-        if reaction and reaction.reaction_type == reaction_type:
-            Post.objects.filter(
-                pk=post_id,
-                reaction_count__gt=0
-            ).update(
-                reaction_count=F("reaction_count") - 1
-            )
-            reaction.delete()
-        elif reaction and reaction.reaction_type != reaction_type:
-            reaction.reaction_type = reaction_type
-            reaction.save(update_fields=["reaction_type"])
-        else:
-            reaction = serializer.save(
-                user=self.request.user,
-                content_type=post_type,
-                object_id=post.id
-            )
-            Post.objects.filter(pk=post_id).update(
-                reaction_count=F("reaction_count") + 1
-            )
+        post = generics.get_object_or_404(Post, pk=self.kwargs['id'])
+        reaction, created = toggle_reaction(
+            self.request.user,
+            post,
+            serializer.validated_data['reaction_type']
+        )
+        serializer.instance = reaction
+        if created:
             create_notification(
                 user=post.author,
                 actor=self.request.user,
@@ -287,9 +318,10 @@ class PostReactionListCreateView(generics.ListCreateAPIView):
                 target_object=post
             )
 
-class CommentReactionListCreateView(generics.ListCreateAPIView):
+class CommentReactionListCreateView(MetricsMixin, generics.ListCreateAPIView):
     serializer_class = ReactionSerializer
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 8
     
     def get_throttles(self):
         if self.request.method == 'GET':
@@ -300,44 +332,23 @@ class CommentReactionListCreateView(generics.ListCreateAPIView):
         reaction_type = self.request.query_params.get('reaction_type')
         comment_id = self.kwargs['id']
         comment = generics.get_object_or_404(Comment, pk=comment_id)
-        if reaction_type == 'upvote':
-            return Reaction.objects.filter(object_id=comment.id, reaction_type=reaction_type).select_related('user')
-        elif reaction_type == 'downvote':
-            return Reaction.objects.filter(object_id=comment.id, reaction_type=reaction_type).select_related('user')
-        
-        return Reaction.objects.filter(object_id=comment.id).select_related('user')
-
-    def perform_create(self, serializer):
-        comment_id = self.kwargs['id']
-        comment = generics.get_object_or_404(Comment, pk=comment_id)
-        comment_type = ContentType.objects.get_for_model(Comment)
-        reaction_type = serializer.validated_data['reaction_type']
-        reaction = Reaction.objects.filter(
-            user=self.request.user,
-            content_type=comment_type,
+        queryset = Reaction.objects.filter(
+            content_type_id=get_content_type_id(Comment),
             object_id=comment.id
-        ).first()
+        )
+        if reaction_type in ('upvote', 'downvote'):
+            queryset = queryset.filter(reaction_type=reaction_type)
+        return queryset.select_related('user')
 
-        if reaction and reaction.reaction_type == reaction_type:
-            Comment.objects.filter(
-                pk=comment_id,
-                reaction_count__gt=0
-            ).update(
-                reaction_count=F("reaction_count") - 1
-            )
-            reaction.delete()
-        elif reaction and reaction.reaction_type != reaction_type:
-            reaction.reaction_type = reaction_type
-            reaction.save(update_fields=["reaction_type"])
-        else:
-            reaction = serializer.save(
-                user=self.request.user,
-                content_type=comment_type,
-                object_id=comment.id
-            )
-            Comment.objects.filter(pk=comment_id).update(
-                reaction_count=F("reaction_count") + 1
-            )
+    def perform_create(self, serializer):
+        comment = generics.get_object_or_404(Comment, pk=self.kwargs['id'])
+        reaction, created = toggle_reaction(
+            self.request.user,
+            comment,
+            serializer.validated_data['reaction_type']
+        )
+        serializer.instance = reaction
+        if created:
             create_notification(
                 user=comment.user,
                 actor=self.request.user,
@@ -345,28 +356,34 @@ class CommentReactionListCreateView(generics.ListCreateAPIView):
                 target_object=comment
             )
 
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(MetricsMixin, CachedResponseMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'slug']
     permission_classes = [permissions.AllowAny]
+    query_budget = 12
     pagination_class = None
+    cache_resources = ('categories',)
 
-class RetrieveCategoryView(generics.RetrieveAPIView):
+class RetrieveCategoryView(MetricsMixin, CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 8
     lookup_field = 'slug'
     lookup_url_kwarg = 'slug'
+    cache_resources = ('categories',)
 
-class TagListCreateView(generics.ListCreateAPIView):
+class TagListCreateView(MetricsMixin, CachedResponseMixin, generics.ListCreateAPIView):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'slug']
     permission_classes = [permissions.AllowAny]
+    query_budget = 12
     pagination_class = None
+    cache_resources = ('tags',)
 
 
 class BookmarkCreateView(generics.CreateAPIView):
@@ -412,45 +429,54 @@ class BookmarkDeleteView(APIView):
 
         bookmark.delete()
 
-        post.bookmark_count = F("bookmark_count") - 1
-        post.save(update_fields=["bookmark_count"])
+        Post.objects.filter(pk=post.pk, bookmark_count__gt=0).update(
+            bookmark_count=F("bookmark_count") - 1
+        )
 
         return Response(
             {"detail": "Bookmark removed"},
             status=status.HTTP_200_OK
         )
 
-class ListUserBookmarksView(generics.ListAPIView):
+class ListUserBookmarksView(MetricsMixin, generics.ListAPIView):
     serializer_class = BookmarkSerializer
     permission_classes = [permissions.IsAuthenticated, IsBookmarkOwner]
+    query_budget = 11
     def  get_queryset(self):
         userId = self.kwargs['id']
         user = generics.get_object_or_404(User, pk=userId)
-        return Bookmark.objects.filter(user=self.request.user).select_related('post').select_related('user')
+        return Bookmark.objects.filter(user=self.request.user).select_related(
+            'user', 'post', 'post__author', 'post__category'
+        ).prefetch_related('post__tags')
 
-class ListUserCommentsView(generics.ListAPIView):
+class ListUserCommentsView(MetricsMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsCommentOwner]
+    query_budget = 9
     def  get_queryset(self):
         userId = self.kwargs['id']
         user = generics.get_object_or_404(User, pk=userId)
         return Comment.objects.filter(user=user).select_related('post').select_related('user')
         
-class ListUserPostsView(generics.ListAPIView):
+class ListUserPostsView(MetricsMixin, CardViewMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 11
 
     def  get_queryset(self):
         userId = self.kwargs['id']
         user = generics.get_object_or_404(User, pk=userId)
-        return Post.objects.filter(author=user).select_related('author')
+        return Post.objects.filter(author=user).select_related('author', 'category').prefetch_related('tags')
 
-class ListCategoryPostsView(generics.ListAPIView):
+class ListCategoryPostsView(MetricsMixin, CardViewMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 11
 
     def get_queryset(self):
         category_slug = self.kwargs['slug']
         category = generics.get_object_or_404(Category, slug=category_slug)
 
-        return Post.objects.filter(category=category).select_related('author')
\ No newline at end of file
+        return Post.objects.filter(category=category).select_related('author', 'category').prefetch_related('tags')
\ No newline at end of file
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'apps.core'
+
+    def ready(self):
+        """Drop cached authentication users when they change and count queries per request."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,80 @@
+"""
+Async-native DRF list views.
+
+DRF's ``APIView.dispatch`` is synchronous, so under ASGI every request to a
+plain DRF view is handed to a worker thread for its whole lifetime.
+``AsyncListAPIView`` keeps the request on the event loop instead:
+authentication, permissions and throttling still run in one
+``sync_to_async`` call (they are short and partly synchronous in DRF and
+simplejwt), but the queryset, the page and the viewer state are fetched
+with the async ORM and rendering happens on the loop, so a worker can hold
+many more concurrent requests than it has threads.
+
+Subclasses override ``aget_queryset`` when building the queryset needs
+database or cache lookups of its own, and serializers define
+``aprime_viewer_state`` (the async counterpart of ``prime_viewer_state``)
+so rendering the page makes no further queries.
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from rest_framework import generics
+from rest_framework.response import Response
+
+from .utils import alist
+
+
+class AsyncListAPIView(generics.ListAPIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_queryset(self):
+        return self.get_queryset()
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    async def aget_serializer(self, instances):
+        """A ``many=True`` serializer for ``instances`` with its viewer state resolved."""
+        serializer = self.get_serializer(instances, many=True)
+        prime_viewer_state = getattr(serializer.child, 'aprime_viewer_state', None)
+        if prime_viewer_state is not None:
+            await prime_viewer_state(instances)
+        return serializer
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await self.aget_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = await self.aget_serializer(page)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = await self.aget_serializer(await alist(queryset))
+        return Response(serializer.data)
@@ -1,9 +1,34 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import TOKEN_VERSION_CLAIM
+
+
+def _user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def get_cached_user(user_id):
+    return cache.get(_user_cache_key(user_id))
+
+
+def cache_user(user):
+    timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+    if timeout:
+        cache.set(_user_cache_key(user.pk), user, timeout=timeout)
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
 
 class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
         raw_token = request.COOKIES.get("access_token")
-        print(raw_token)
 
         if raw_token is None:
             return None
@@ -12,3 +37,30 @@ class CookieJWTAuthentication(JWTAuthentication):
         user = self.get_user(validated_token)
 
         return user, validated_token
+
+    def get_user(self, validated_token):
+        """
+        Resolve the token's user from a short-lived cache, falling back to the
+        database. Inactive users are rejected, and so are tokens minted before
+        the user's last password reset, which carry an older token_version.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(user)
+        elif api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            raise AuthenticationFailed(
+                _("Token has been revoked."), code="token_revoked"
+            )
+
+        return user
@@ -0,0 +1,9 @@
+"""
+In-process API benchmarks.
+
+``data`` generates a deterministic dataset, ``scenarios`` scripts one
+request per route in ``apps/*/urls.py`` and ``runner`` drives them through
+the ASGI application and reports latency percentiles, throughput and query
+counts. See the ``generate_benchmark_data`` and ``run_benchmarks``
+management commands.
+"""
@@ -0,0 +1,235 @@
+"""
+Deterministic benchmark dataset.
+
+Everything is derived from ``random.Random(seed)``, so the same options
+produce the same users, follow graph, posts, tags, comments, reactions,
+bookmarks and notifications on every machine. Rows are written with
+``bulk_create``; the denormalized counters, search documents, timelines and
+trending scores are then rebuilt by the same code paths production uses.
+All benchmark users share ``BENCHMARK_EMAIL_DOMAIN`` and all categories and
+tags the ``bench-`` prefix, so ``clear_dataset`` can remove them without
+touching anything else.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.blogs.content import analyze_content
+from apps.blogs.models import Bookmark, Category, Comment, Post, Reaction, Tag
+from apps.blogs.reconcile import reconcile_counters
+from apps.blogs.utils import get_content_type_id
+from apps.core.models import Follow, User
+from apps.feeds.timeline import rebuild_timeline
+from apps.feeds.trending import PERIODS, compute_trending_scores
+from apps.notifications.models import Notification
+from apps.search.autocomplete import rebuild_autocomplete_index
+from apps.search.index import update_post_document
+
+BENCHMARK_EMAIL_DOMAIN = 'bench.example.com'
+BENCHMARK_PASSWORD = 'bench-Passw0rd!'
+BATCH_SIZE = 1000
+
+WORDS = (
+    'django python async cache query index latency throughput database '
+    'replica shard queue worker serializer request response cursor feed '
+    'search ranking timeline follower comment reaction bookmark tag '
+    'category notification token session cookie header payload schema '
+    'migration transaction lock counter metric budget profile deploy '
+    'container kubernetes postgres redis sqlite vector engine compiler '
+    'network socket stream buffer memory thread process scheduler'
+).split()
+
+
+class DatasetSpec:
+    def __init__(self, users=200, posts_per_user=5, follows_per_user=20,
+                 comments_per_post=4, reactions_per_post=8, bookmarks_per_user=10,
+                 notifications_per_user=10, categories=8, tags=40, seed=0):
+        self.users = users
+        self.posts_per_user = posts_per_user
+        self.follows_per_user = follows_per_user
+        self.comments_per_post = comments_per_post
+        self.reactions_per_post = reactions_per_post
+        self.bookmarks_per_user = bookmarks_per_user
+        self.notifications_per_user = notifications_per_user
+        self.categories = categories
+        self.tags = tags
+        self.seed = seed
+
+
+def benchmark_email(index):
+    return f"user{index}@{BENCHMARK_EMAIL_DOMAIN}"
+
+
+def benchmark_users():
+    return User.objects.filter(email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}")
+
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def clear_dataset():
+    """Delete every row created by ``generate_dataset``."""
+    with transaction.atomic():
+        benchmark_users().delete()
+        Category.objects.filter(slug__startswith='bench-').delete()
+        Tag.objects.filter(slug__startswith='bench-').delete()
+
+
+def _sample_weighted(rng, population, weights, k, exclude):
+    """``k`` distinct items of ``population`` drawn by ``weights``, skipping ``exclude``."""
+    chosen = set()
+    k = min(k, len(population) - len(exclude))
+    while len(chosen) < k:
+        for item in rng.choices(population, weights, k=k - len(chosen)):
+            if item not in exclude:
+                chosen.add(item)
+    return sorted(chosen)
+
+
+def generate_dataset(spec, log=None):
+    """Create the dataset described by ``spec``. Returns ``{table: rows}``."""
+    log = log or (lambda message: None)
+    rng = random.Random(spec.seed)
+    now = timezone.now()
+    summary = {}
+
+    with transaction.atomic():
+        categories = Category.objects.bulk_create([
+            Category(name=f"Bench {i}", slug=f"bench-{i}") for i in range(spec.categories)
+        ])
+        tags = Tag.objects.bulk_create([
+            Tag(name=f"bench-{word}-{i}", slug=f"bench-{word}-{i}")
+            for i, word in enumerate(rng.sample(WORDS, min(spec.tags, len(WORDS))))
+        ])
+        summary['categories'], summary['tags'] = len(categories), len(tags)
+
+        password = make_password(BENCHMARK_PASSWORD)
+        users = User.objects.bulk_create([
+            User(
+                email=benchmark_email(i),
+                password=password,
+                first_name=f"Bench{i}",
+                last_name=rng.choice(WORDS).capitalize(),
+                bio=sentence(rng, 5, 15)
+            )
+            for i in range(spec.users)
+        ], batch_size=BATCH_SIZE)
+        summary['users'] = len(users)
+        log(f"{len(users)} users")
+
+        # A few accounts attract most followers, like a real follow graph.
+        user_ids = [user.pk for user in users]
+        weights = [1 / (rank + 1) for rank in range(len(user_ids))]
+        follows = [
+            Follow(follower_id=follower, following_id=following)
+            for follower in user_ids
+            for following in _sample_weighted(rng, user_ids, weights, spec.follows_per_user, {follower})
+        ]
+        Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE)
+        summary['follows'] = len(follows)
+        log(f"{len(follows)} follows")
+
+        posts = []
+        for user in users:
+            for n in range(spec.posts_per_user):
+                posts.append(Post(
+                    author=user,
+                    category=rng.choice(categories),
+                    title=sentence(rng, 3, 8),
+                    subtitle=sentence(rng, 6, 12),
+                    slug=f"bench-{user.pk}-{n}",
+                    content='\n\n'.join(sentence(rng, 40, 80) for _ in range(rng.randint(2, 6))),
+                    status=Post.PUBLISHED if rng.random() < 0.9 else Post.DRAFT,
+                    views_count=rng.randint(0, 500)
+                ))
+        for post in posts:
+            for name, value in analyze_content(post.content).as_fields().items():
+                setattr(post, name, value)
+        posts = Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        for post in posts:
+            post.created_at = now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600))
+        Post.objects.bulk_update(posts, ['created_at'], batch_size=BATCH_SIZE)
+        Post.tags.through.objects.bulk_create([
+            Post.tags.through(post_id=post.pk, tag_id=tag.pk)
+            for post in posts
+            for tag in rng.sample(tags, rng.randint(0, min(4, len(tags))))
+        ], batch_size=BATCH_SIZE)
+        published = [post for post in posts if post.status == Post.PUBLISHED]
+        summary['posts'] = len(posts)
+        log(f"{len(posts)} posts")
+
+        comments = Comment.objects.bulk_create([
+            Comment(post=post, user_id=rng.choice(user_ids), content=sentence(rng, 5, 30))
+            for post in published
+            for _ in range(spec.comments_per_post)
+        ], batch_size=BATCH_SIZE)
+        replies = Comment.objects.bulk_create([
+            Comment(post_id=comment.post_id, parent=comment, user_id=rng.choice(user_ids), content=sentence(rng, 3, 20))
+            for comment in comments
+            if rng.random() < 0.5
+        ], batch_size=BATCH_SIZE)
+        summary['comments'] = len(comments) + len(replies)
+        log(f"{summary['comments']} comments")
+
+        post_type, comment_type = get_content_type_id(Post), get_content_type_id(Comment)
+        reactions = [
+            Reaction(
+                user_id=user_id,
+                content_type_id=post_type,
+                object_id=post.pk,
+                reaction_type='upvote' if rng.random() < 0.8 else 'downvote'
+            )
+            for post in published
+            for user_id in rng.sample(user_ids, min(spec.reactions_per_post, len(user_ids)))
+        ]
+        reactions += [
+            Reaction(user_id=user_id, content_type_id=comment_type, object_id=comment.pk)
+            for comment in comments
+            for user_id in rng.sample(user_ids, min(rng.randint(0, 3), len(user_ids)))
+        ]
+        Reaction.objects.bulk_create(reactions, batch_size=BATCH_SIZE)
+        summary['reactions'] = len(reactions)
+        log(f"{len(reactions)} reactions")
+
+        bookmarks = [
+            Bookmark(user_id=user_id, post=post)
+            for user_id in user_ids
+            for post in rng.sample(published, min(spec.bookmarks_per_user, len(published)))
+        ]
+        Bookmark.objects.bulk_create(bookmarks, batch_size=BATCH_SIZE)
+        summary['bookmarks'] = len(bookmarks)
+
+        notifications = []
+        for user_id in user_ids:
+            for _ in range(spec.notifications_per_user):
+                post = rng.choice(published)
+                notifications.append(Notification(
+                    user_id=user_id,
+                    actor_id=rng.choice(user_ids),
+                    action_type=rng.choice(['comment', 'reaction', 'bookmark']),
+                    content_type_id=post_type,
+                    object_id=post.pk,
+                    is_read=rng.random() < 0.5
+                ))
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        summary['notifications'] = len(notifications)
+
+    # bulk_create skips the signals and counter updates of the normal write
+    # paths, so rebuild everything derived from the rows above.
+    log("reconciling counters")
+    reconcile_counters()
+    log("indexing posts")
+    for post in Post.objects.filter(pk__in=[post.pk for post in posts]).select_related('category').prefetch_related('tags'):
+        update_post_document(post)
+    log("indexing names for autocomplete")
+    rebuild_autocomplete_index()
+    log("rebuilding timelines")
+    for user in benchmark_users():
+        rebuild_timeline(user)
+    for period in PERIODS:
+        compute_trending_scores(period)
+    return summary
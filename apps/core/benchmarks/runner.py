@@ -0,0 +1,185 @@
+"""
+Run benchmark scenarios in-process against the ASGI application.
+
+Requests go through ``django.test.AsyncClient``, i.e. the full ASGI handler
+and middleware stack, without a network hop. Query counts are read from the
+``Server-Timing`` header set by ``RequestMetricsMiddleware``. Each request
+comes from its own ``X-Forwarded-For`` address so per-IP throttles see many
+clients rather than one.
+"""
+import asyncio
+import json
+import math
+import re
+import subprocess
+import time
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient
+from django.utils import timezone
+
+from apps.core.tokens import VersionedRefreshToken
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+class ScenarioResult:
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.latencies = []
+        self.queries = []
+        self.statuses = {}
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, status, latency, queries):
+        self.latencies.append(latency)
+        if queries is not None:
+            self.queries.append(queries)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status not in self.scenario.expect:
+            self.errors += 1
+
+    def as_dict(self):
+        latencies = sorted(self.latencies)
+        ms = lambda seconds: round(seconds * 1000, 3)
+        return {
+            'method': self.scenario.method.upper(),
+            'route': self.scenario.url_name,
+            'anonymous': self.scenario.anonymous,
+            'requests': len(latencies),
+            'errors': self.errors,
+            'statuses': self.statuses,
+            'latency_ms': {
+                'mean': ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+                'p50': ms(percentile(latencies, 50)),
+                'p95': ms(percentile(latencies, 95)),
+                'p99': ms(percentile(latencies, 99)),
+                'max': ms(latencies[-1]) if latencies else 0.0,
+            },
+            'throughput_rps': round(len(latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            'queries': {
+                'mean': round(sum(self.queries) / len(self.queries), 2) if self.queries else None,
+                'max': max(self.queries) if self.queries else None,
+            },
+        }
+
+
+class BenchmarkRunner:
+    def __init__(self, context, iterations=50, concurrency=1, warmup=3):
+        self.context = context
+        self.iterations = iterations
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self._tokens = {}
+        self._requests = 0
+
+    def access_token(self, user):
+        token = self._tokens.get(user.pk)
+        if token is None:
+            token = self._tokens[user.pk] = str(VersionedRefreshToken.for_user(user).access_token)
+        return token
+
+    def _client_address(self):
+        self._requests += 1
+        return f"10.{self._requests // 65536 % 256}.{self._requests // 256 % 256}.{self._requests % 256}"
+
+    async def request(self, scenario):
+        user = self.context.next_user()
+        call = await sync_to_async(scenario.prepare)(self.context, user)
+
+        client = AsyncClient()
+        if call.user is not None and not scenario.anonymous:
+            client.cookies['access_token'] = self.access_token(call.user)
+        for name, value in call.cookies.items():
+            client.cookies[name] = value
+        body = json.dumps(call.data) if call.data is not None else ''
+
+        start = time.perf_counter()
+        # Like ASGIHandler, give each request its own thread for synchronous
+        # code; AsyncClient alone would run every request's on one thread.
+        async with ThreadSensitiveContext():
+            response = await client.generic(
+                scenario.method.upper(),
+                call.path,
+                body,
+                content_type='application/json',
+                headers={'X-Forwarded-For': self._client_address()},
+            )
+        latency = time.perf_counter() - start
+
+        match = SERVER_TIMING_QUERIES.search(response.get('Server-Timing', ''))
+        return response.status_code, latency, int(match.group(1)) if match else None
+
+    async def run_scenario(self, scenario):
+        for _ in range(self.warmup):
+            await self.request(scenario)
+
+        result = ScenarioResult(scenario)
+        remaining = iter(range(self.iterations))
+
+        async def worker():
+            for _ in remaining:
+                result.record(*await self.request(scenario))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async def run(self, scenarios, progress=None):
+        results = {}
+        for scenario in scenarios:
+            result = await self.run_scenario(scenario)
+            results[scenario.name] = result.as_dict()
+            if progress:
+                progress(scenario.name, results[scenario.name])
+        return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results, runner, seed):
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'database': connection.vendor,
+            'iterations': runner.iterations,
+            'concurrency': runner.concurrency,
+            'warmup': runner.warmup,
+            'seed': seed,
+            'users': len(runner.context.users),
+            'posts': len(runner.context.posts),
+        },
+        'scenarios': results,
+    }
+
+
+def compare_reports(baseline, current):
+    """Yield ``(scenario, metric, before, after)`` for metrics present in both reports."""
+    for name, after in sorted(current['scenarios'].items()):
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        for metric in ('p50', 'p95', 'p99'):
+            yield name, f"{metric} ms", before['latency_ms'][metric], after['latency_ms'][metric]
+        yield name, 'rps', before['throughput_rps'], after['throughput_rps']
+        yield name, 'queries', before['queries']['mean'], after['queries']['mean']
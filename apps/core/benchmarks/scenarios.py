@@ -0,0 +1,321 @@
+"""
+Benchmark scenarios: one scripted request per route in ``apps/*/urls.py``.
+
+A scenario's ``prepare`` runs untimed before every request. It picks the
+objects the request targets from the benchmark dataset and creates whatever
+must exist beforehand (a post to delete, a throwaway account whose password
+gets reset...), and returns the ``Call`` to time. Requests are sent as a
+user from the dataset, rotating so per-user throttles are not hit, unless
+the scenario is anonymous.
+
+``google-login`` is not covered: it verifies ID tokens against Google.
+"""
+import random
+import uuid
+
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.db.models import F
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from apps.blogs.models import Bookmark, Category, Comment, Post
+from apps.core.models import Follow, User
+from apps.core.tokens import VersionedRefreshToken
+from apps.core.utils import iter_api_patterns
+from apps.notifications.models import Notification, PushNotificationToken
+from .data import BENCHMARK_EMAIL_DOMAIN, BENCHMARK_PASSWORD, WORDS, benchmark_users
+
+UNCOVERED_ROUTES = {'google-login', 'metrics'}
+
+
+class Call:
+    """A request to time: its path, JSON body and sender (``None`` for anonymous)."""
+    def __init__(self, path, data=None, user=None, cookies=None):
+        self.path = path
+        self.data = data
+        self.user = user
+        self.cookies = cookies or {}
+
+
+class Scenario:
+    def __init__(self, name, method, url_name, prepare, anonymous=False, expect=None):
+        self.name = name
+        self.method = method
+        self.url_name = url_name
+        self.prepare = prepare
+        self.anonymous = anonymous
+        self.expect = expect or {
+            'get': (200,),
+            'post': (200, 201),
+            'patch': (200,),
+            'delete': (200, 204),
+        }[method]
+
+
+class ScenarioContext:
+    """The benchmark dataset as pools of ids the scenarios draw from."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.users = list(benchmark_users().filter(is_active=True).order_by('pk'))
+        if not self.users:
+            raise ValueError("No benchmark data; run generate_benchmark_data first.")
+        posts = Post.objects.is_published().filter(author__in=self.users).order_by('pk')
+        self.posts = list(posts.values_list('pk', 'slug'))
+        self.comments = list(
+            Comment.objects.filter(post__in=posts, parent__isnull=True)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        self.categories = list(
+            Category.objects.filter(slug__startswith='bench-').order_by('pk').values_list('slug', flat=True)
+        )
+        self._next_user = 0
+
+    def next_user(self):
+        user = self.users[self._next_user % len(self.users)]
+        self._next_user += 1
+        return user
+
+    def other_user(self, user):
+        return self.rng.choice([other for other in self.users if other.pk != user.pk])
+
+    def post(self):
+        return self.rng.choice(self.posts)
+
+    def comment(self):
+        return self.rng.choice(self.comments)
+
+    def word(self):
+        return self.rng.choice(WORDS)
+
+    def unique(self, prefix):
+        return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+    def throwaway_user(self):
+        return User.objects.create(
+            email=f"{self.unique('tmp')}@{BENCHMARK_EMAIL_DOMAIN}",
+            password=self.users[0].password
+        )
+
+    def own_post(self, user):
+        post = Post.objects.active().filter(author=user).order_by('pk').first()
+        return post or self.new_post(user)
+
+    def new_post(self, user):
+        post = Post.objects.create(
+            author=user,
+            category=Category.objects.get(slug=self.rng.choice(self.categories)),
+            title=self.word().capitalize(),
+            slug=self.unique('bench'),
+            status=Post.PUBLISHED
+        )
+        Category.objects.filter(pk=post.category_id).update(posts_count=F('posts_count') + 1)
+        User.objects.filter(pk=user.pk).update(posts_count=F('posts_count') + 1)
+        return post
+
+    def new_comment(self, user):
+        post_id, _ = self.post()
+        comment = Comment.objects.create(post_id=post_id, user=user, content=self.word())
+        Post.objects.filter(pk=post_id).update(comment_count=F('comment_count') + 1)
+        return comment
+
+
+def url(name, *args):
+    return reverse(name, args=args)
+
+
+def read(name, url_name, path, anonymous=False):
+    return Scenario(name, 'get', url_name, lambda ctx, user: Call(path(ctx, user), user=user), anonymous)
+
+
+def _search(name, url_name):
+    return read(name, url_name, lambda ctx, user: f"{url(url_name)}?q={ctx.word()}")
+
+
+def _refresh(ctx, user):
+    refresh = VersionedRefreshToken.for_user(user)
+    return Call(url('token-refresh'), user=user, cookies={'refresh_token': str(refresh)})
+
+
+def _password_reset_confirm(ctx, user):
+    user = ctx.throwaway_user()
+    return Call(url('password-reset-confirm'), {
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': PasswordResetTokenGenerator().make_token(user),
+        'new_password': BENCHMARK_PASSWORD,
+    })
+
+
+def _delete_user(ctx, user):
+    user = ctx.throwaway_user()
+    return Call(url('delete-user', user.pk), user=user)
+
+
+def _follow(ctx, user):
+    following = set(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+    candidates = [other for other in ctx.users if other.pk != user.pk and other.pk not in following]
+    target = ctx.rng.choice(candidates) if candidates else ctx.throwaway_user()
+    return Call(url('follow-user', target.pk), user=user)
+
+
+def _unfollow(ctx, user):
+    follow = Follow.objects.filter(follower=user).order_by('pk').first()
+    if follow is None:
+        target = ctx.other_user(user)
+        follow = Follow.objects.create(follower=user, following=target)
+        User.objects.filter(pk=user.pk).update(following_count=F('following_count') + 1)
+        User.objects.filter(pk=target.pk).update(followers_count=F('followers_count') + 1)
+    return Call(url('follow-user', follow.following_id), user=user)
+
+
+def _create_post(ctx, user):
+    return Call(url('list-create-post'), {
+        'title': ' '.join(ctx.word() for _ in range(5)).capitalize(),
+        'slug': ctx.unique('bench'),
+        'content': ' '.join(ctx.word() for _ in range(200)),
+        'category_id': Category.objects.get(slug=ctx.rng.choice(ctx.categories)).pk,
+        'tags': [f"bench-{ctx.word()}" for _ in range(3)],
+        'status': Post.PUBLISHED,
+    }, user=user)
+
+
+def _update_comment(ctx, user):
+    comment = Comment.objects.filter(user=user).order_by('pk').first() or ctx.new_comment(user)
+    return Call(url('update-comment', comment.pk), {'content': ctx.word()}, user=user)
+
+
+def _create_bookmark(ctx, user):
+    bookmarked = set(Bookmark.objects.filter(user=user).values_list('post_id', flat=True))
+    candidates = [pk for pk, _ in ctx.posts if pk not in bookmarked]
+    post_id = ctx.rng.choice(candidates) if candidates else ctx.new_post(user).pk
+    return Call(url('create-post-bookmark', post_id), user=user)
+
+
+def _delete_bookmark(ctx, user):
+    bookmark = Bookmark.objects.filter(user=user).order_by('pk').first()
+    if bookmark is None:
+        post_id, _ = ctx.post()
+        bookmark = Bookmark.objects.create(user=user, post_id=post_id)
+        Post.objects.filter(pk=post_id).update(bookmark_count=F('bookmark_count') + 1)
+    return Call(url('delete-bookmark', bookmark.post_id), user=user)
+
+
+def _read_notification(ctx, user):
+    notification = Notification.objects.filter(user=user, is_read=False).order_by('pk').first()
+    if notification is None:
+        notification = Notification.objects.create(user=user, actor=ctx.other_user(user), action_type='follow')
+    return Call(url('mark-notification-read', notification.pk), user=user)
+
+
+def _unregister_push_token(ctx, user):
+    token = PushNotificationToken.objects.create(user=user, token=ctx.unique('bench-token'))
+    return Call(url('unregister-push-token', token.token), user=user)
+
+
+SCENARIOS = [
+    # Reads
+    read('auth.me', 'me', lambda ctx, user: url('me')),
+    read('users.list', 'list-users', lambda ctx, user: url('list-users')),
+    read('users.retrieve', 'retrieve-user', lambda ctx, user: url('retrieve-user', ctx.other_user(user).pk)),
+    read('users.bookmarks', 'user-bookmarks', lambda ctx, user: url('user-bookmarks', user.pk)),
+    read('users.comments', 'user-comments', lambda ctx, user: url('user-comments', user.pk)),
+    read('users.posts', 'user-posts', lambda ctx, user: url('user-posts', ctx.other_user(user).pk)),
+    read('users.followers', 'list-followers', lambda ctx, user: url('list-followers', ctx.other_user(user).pk)),
+    read('users.following', 'list-following', lambda ctx, user: url('list-following', ctx.other_user(user).pk)),
+    read('users.is-following', 'is-following', lambda ctx, user: url('is-following', ctx.other_user(user).pk)),
+    read('posts.list', 'list-create-post', lambda ctx, user: url('list-create-post')),
+    read('posts.list.anonymous', 'list-create-post', lambda ctx, user: url('list-create-post'), anonymous=True),
+    read('posts.retrieve', 'retrieve-post', lambda ctx, user: url('retrieve-post', ctx.post()[1])),
+    read('posts.retrieve.anonymous', 'retrieve-post', lambda ctx, user: url('retrieve-post', ctx.post()[1]), anonymous=True),
+    read('posts.comments', 'list-create-post-comments', lambda ctx, user: url('list-create-post-comments', ctx.post()[0])),
+    read('posts.thread', 'post-comment-thread', lambda ctx, user: url('post-comment-thread', ctx.post()[0])),
+    read('posts.reactions', 'list-create-post-reactions', lambda ctx, user: url('list-create-post-reactions', ctx.post()[0])),
+    read('posts.by-category', 'list-category-posts', lambda ctx, user: url('list-category-posts', ctx.rng.choice(ctx.categories))),
+    read('comments.retrieve', 'retrieve-comment', lambda ctx, user: url('retrieve-comment', ctx.comment())),
+    read('comments.replies', 'reply-comment', lambda ctx, user: url('reply-comment', ctx.comment())),
+    read('comments.reactions', 'list-create-comment-reactions', lambda ctx, user: url('list-create-comment-reactions', ctx.comment())),
+    read('categories.list', 'list-create-category', lambda ctx, user: url('list-create-category'), anonymous=True),
+    read('categories.retrieve', 'retrieve-category', lambda ctx, user: url('retrieve-category', ctx.rng.choice(ctx.categories)), anonymous=True),
+    read('tags.list', 'list-create-tag', lambda ctx, user: url('list-create-tag'), anonymous=True),
+    _search('search.posts', 'search-posts'),
+    _search('search.categories', 'search-categories'),
+    _search('search.comments', 'search-comments'),
+    _search('search.bookmarks', 'search-bookmarks'),
+    _search('search.users', 'search-users'),
+    read('search.autocomplete', 'search-autocomplete', lambda ctx, user: f"{url('search-autocomplete')}?q={ctx.word()[:3]}"),
+    read('notifications.list', 'list-notifications', lambda ctx, user: url('list-notifications')),
+    read('feeds.personalized', 'personalized-feed', lambda ctx, user: url('personalized-feed')),
+    read('feeds.trending', 'trending-feed', lambda ctx, user: url('trending-feed')),
+    read('feeds.trending.anonymous', 'trending-feed', lambda ctx, user: url('trending-feed'), anonymous=True),
+    read('feeds.recent', 'recent-feed', lambda ctx, user: url('recent-feed')),
+    read('feeds.recent.anonymous', 'recent-feed', lambda ctx, user: url('recent-feed'), anonymous=True),
+    read('feeds.combined', 'combined-feed', lambda ctx, user: url('combined-feed')),
+
+    # Writes
+    Scenario('auth.register', 'post', 'register', lambda ctx, user: Call(url('register'), {
+        'email': f"{ctx.unique('new')}@{BENCHMARK_EMAIL_DOMAIN}",
+        'password': BENCHMARK_PASSWORD,
+    }), anonymous=True),
+    Scenario('auth.login', 'post', 'token-obtain-pair', lambda ctx, user: Call(url('token-obtain-pair'), {
+        'email': user.email,
+        'password': BENCHMARK_PASSWORD,
+    }), anonymous=True),
+    Scenario('auth.refresh', 'post', 'token-refresh', _refresh),
+    Scenario('auth.logout', 'post', 'logout', lambda ctx, user: Call(url('logout'), user=user)),
+    Scenario('auth.password-reset', 'post', 'password-reset', lambda ctx, user: Call(
+        url('password-reset'), {'email': user.email}
+    ), anonymous=True),
+    Scenario('auth.password-reset-confirm', 'post', 'password-reset-confirm', _password_reset_confirm, anonymous=True),
+    Scenario('users.update', 'patch', 'update-user', lambda ctx, user: Call(
+        url('update-user', user.pk), {'bio': ctx.word()}, user=user
+    )),
+    Scenario('users.delete', 'delete', 'delete-user', _delete_user),
+    Scenario('users.follow', 'post', 'follow-user', _follow),
+    Scenario('users.unfollow', 'delete', 'follow-user', _unfollow),
+    Scenario('posts.create', 'post', 'list-create-post', _create_post),
+    Scenario('posts.update', 'patch', 'update-post', lambda ctx, user: Call(
+        url('update-post', ctx.own_post(user).pk), {'subtitle': ctx.word()}, user=user
+    )),
+    Scenario('posts.delete', 'delete', 'delete-post', lambda ctx, user: Call(
+        url('delete-post', ctx.new_post(user).pk), user=user
+    )),
+    Scenario('posts.react', 'post', 'list-create-post-reactions', lambda ctx, user: Call(
+        url('list-create-post-reactions', ctx.post()[0]), {'reaction_type': 'upvote'}, user=user
+    )),
+    Scenario('posts.bookmark', 'post', 'create-post-bookmark', _create_bookmark),
+    Scenario('posts.unbookmark', 'delete', 'delete-bookmark', _delete_bookmark),
+    Scenario('comments.create', 'post', 'list-create-post-comments', lambda ctx, user: Call(
+        url('list-create-post-comments', ctx.post()[0]), {'content': ctx.word()}, user=user
+    )),
+    Scenario('comments.reply', 'post', 'reply-comment', lambda ctx, user: Call(
+        url('reply-comment', ctx.comment()), {'content': ctx.word()}, user=user
+    )),
+    Scenario('comments.update', 'patch', 'update-comment', _update_comment),
+    Scenario('comments.delete', 'delete', 'delete-comment', lambda ctx, user: Call(
+        url('delete-comment', ctx.new_comment(user).pk), user=user
+    )),
+    Scenario('comments.react', 'post', 'list-create-comment-reactions', lambda ctx, user: Call(
+        url('list-create-comment-reactions', ctx.comment()), {'reaction_type': 'upvote'}, user=user
+    )),
+    Scenario('categories.create', 'post', 'list-create-category', lambda ctx, user: Call(
+        url('list-create-category'), {'name': ctx.unique('Bench'), 'slug': ctx.unique('bench')}, user=user
+    )),
+    Scenario('tags.create', 'post', 'list-create-tag', lambda ctx, user: Call(
+        url('list-create-tag'), {'name': ctx.unique('bench'), 'slug': ctx.unique('bench')}, user=user
+    )),
+    Scenario('notifications.read', 'post', 'mark-notification-read', _read_notification),
+    Scenario('notifications.register-push-token', 'post', 'register-push-token', lambda ctx, user: Call(
+        url('register-push-token'), {'token': ctx.unique('bench-token'), 'device_type': 'web'}, user=user
+    )),
+    Scenario('notifications.unregister-push-token', 'delete', 'unregister-push-token', _unregister_push_token),
+]
+
+
+def uncovered_routes():
+    """Names of routes in ``apps/*/urls.py`` that no scenario requests."""
+    covered = {scenario.url_name for scenario in SCENARIOS} | UNCOVERED_ROUTES
+    return sorted(
+        pattern.name for _, pattern in iter_api_patterns()
+        if pattern.name not in covered
+    )
@@ -0,0 +1,177 @@
+"""
+Read-replica routing.
+
+``ReplicaRoutingMiddleware`` picks one of ``DATABASE_REPLICAS`` for safe
+requests to read-heavy views (feeds, search and list endpoints, or any view
+with ``read_from_replica = True``) and ``ReplicaRouter`` sends that
+request's reads there. Everything else, including every write, goes to
+``default``.
+
+After a client writes (any successful unsafe request) its reads are pinned
+to the primary for ``REPLICA_STICKY_SECONDS``, so it never reads a replica
+that has not caught up with its own write yet. Authenticated users are
+pinned by user id in the shared cache, which works for every client that
+sends its token; anonymous writers (sign-up, password reset) get a short
+lived cookie instead. The user is only known once DRF has authenticated
+the request, so until then, including the authentication queries
+themselves, reads go to the primary.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+from rest_framework.mixins import ListModelMixin
+
+PIN_COOKIE = 'db_pin'
+REPLICA_APPS = ('apps.feeds', 'apps.search')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Coordination state that must never be read stale: throttle counters and
+# the response-cache versions.
+PRIMARY_ONLY_MODELS = {'core.throttlecounter', 'core.resourceversion'}
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _pin_key(user_id):
+    return f"db-pin:user:{user_id}"
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def pin_user(user_id):
+    cache.set(_pin_key(user_id), True, timeout=get_sticky_seconds())
+
+
+def is_user_pinned(user_id):
+    return cache.get(_pin_key(user_id), False)
+
+
+def _authenticated_user(request):
+    """The user DRF authenticated ``request`` as, or None if it has not yet."""
+    # AuthenticationMiddleware leaves a lazy session user; DRF replaces it.
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, SimpleLazyObject):
+        return None
+    return user
+
+
+class ReplicaRead:
+    """The replica picked for a request, used once its user is known not to be pinned."""
+
+    def __init__(self, request, alias):
+        self.request = request
+        self.alias = alias
+        self.resolved = False
+
+    def get_alias(self):
+        if not self.resolved:
+            user = _authenticated_user(self.request)
+            if user is None:
+                return None
+            self.resolved = True
+            if user.is_authenticated and is_user_pinned(user.pk):
+                self.alias = None
+        return self.alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica_read = _read_alias.get()
+        alias = replica_read.get_alias() if replica_read is not None else None
+        if (
+            alias is None
+            or model._meta.label_lower in PRIMARY_ONLY_MODELS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def reads_from_replica(view_class):
+    explicit = getattr(view_class, 'read_from_replica', None)
+    if explicit is not None:
+        return explicit
+    return (
+        view_class.__module__.startswith(REPLICA_APPS)
+        or issubclass(view_class, ListModelMixin)
+    )
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django runs a synchronous process_view in a worker thread when
+            # serving async requests; this one does no I/O, so skip the hop.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        token = _read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.pin_after_write(request, response)
+
+    def pin_after_write(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        user = _authenticated_user(request)
+        if user is not None and user.is_authenticated:
+            pin_user(user.pk)
+        else:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=get_sticky_seconds(),
+                httponly=True,
+                secure=request.is_secure(),
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = get_replicas()
+        if not replicas or request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            return None
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if view_class is not None and reads_from_replica(view_class):
+            _read_alias.set(ReplicaRead(request, random.choice(replicas)))
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return ReplicaRoutingMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.authentication import CookieJWTAuthentication, invalidate_cached_user
+from apps.core.models import User
+from apps.core.tokens import VersionedRefreshToken
+
+
+class Command(BaseCommand):
+    help = "Time CookieJWTAuthentication with a cold and a warm user cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=1000,
+            help="Number of authentications per run."
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            dest='user_id',
+            help="Authenticate as this user ID (defaults to the first active user)."
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['user_id']:
+            users = users.filter(pk=options['user_id'])
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError("No active user to authenticate as.")
+
+        token = str(VersionedRefreshToken.for_user(user).access_token)
+        request = RequestFactory().get('/', HTTP_COOKIE=f"access_token={token}")
+        authenticator = CookieJWTAuthentication()
+        iterations = options['iterations']
+
+        def run(cold):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    if cold:
+                        invalidate_cached_user(user.pk)
+                    authenticator.authenticate(request)
+                elapsed = time.perf_counter() - start
+            return elapsed / iterations * 1e6, len(ctx.captured_queries) / iterations
+
+        invalidate_cached_user(user.pk)
+        authenticator.authenticate(request)
+        for label, cold in (('cold cache', True), ('warm cache', False)):
+            micros, queries = run(cold)
+            self.stdout.write(f"{label}: {micros:.1f} us/request, {queries:.2f} queries/request")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarks.data import DatasetSpec, benchmark_users, clear_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Create the deterministic dataset the API benchmarks run against."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help="Number of users.")
+        parser.add_argument('--posts-per-user', type=int, default=5, help="Posts written by each user.")
+        parser.add_argument('--follows-per-user', type=int, default=20, help="Accounts each user follows.")
+        parser.add_argument('--comments-per-post', type=int, default=4, help="Top-level comments per published post.")
+        parser.add_argument('--reactions-per-post', type=int, default=8, help="Reactions per published post.")
+        parser.add_argument('--bookmarks-per-user', type=int, default=10, help="Bookmarks per user.")
+        parser.add_argument('--notifications-per-user', type=int, default=10, help="Notifications per user.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help="Delete an existing benchmark dataset first."
+        )
+
+    def handle(self, *args, **options):
+        if benchmark_users().exists():
+            if not options['flush']:
+                raise CommandError("Benchmark data already exists; pass --flush to replace it.")
+            clear_dataset()
+            self.stdout.write("Deleted the previous benchmark dataset.")
+
+        spec = DatasetSpec(
+            users=options['users'],
+            posts_per_user=options['posts_per_user'],
+            follows_per_user=options['follows_per_user'],
+            comments_per_post=options['comments_per_post'],
+            reactions_per_post=options['reactions_per_post'],
+            bookmarks_per_user=options['bookmarks_per_user'],
+            notifications_per_user=options['notifications_per_user'],
+            seed=options['seed']
+        )
+        summary = generate_dataset(spec, log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ", ".join(f"{count} {table}" for table, count in summary.items())
+        ))
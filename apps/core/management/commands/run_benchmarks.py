@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.core.benchmarks.runner import BenchmarkRunner, build_report, compare_reports
+from apps.core.benchmarks.scenarios import SCENARIOS, ScenarioContext, uncovered_routes
+
+
+class Command(BaseCommand):
+    help = "Benchmark every API route in-process and report latency, throughput and query counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help="Only run scenarios whose name starts with this (repeatable), e.g. feeds or posts.retrieve."
+        )
+        parser.add_argument('--iterations', type=int, default=50, help="Timed requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=1, help="Requests in flight at once.")
+        parser.add_argument('--warmup', type=int, default=3, help="Untimed requests per scenario first.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed for picking request targets.")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--compare', help="Print the change against this earlier JSON report.")
+        parser.add_argument('--list', action='store_true', help="List the scenarios and exit.")
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenarios'] or scenario.name.startswith(tuple(options['scenarios']))
+        ]
+        if options['list']:
+            for scenario in scenarios:
+                self.stdout.write(f"{scenario.name:40} {scenario.method.upper():6} {scenario.url_name}")
+            for name in uncovered_routes():
+                self.stdout.write(self.style.WARNING(f"route without a scenario: {name}"))
+            return
+        if not scenarios:
+            raise CommandError("No scenario matches.")
+
+        try:
+            context = ScenarioContext(seed=options['seed'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        runner = BenchmarkRunner(
+            context,
+            iterations=options['iterations'],
+            concurrency=options['concurrency'],
+            warmup=options['warmup']
+        )
+
+        self.stdout.write(
+            f"{'scenario':40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>8} {'errors':>6}"
+        )
+
+        def progress(name, result):
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"{name:40} {latency['p50']:9.2f} {latency['p95']:9.2f} {latency['p99']:9.2f} "
+                f"{result['throughput_rps']:8.1f} {result['queries']['mean'] or 0:8.1f} {result['errors']:6}"
+            )
+
+        # Keep password reset mails out of the console.
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            results = asyncio.run(runner.run(scenarios, progress=progress))
+        report = build_report(results, runner, options['seed'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            self.stdout.write(f"\nAgainst {baseline['meta'].get('revision') or options['compare']}:")
+            for name, metric, before, after in compare_reports(baseline, report):
+                if before is None or after is None or before == after:
+                    continue
+                change = f"{(after - before) / before * 100:+.1f}%" if before else "new"
+                self.stdout.write(f"{name:40} {metric:8} {before:>10} -> {after:<10} {change}")
+
+        failed = sum(result['errors'] for result in results.values())
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} requests returned an unexpected status."))
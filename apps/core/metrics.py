@@ -0,0 +1,313 @@
+"""
+Per-endpoint request instrumentation.
+
+``RequestMetricsMiddleware`` records the number of queries and the time
+spent in the database for each request; views using ``MetricsMixin`` also record the time spent rendering
+their serializers (including the queries made while doing so, which is where
+N+1 lookups show up). Each response carries the figures in a
+``Server-Timing`` header, and they are aggregated per view and method in a
+process-local registry exposed in Prometheus text format by
+``metrics_view``. As with any in-process Prometheus registry, every worker
+reports its own series; scrape each worker or aggregate by instance.
+
+Views declare the most queries a request may take with ``query_budget``.
+Requests over budget are logged and counted, and apps/core/tests.py fails
+when a budgeted endpoint in ``apps/*/urls.py`` goes over it.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_queries = 0
+        self.serializer_time = 0.0
+        self.query_budget = None
+        self._serializing = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            if self._serializing:
+                self.serializer_queries += 1
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(connection):
+    """
+    Count ``connection``'s queries towards the request being handled.
+    Connections are thread-local and async views reach them from worker
+    threads, so the wrapper is installed once per connection (on
+    ``connection_created``) and finds the request through a context variable.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def get_request_metrics():
+    """The ``RequestMetrics`` of the request being handled, if any."""
+    return _current.get()
+
+
+@contextmanager
+def timed_serialization():
+    metrics = _current.get()
+    if metrics is None or metrics._serializing:
+        yield
+        return
+    metrics._serializing += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - start
+        metrics._serializing -= 1
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+
+class EndpointStats:
+    def __init__(self):
+        self.statuses = {}
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_queries = 0
+        self.response_bytes = 0
+        self.budget_exceeded = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, view, method, status, duration, metrics, response_bytes):
+        with self._lock:
+            stats = self._endpoints.setdefault((view, method), EndpointStats())
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.duration.observe(duration)
+            stats.queries.observe(metrics.queries)
+            stats.db_seconds += metrics.db_time
+            stats.serializer_seconds += metrics.serializer_time
+            stats.serializer_queries += metrics.serializer_queries
+            stats.response_bytes += response_bytes
+            if metrics.query_budget is not None and metrics.queries > metrics.query_budget:
+                stats.budget_exceeded += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, labels, histogram):
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.total}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.total}")
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            family('http_requests_total', 'counter', "Requests handled, by view, method and status.")
+            for (view, method), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}'
+                    )
+
+            family('http_request_duration_seconds', 'histogram', "Time spent handling requests.")
+            for (view, method), stats in endpoints:
+                histogram('http_request_duration_seconds', f'view="{view}",method="{method}"', stats.duration)
+
+            family('db_queries_per_request', 'histogram', "SQL queries made per request.")
+            for (view, method), stats in endpoints:
+                histogram('db_queries_per_request', f'view="{view}",method="{method}"', stats.queries)
+
+            for name, attr, help_text in (
+                ('db_duration_seconds_total', 'db_seconds', "Time spent executing SQL."),
+                ('serializer_duration_seconds_total', 'serializer_seconds', "Time spent rendering serializers."),
+                ('serializer_queries_total', 'serializer_queries', "SQL queries made while rendering serializers."),
+                ('response_size_bytes_total', 'response_bytes', "Bytes of response bodies sent."),
+                ('query_budget_exceeded_total', 'budget_exceeded', "Requests that exceeded the view's query budget."),
+            ):
+                family(name, 'counter', help_text)
+                for (view, method), stats in endpoints:
+                    lines.append(f'{name}{{view="{view}",method="{method}"}} {getattr(stats, attr)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, duration):
+        view = _view_name(request)
+        response_bytes = 0 if response.streaming else len(response.content)
+        registry.record(view, request.method, response.status_code, duration, metrics, response_bytes)
+
+        if metrics.query_budget is not None and metrics.queries > metrics.query_budget:
+            logger.warning(
+                f"{request.method} {view} made {metrics.queries} queries "
+                f"(budget {metrics.query_budget})"
+            )
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serializer_time * 1000:.1f};desc="{metrics.serializer_queries} queries"',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+        return response
+
+
+_timed_serializer_classes = {}
+
+
+def _timed_serializer_class(cls):
+    """
+    Subclass of ``cls`` whose ``data`` is timed. Its ``Meta`` points
+    ``many=True`` at a timed subclass of the list serializer as well.
+    """
+    timed = _timed_serializer_classes.get(cls)
+    if timed is None:
+        class TimedSerializer(cls):
+            @property
+            def data(self):
+                with timed_serialization():
+                    return super().data
+
+        if not issubclass(cls, serializers.ListSerializer):
+            meta = getattr(cls, 'Meta', object)
+
+            class Meta(meta):
+                list_serializer_class = _timed_serializer_class(
+                    getattr(meta, 'list_serializer_class', serializers.ListSerializer)
+                )
+
+            TimedSerializer.Meta = Meta
+        TimedSerializer.__name__ = TimedSerializer.__qualname__ = f'Timed{cls.__name__}'
+        timed = _timed_serializer_classes[cls] = TimedSerializer
+    return timed
+
+
+class MetricsMixin:
+    """
+    Record serializer time for ``RequestMetricsMiddleware`` and declare the
+    view's ``query_budget``: the most SQL queries one read (GET/HEAD) may
+    take.
+    """
+    query_budget = None
+
+    def initial(self, request, *args, **kwargs):
+        metrics = get_request_metrics()
+        if metrics is not None and request.method in ('GET', 'HEAD'):
+            metrics.query_budget = self.query_budget
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer_class(self):
+        return _timed_serializer_class(super().get_serializer_class())
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Open to staff users and to requests carrying
+    ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    authorized = (
+        (token and constant_time_compare(header, f"Bearer {token}"))
+        or (request.user.is_authenticated and request.user.is_staff)
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_user_banner_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text="Embedded in issued JWTs; incrementing it revokes all of the user's tokens."),
+        ),
+    ]
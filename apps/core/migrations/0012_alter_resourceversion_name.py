@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_resourceversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resourceversion',
+            name='name',
+            field=models.CharField(max_length=64, primary_key=True, serialize=False),
+        ),
+    ]
@@ -52,6 +52,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     posts_count = models.PositiveIntegerField(default=0)
     reactions_count = models.PositiveIntegerField(default=0)
     bookmarks_count = models.PositiveIntegerField(default=0)
+    token_version = models.PositiveIntegerField(default=0, help_text="Embedded in issued JWTs; incrementing it revokes all of the user's tokens.")
 
     is_staff =  models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False, help_text="Indicates whether the user has all admin permissions. Defaults to False.")
@@ -83,4 +84,24 @@ class Follow(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.follower} → {self.following}"
\ No newline at end of file
+        return f"{self.follower} → {self.following}"
+
+
+class ThrottleCounter(models.Model):
+    """Request counter for one throttle window, used by DatabaseThrottleStore."""
+    key = models.CharField(max_length=255, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
+
+
+class ResourceVersion(models.Model):
+    """Version of a group of cached API responses, bumped on every write."""
+    name = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,89 @@
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+
+
+class OptionalCursorPagination(pagination.CursorPagination):
+    """
+    Page-number pagination by default. Clients opt into keyset pagination
+    with ``?pagination=cursor`` (and then follow the ``next`` links), which
+    skips the COUNT(*) and OFFSET scan so deep pages cost the same as the first.
+    """
+    ordering = ('-created_at', '-id')
+
+    def __init__(self):
+        self.page_number_pagination = pagination.PageNumberPagination()
+        self.use_cursor = False
+
+    def _uses_cursor(self, request):
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self._uses_cursor(request)
+        if self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        return self.page_number_pagination.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        ``paginate_queryset`` for async views. Page-number pages are counted
+        and fetched with the async ORM; cursor pages reuse DRF's synchronous
+        implementation, which makes a single query.
+        """
+        self.use_cursor = self._uses_cursor(request)
+        if self.use_cursor:
+            return await sync_to_async(super().paginate_queryset)(queryset, request, view)
+
+        numbers = self.page_number_pagination
+        numbers.request = request
+        page_size = numbers.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = numbers.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = numbers.get_page_number(request, paginator)
+        try:
+            numbers.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(numbers.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        numbers.page.object_list = [obj async for obj in numbers.page.object_list]
+
+        if paginator.num_pages > 1 and numbers.template is not None:
+            numbers.display_page_controls = True
+        return list(numbers.page)
+
+    def get_paginated_response(self, data):
+        if self.use_cursor:
+            return super().get_paginated_response(data)
+        return self.page_number_pagination.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        if self.use_cursor:
+            return super().get_paginated_response_schema(schema)
+        return self.page_number_pagination.get_paginated_response_schema(schema)
+
+    def get_html_context(self):
+        if self.use_cursor:
+            return super().get_html_context()
+        return self.page_number_pagination.get_html_context()
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number_pagination.get_schema_operation_parameters(view)
+            + super().get_schema_operation_parameters(view)
+        )
+
+
+class ScoreCursorPagination(OptionalCursorPagination):
+    """Cursor pagination for ranked feeds annotated with ``trending_score``."""
+    ordering = ('-trending_score', '-id')
+
+
+class TimelineCursorPagination(OptionalCursorPagination):
+    """Cursor pagination for home timelines, in the order of ``get_timeline_posts``."""
+    ordering = ('-timeline_created_at', '-timeline_id')
@@ -0,0 +1,61 @@
+"""
+Client-selected list representations.
+
+List views with ``CardViewMixin`` accept two query parameters on reads:
+
+- ``?view=card`` renders ``card_serializer_class``, a compact item meant for
+  feeds and result lists, instead of the full serializer.
+- ``?fields=id,title`` keeps only the named top-level fields of whichever
+  serializer is used (nested serializers are left whole).
+
+Serializers that define ``prepare_queryset(queryset)`` get to trim the
+queryset to what they will render (``defer()`` the columns they leave out,
+annotate what they compute), so heavy columns are never loaded.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_CONTEXT_KEY = 'fields'
+
+
+class SparseFieldsMixin:
+    """Serializer mixin honouring the ``fields`` set in the serializer context."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get(FIELDS_CONTEXT_KEY)
+        parent = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+        if not requested or parent is not None:
+            return fields
+        return {name: field for name, field in fields.items() if name in requested}
+
+
+class CardViewMixin:
+    card_serializer_class = None
+
+    def wants_card(self):
+        return (
+            self.card_serializer_class is not None
+            and self.request.method in SAFE_METHODS
+            and self.request.query_params.get('view') == 'card'
+        )
+
+    def get_serializer_class(self):
+        if self.wants_card():
+            return self.card_serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.request.query_params.get('fields') if self.request.method in SAFE_METHODS else None
+        if fields:
+            context[FIELDS_CONTEXT_KEY] = {name.strip() for name in fields.split(',') if name.strip()}
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer()
+        prepare_queryset = getattr(serializer, 'prepare_queryset', None)
+        if prepare_queryset is None:
+            return queryset
+        return prepare_queryset(queryset)
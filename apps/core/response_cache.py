@@ -0,0 +1,220 @@
+"""
+Versioned response cache for anonymous read endpoints.
+
+Views list the resources their payload depends on (``cache_resources``, or
+``get_cache_resources`` for per-object resources).
+Each resource has a row in ``ResourceVersion`` whose version is bumped when a
+model it covers is written, so a response is cached under a key built from
+the path, the sorted query string and the current versions; after a write
+the old entries are simply never looked up again. The same key doubles as
+the ETag, and the newest resource ``updated_at`` is sent as Last-Modified, so
+clients can revalidate with If-None-Match / If-Modified-Since and get a 304.
+
+Versions live in the database rather than the cache so every worker sees a
+bump immediately even when the cache is per-process. Bumps made while a
+request is being handled are deferred until the response is ready (see
+``ResourceVersionMiddleware``), so counters updated after the model save that
+triggered the bump are never cached under the new version.
+"""
+import hashlib
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import ResourceVersion
+
+_pending_bumps = ContextVar('pending_resource_bumps', default=None)
+
+
+def get_resource_versions(names):
+    """Return ``{name: (version, updated_at)}`` for ``names``, creating missing rows."""
+    versions = {
+        row.name: (row.version, row.updated_at)
+        for row in ResourceVersion.objects.filter(name__in=names)
+    }
+    for name in set(names) - set(versions):
+        row, _ = ResourceVersion.objects.get_or_create(name=name)
+        versions[name] = (row.version, row.updated_at)
+    return versions
+
+
+async def aget_resource_versions(names):
+    """``get_resource_versions`` for async views."""
+    versions = {
+        row.name: (row.version, row.updated_at)
+        async for row in ResourceVersion.objects.filter(name__in=names)
+    }
+    for name in set(names) - set(versions):
+        row, _ = await ResourceVersion.objects.aget_or_create(name=name)
+        versions[name] = (row.version, row.updated_at)
+    return versions
+
+
+def _bump(names):
+    now = timezone.now()
+    for name in sorted(names):
+        updated = ResourceVersion.objects.filter(name=name).update(
+            version=F('version') + 1,
+            updated_at=now
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    ResourceVersion.objects.create(name=name)
+            except IntegrityError:
+                ResourceVersion.objects.filter(name=name).update(
+                    version=F('version') + 1,
+                    updated_at=now
+                )
+
+
+def bump_resource_versions(*names):
+    """
+    Invalidate every cached response that depends on ``names``. Inside a
+    request the bump happens once the view has finished; otherwise after the
+    current transaction commits.
+    """
+    pending = _pending_bumps.get()
+    if pending is not None:
+        pending.update(names)
+    else:
+        transaction.on_commit(lambda: _bump(names))
+
+
+class ResourceVersionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _pending_bumps.set(set())
+        try:
+            return self.get_response(request)
+        finally:
+            pending = _pending_bumps.get()
+            _pending_bumps.reset(token)
+            if pending:
+                transaction.on_commit(lambda: _bump(pending))
+
+    async def __acall__(self, request):
+        token = _pending_bumps.set(set())
+        try:
+            return await self.get_response(request)
+        finally:
+            pending = _pending_bumps.get()
+            _pending_bumps.reset(token)
+            if pending:
+                await sync_to_async(transaction.on_commit)(lambda: _bump(pending))
+
+
+class BaseCachedResponseMixin:
+    cache_resources = ()
+    cache_timeout = None
+
+    def get_cache_resources(self):
+        return self.cache_resources
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+    def response_cache_hit(self, request, data):
+        """Called when ``data`` is served from the cache instead of the view."""
+
+    def use_response_cache(self, request):
+        return not request.user.is_authenticated and self.get_cache_timeout()
+
+    def get_response_cache_key(self, request, versions):
+        """Return ``(cache_key, etag, last_modified)`` for ``request``."""
+        query = sorted(
+            (key, value) for key, values in request.query_params.lists() for value in values
+        )
+        key = '|'.join([
+            type(self).__name__,
+            request.path,
+            repr(query),
+            *(f"{name}:{versions[name][0]}" for name in sorted(versions)),
+        ])
+        etag = f'"{hashlib.md5(key.encode()).hexdigest()}"'
+        last_modified = max(
+            (updated_at for _, updated_at in versions.values()),
+            default=timezone.now()
+        ).timestamp()
+        return f"response:{etag.strip(chr(34))}", etag, last_modified
+
+    def finalize_cached_response(self, request, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ['Cookie'])
+        return get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=int(last_modified),
+            response=response
+        )
+
+
+class CachedResponseMixin(BaseCachedResponseMixin):
+    """
+    Serve GET requests from anonymous users out of the response cache.
+    Authenticated requests carry per-user fields (is_liked, is_following...)
+    and always go to the view.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not self.use_response_cache(request):
+            return super().get(request, *args, **kwargs)
+
+        versions = get_resource_versions(self.get_cache_resources())
+        cache_key, etag, last_modified = self.get_response_cache_key(request, versions)
+
+        data = cache.get(cache_key)
+        if data is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cache.set(cache_key, response.data, self.get_cache_timeout())
+        else:
+            self.response_cache_hit(request, data)
+            response = Response(data)
+
+        return self.finalize_cached_response(request, response, etag, last_modified)
+
+
+class AsyncCachedResponseMixin(BaseCachedResponseMixin):
+    """``CachedResponseMixin`` for views built on ``AsyncListAPIView``."""
+
+    async def get(self, request, *args, **kwargs):
+        if not self.use_response_cache(request):
+            return await super().get(request, *args, **kwargs)
+
+        versions = await aget_resource_versions(self.get_cache_resources())
+        cache_key, etag, last_modified = self.get_response_cache_key(request, versions)
+
+        data = await cache.aget(cache_key)
+        if data is None:
+            response = await super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            await cache.aset(cache_key, response.data, self.get_cache_timeout())
+        else:
+            self.response_cache_hit(request, data)
+            response = Response(data)
+
+        return self.finalize_cached_response(request, response, etag, last_modified)
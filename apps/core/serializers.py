@@ -1,50 +1,67 @@
-from rest_framework import generics, serializers
+from django.db import models
+from rest_framework import serializers
 from .models import User, Follow
+from .utils import get_following_state, prime_following_state
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 
+class ViewerStateListSerializer(serializers.ListSerializer):
+    """
+    List serializer that lets the child resolve viewer-specific fields
+    (is_liked, is_following, ...) for the whole page in set-based queries
+    before any row is rendered.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+        prime_viewer_state = getattr(self.child, 'prime_viewer_state', None)
+        if prime_viewer_state is not None:
+            prime_viewer_state(instances)
+        return super().to_representation(instances)
+
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     is_following = serializers.SerializerMethodField()
     class Meta:
         model = User
         fields = ['id', 'email', 'password', 'first_name', 'last_name', 'profile_pic_url', 'banner_url', 'bio', 'followers_count', 'following_count', 'about', 'phone_number', 'address', 'city', 'state', 'country', 'website', 'linkedin', 'instagram', 'twitter', 'github', 'registration_method', 'is_following', 'created_at', 'updated_at']
+        list_serializer_class = ViewerStateListSerializer
 
     def create(self, validated_data):
         user = User.objects.create_user(**validated_data)
         return user
 
-    def get_is_following(self, obj):
-        request = self.context.get('request')
-        user_id = obj.id
-        user = generics.get_object_or_404(User, pk=user_id)
-        if not request or not request.user.is_authenticated:
-            return False
+    def prime_viewer_state(self, users):
+        prime_following_state(self.context, users)
 
-        return Follow.objects.filter(
-            follower=request.user,
-            following=user
-        ).exists()
+    def get_is_following(self, obj):
+        return obj.pk in get_following_state(self.context, obj)['following']
 
 class UserSummarySerializer(serializers.ModelSerializer):
     is_following = serializers.SerializerMethodField()
     class Meta: 
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'profile_pic_url', 'bio', 'about', 'is_following']
+        list_serializer_class = ViewerStateListSerializer
+
+    def prime_viewer_state(self, users):
+        prime_following_state(self.context, users)
 
     def get_is_following(self, obj):
-        request = self.context.get('request')
-        user_id = obj.id
-        user = generics.get_object_or_404(User, pk=user_id)
-        if not request or not request.user.is_authenticated:
-            return False
+        return obj.pk in get_following_state(self.context, obj)['following']
+
 
-        return Follow.objects.filter(
-            follower=request.user,
-            following=user
-        ).exists()
+class UserCardSerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'profile_pic_url']
+
+    def get_name(self, obj):
+        return ' '.join(filter(None, [obj.first_name, obj.last_name]))
 
 
 class PasswordResetRequestSerializer(serializers.Serializer):
@@ -74,6 +91,7 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
             raise serializers.ValidationError("Invalid or expired token")
 
         user.set_password(password)
+        user.token_version += 1
         user.save()
         return user
 
@@ -85,3 +103,10 @@ class FollowSerializer(serializers.ModelSerializer):
         model = Follow
         fields = ['id', 'follower', 'following', 'created_at']
         read_only_fields = ['follower', 'following', 'created_at']
+        list_serializer_class = ViewerStateListSerializer
+
+    def prime_viewer_state(self, follows):
+        prime_following_state(
+            self.context,
+            [user for follow in follows for user in (follow.follower, follow.following)]
+        )
@@ -1,4 +1,212 @@
-from django.test import TestCase
+import re
+from itertools import product
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.functional import SimpleLazyObject
+from rest_framework.test import APIClient
 
+from apps.blogs.models import Bookmark, Category, Comment, Post, Reaction, Tag
+from apps.blogs.utils import get_content_type_id
+from apps.blogs.views import PostsListCreateView
+from apps.notifications.models import Notification
+from . import metrics
+from .db_router import ReplicaRouter, ReplicaRoutingMiddleware
+from .models import Follow, User
+from .tokens import VersionedRefreshToken
+from .utils import iter_api_patterns
+
+URL_PARAMETER = re.compile(r'<(?:\w+:)?(\w+)>')
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Request every GET endpoint that declares a ``query_budget`` (and its
+    ``?view=card`` variant, if any) against a page's worth of data,
+    anonymously and signed in, and fail if it takes more queries than its
+    budget. It runs with the rest of the suite under ``manage.py test``.
+    """
+    posts = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(email='viewer@example.com', password='pw')
+        authors = [
+            User.objects.create_user(email=f'author{i}@example.com', password='pw')
+            for i in range(3)
+        ]
+        for author in authors:
+            Follow.objects.create(follower=cls.viewer, following=author)
+            Follow.objects.create(follower=author, following=cls.viewer)
+
+        cls.category = Category.objects.create(name='Tech', slug='tech')
+        tags = [Tag.objects.create(name=f'tag{i}', slug=f'tag{i}') for i in range(3)]
+        post_type = get_content_type_id(Post)
+        comment_type = get_content_type_id(Comment)
+        for i in range(cls.posts):
+            post = Post.objects.create(
+                author=[cls.viewer, *authors][i % (len(authors) + 1)],
+                category=cls.category,
+                title=f'Post {i}',
+                slug=f'post-{i}',
+                content='Lorem ipsum dolor sit amet',
+                status=Post.DRAFT if i == 0 else Post.PUBLISHED
+            )
+            post.tags.set(tags[:i % len(tags) + 1])
+            Reaction.objects.create(user=cls.viewer, content_type_id=post_type, object_id=post.pk)
+            Bookmark.objects.create(user=cls.viewer, post=post)
+            for author in authors[:2]:
+                comment = Comment.objects.create(post=post, user=author, content='Nice')
+                Comment.objects.create(post=post, user=cls.viewer, parent=comment, content='Thanks')
+                Reaction.objects.create(user=cls.viewer, content_type_id=comment_type, object_id=comment.pk)
+            Notification.objects.create(
+                user=cls.viewer,
+                actor=post.author,
+                action_type='comment',
+                content_type_id=post_type,
+                object_id=post.pk
+            )
+        cls.post = post
+        cls.comment = comment
+
+    def setUp(self):
+        cache.clear()
+
+    def url_for(self, route):
+        if not URL_PARAMETER.search(route):
+            return '/' + route
+        objects = {
+            'posts': self.post,
+            'comments': self.comment,
+            'categories': self.category,
+            'users': self.viewer,
+        }
+        target = objects[re.search(r'([\w-]+)/<', route).group(1)]
+        return '/' + URL_PARAMETER.sub(
+            lambda match: str(target.pk if match.group(1) == 'id' else getattr(target, match.group(1))),
+            route
+        )
+
+    def test_endpoints_stay_within_query_budget(self):
+        endpoints = [
+            (route, pattern.callback.cls)
+            for route, pattern in iter_api_patterns()
+            if getattr(getattr(pattern.callback, 'cls', None), 'query_budget', None) is not None
+        ]
+        self.assertTrue(endpoints)
+
+        signed_in = APIClient()
+        signed_in.cookies['access_token'] = str(VersionedRefreshToken.for_user(self.viewer).access_token)
+        for route, view_class in endpoints:
+            urls = [self.url_for(route)]
+            if getattr(view_class, 'card_serializer_class', None) is not None:
+                urls.append(urls[0] + '?view=card')
+            for url, (label, client) in product(urls, (('anonymous', APIClient()), ('signed in', signed_in))):
+                with self.subTest(url=url, client=label):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = client.get(url)
+                    if label == 'signed in':
+                        self.assertEqual(response.status_code, 200, response.content[:200])
+                    self.assertLessEqual(
+                        len(queries),
+                        view_class.query_budget,
+                        '\n'.join(query['sql'] for query in queries.captured_queries)
+                    )
+
+    def test_list_and_detail_serialization_is_timed(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        with mock.patch.object(metrics, 'timed_serialization', wraps=metrics.timed_serialization) as timed:
+            for url in ('/api/posts/', '/api/posts/post-0/', '/api/posts/?view=card'):
+                self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(timed.call_count, 3)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Drive the middleware as Django and DRF would and ask the router where reads go."""
+
+    def setUp(self):
+        cache.clear()
+        self.writer = User(pk=1, email='writer@example.com')
+        self.reader = User(pk=2, email='reader@example.com')
+
+    def request(self, method, user, cookies=None):
+        """Return where a read goes (before, after authentication) and the response."""
+        request = getattr(RequestFactory(), method)('/api/posts/')
+        request.COOKIES.update(cookies or {})
+        request.user = SimpleLazyObject(AnonymousUser)
+        middleware = ReplicaRoutingMiddleware(None)
+        routed = []
+
+        def view(request):
+            routed.append(ReplicaRouter().db_for_read(Post))
+            request.user = user  # what DRF's Request.user setter does
+            routed.append(ReplicaRouter().db_for_read(Post))
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, PostsListCreateView.as_view(), (), {})
+            return view(request)
+
+        middleware.get_response = get_response
+        response = middleware(request)
+        return routed, response
+
+    def test_writers_read_the_primary_until_the_pin_expires(self):
+        self.assertEqual(self.request('get', self.writer)[0], ['default', 'replica1'])
+
+        _, response = self.request('post', self.writer)
+        self.assertNotIn('db_pin', response.cookies)
+        self.assertEqual(self.request('get', self.writer)[0], ['default', 'default'])
+        self.assertEqual(self.request('get', self.reader)[0], ['default', 'replica1'])
+
+        cache.clear()
+        self.assertEqual(self.request('get', self.writer)[0], ['default', 'replica1'])
+
+    def test_anonymous_writers_are_pinned_by_cookie(self):
+        _, response = self.request('post', AnonymousUser())
+        cookie = response.cookies['db_pin']
+        self.assertFalse(cookie['secure'])
+        routed, _ = self.request('get', AnonymousUser(), cookies={'db_pin': cookie.value})
+        self.assertEqual(routed, ['default', 'default'])
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "set DATABASE_REPLICA_URLS, e.g. to a second SQLite file")
+class ReplicaDatabaseTests(TransactionTestCase):
+    """
+    With DATABASE_URL=sqlite:///primary.sqlite3
+    DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3, check which connection
+    the list endpoints read from through the whole stack.
+    """
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        self.writer = User.objects.create_user(email='writer@example.com', password='pw')
+        self.reader = User.objects.create_user(email='reader@example.com', password='pw')
+        category = Category.objects.create(name='Tech', slug='tech')
+        self.post = Post.objects.create(author=self.writer, category=category, title='Gone', slug='gone')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.cookies['access_token'] = str(VersionedRefreshToken.for_user(user).access_token)
+        return client
+
+    def read_counts(self, client):
+        with CaptureQueriesContext(connection) as primary:
+            with CaptureQueriesContext(connections[settings.DATABASE_REPLICAS[0]]) as replica:
+                self.assertEqual(client.get('/api/posts/').status_code, 200)
+        return len(primary) > 0, len(replica) > 0
+
+    def test_the_writer_reads_its_write_from_the_primary(self):
+        writer = self.client_for(self.writer)
+        self.assertEqual(writer.delete(f'/api/posts/{self.post.pk}/delete/').status_code, 204)
+        self.assertEqual(self.read_counts(writer), (True, False))
+        self.assertEqual(self.read_counts(self.client_for(self.reader)), (True, True))
@@ -0,0 +1,151 @@
+"""
+Sliding-window request throttling backed by shared atomic counters.
+
+DRF's SimpleRateThrottle pickles the full list of request timestamps into
+the cache on every request, which is O(limit) work and, with the default
+per-process LocMem cache, gives every worker its own history. These
+throttles keep one integer per client and window instead: each request does
+a single atomic increment of the current window and reads the previous one,
+and the rate is estimated by weighting the previous window by how much of it
+still overlaps the sliding window.
+
+Counters live in the store named by ``THROTTLE_STORE``: ``CacheThrottleStore``
+for a shared cache such as Redis, or ``DatabaseThrottleStore`` which upserts
+rows in ``core_throttlecounter`` and needs nothing but the database.
+"""
+import functools
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+from .models import ThrottleCounter
+
+PURGE_INTERVAL = 60
+
+
+class CacheThrottleStore:
+    """Counters in a Django cache; atomic with Redis or Memcached."""
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def incr(self, key, timeout):
+        self.cache.add(key, 0, timeout=timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr().
+            self.cache.add(key, 0, timeout=timeout)
+            return self.cache.incr(key)
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+
+class DatabaseThrottleStore:
+    """
+    Counters in the ``ThrottleCounter`` table, incremented with a single
+    ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` (PostgreSQL, SQLite).
+    """
+    _next_purge = 0
+
+    @cached_property
+    def _incr_sql(self):
+        qn = connection.ops.quote_name
+        table = qn(ThrottleCounter._meta.db_table)
+        return (
+            f"INSERT INTO {table} ({qn('key')}, {qn('count')}, {qn('expires_at')}) "
+            f"VALUES (%s, 1, %s) "
+            f"ON CONFLICT ({qn('key')}) DO UPDATE SET {qn('count')} = {table}.{qn('count')} + 1 "
+            f"RETURNING {qn('count')}"
+        )
+
+    def incr(self, key, timeout):
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=timeout)
+        with connection.cursor() as cursor:
+            cursor.execute(self._incr_sql, [key, connection.ops.adapt_datetimefield_value(expires_at)])
+            count = cursor.fetchone()[0]
+        self._purge(now)
+        return count
+
+    def get(self, key):
+        return ThrottleCounter.objects.filter(key=key).values_list('count', flat=True).first() or 0
+
+    @classmethod
+    def _purge(cls, now):
+        # Windows are part of the key, so expired rows are only garbage.
+        if time.monotonic() < cls._next_purge:
+            return
+        cls._next_purge = time.monotonic() + PURGE_INTERVAL
+        ThrottleCounter.objects.filter(expires_at__lte=now).delete()
+
+
+@functools.lru_cache
+def _load_store(path):
+    return import_string(path)()
+
+
+def get_throttle_store():
+    return _load_store(getattr(settings, 'THROTTLE_STORE', 'apps.core.throttling.CacheThrottleStore'))
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Replaces SimpleRateThrottle's timestamp history with window counters.
+    Each throttle class counts separately, so e.g. reads do not use up the
+    quota of writes even though both use the ``user`` scope.
+    """
+
+    def get_cache_key(self, request, view):
+        key = super().get_cache_key(request, view)
+        if key is None:
+            return None
+        return f"{key}:{type(self).__name__}"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        store = get_throttle_store()
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        window = int(window)
+        current = store.incr(f"{self.key}:{window}", timeout=self.duration * 2)
+        previous = store.get(f"{self.key}:{window - 1}")
+
+        self.elapsed = offset
+        self.estimate = previous * (1 - offset / self.duration) + current
+        if self.estimate > self.num_requests:
+            self.previous = previous
+            self.current = current
+            return self.throttle_failure()
+        return True
+
+    def wait(self):
+        # Time until the weighted previous window has decayed enough to
+        # admit one more request, or until this window ends.
+        remaining = self.duration - self.elapsed
+        if self.current > self.num_requests or not self.previous:
+            return remaining
+        excess = self.estimate - self.num_requests
+        return min(remaining, excess / self.previous * self.duration)
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+TOKEN_VERSION_CLAIM = "token_version"
+
+
+class VersionedRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user's ``token_version``. The claim is copied
+    into every access token derived from it, so bumping the version revokes
+    all outstanding tokens of the user.
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = VersionedRefreshToken
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from .views import CustomTokenObtainPairView
+from .metrics import metrics_view
 
 urlpatterns = [
     path('auth/register/', views.RegisterUser.as_view(), name='register'),
@@ -29,4 +30,6 @@ urlpatterns = [
     path('users/<int:id>/followers/', views.ListFollowersView.as_view(), name='list-followers'),
     path('users/<int:id>/following/', views.ListFollowingView.as_view(), name='list-following'),
     path("users/<int:id>/is-following/", views.IsFollowingView.as_view(), name='is-following'),
+
+    path('metrics/', metrics_view, name='metrics'),
 ]
\ No newline at end of file
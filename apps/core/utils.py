@@ -0,0 +1,83 @@
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .models import Follow
+
+FOLLOWING_STATE_KEY = 'following_viewer_state'
+
+
+def get_viewer(context):
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+async def alist(queryset):
+    """Evaluate ``queryset`` with the async ORM."""
+    return [item async for item in queryset]
+
+
+def _unresolved_following_state(context, users):
+    state = context.setdefault(FOLLOWING_STATE_KEY, {
+        'resolved': set(),
+        'following': set(),
+    })
+    return state, {user.pk for user in users if user is not None} - state['resolved']
+
+
+def _following_queryset(viewer, user_ids):
+    return Follow.objects.filter(
+        follower=viewer,
+        following_id__in=user_ids
+    ).values_list('following_id', flat=True)
+
+
+def prime_following_state(context, users):
+    """
+    Resolve is_following for every user in ``users`` with a single Follow
+    query and cache the result in the serializer context, so nested user
+    serializers across the whole response share one lookup.
+    """
+    state, user_ids = _unresolved_following_state(context, users)
+    if not user_ids:
+        return state
+
+    viewer = get_viewer(context)
+    if viewer is not None:
+        state['following'].update(_following_queryset(viewer, user_ids))
+
+    state['resolved'].update(user_ids)
+    return state
+
+
+async def aprime_following_state(context, users):
+    """``prime_following_state`` for async views."""
+    state, user_ids = _unresolved_following_state(context, users)
+    if not user_ids:
+        return state
+
+    viewer = get_viewer(context)
+    if viewer is not None:
+        state['following'].update(await alist(_following_queryset(viewer, user_ids)))
+
+    state['resolved'].update(user_ids)
+    return state
+
+
+def get_following_state(context, user):
+    state = context.get(FOLLOWING_STATE_KEY)
+    if state is None or user.pk not in state['resolved']:
+        state = prime_following_state(context, [user])
+    return state
+
+
+def iter_api_patterns(patterns=None, prefix=''):
+    """Yield ``(route, pattern)`` for every URL pattern in ``apps/*/urls.py``."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if getattr(pattern.urlconf_module, '__name__', '').startswith('apps.'):
+                yield from iter_api_patterns(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            yield route, pattern
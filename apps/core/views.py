@@ -4,7 +4,6 @@ from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
 from .models import User, Follow
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -16,7 +15,10 @@ from django.utils.encoding import force_bytes
 from django.core.mail import send_mail
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .authentication import invalidate_cached_user
+from .metrics import MetricsMixin
 from .permissions import IsProfileOwner
+from .tokens import VersionedRefreshToken
 from .throttles import AuthRateThrottle, AuthAnonRateThrottle, UserActionRateThrottle, ReadOnlyRateThrottle
 from apps.notifications.utils import create_notification
 from apps.notifications.models import Notification
@@ -43,7 +45,7 @@ class RegisterUser(generics.CreateAPIView):
 
         user = serializer.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         response = Response({
             "status": True,
             "user": UserSerializer(user).data
@@ -83,9 +85,10 @@ class RegisterUser(generics.CreateAPIView):
         except Exception:
             pass 
 
-class ListUsersView(generics.ListAPIView):
+class ListUsersView(MetricsMixin, generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 7
     throttle_classes = [ReadOnlyRateThrottle]
 
     def get_queryset(self):
@@ -98,10 +101,11 @@ class UpdateUser(generics.UpdateAPIView):
     lookup_field = 'pk'
     lookup_url_kwarg='id'
 
-class RetrieveUser(generics.RetrieveAPIView):
+class RetrieveUser(MetricsMixin, generics.RetrieveAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    query_budget = 6
     throttle_classes = [ReadOnlyRateThrottle]
 
     lookup_field = 'pk'
@@ -116,8 +120,9 @@ class DeleteUser(generics.DestroyAPIView):
     lookup_field = 'pk'
     lookup_url_kwarg='id'
 
-class MeView(APIView):
+class MeView(MetricsMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 6
 
     def get(self, request):
         serializer = UserSerializer(request.user)
@@ -178,7 +183,7 @@ def google_login(request):
                     "status": False
                 }, status=status.HTTP_403_FORBIDDEN)
       
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
 
         response = Response({
             "status": True,
@@ -394,6 +399,8 @@ class FollowUserView(APIView):
         User.objects.filter(
                 pk=request.user.id,
                 ).update(following_count=F("following_count") + 1)
+        invalidate_cached_user(user_id)
+        invalidate_cached_user(request.user.id)
 
         create_notification(
             user=user_to_follow,
@@ -423,6 +430,8 @@ class FollowUserView(APIView):
             pk=request.user.id,
             following_count__gt=0
             ).update(following_count=F("following_count") - 1)
+            invalidate_cached_user(user_id)
+            invalidate_cached_user(request.user.id)
 
             return Response(
                 {"message": "Successfully unfollowed user"},
@@ -435,9 +444,10 @@ class FollowUserView(APIView):
             )
 
 
-class ListFollowersView(generics.ListAPIView):
+class ListFollowersView(MetricsMixin, generics.ListAPIView):
     serializer_class = FollowSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 8
     throttle_classes = [ReadOnlyRateThrottle]
 
     def get_queryset(self):
@@ -446,9 +456,10 @@ class ListFollowersView(generics.ListAPIView):
         return Follow.objects.filter(following=user).select_related('follower', 'following')
 
 
-class ListFollowingView(generics.ListAPIView):
+class ListFollowingView(MetricsMixin, generics.ListAPIView):
     serializer_class = FollowSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 8
     throttle_classes = [ReadOnlyRateThrottle]
 
     def get_queryset(self):
@@ -456,8 +467,9 @@ class ListFollowingView(generics.ListAPIView):
         user = get_object_or_404(User, pk=user_id)
         return Follow.objects.filter(follower=user).select_related('follower', 'following')
 
-class IsFollowingView(APIView):
+class IsFollowingView(MetricsMixin, APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 6
 
     def get(self, request, **kwargs):
         user_id = self.kwargs['id']
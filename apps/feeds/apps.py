@@ -5,3 +5,6 @@ class FeedsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.feeds'
 
+    def ready(self):
+        """Keep materialized timelines in sync with posts and follows."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,27 @@
+"""
+Combined feed: the viewer's home timeline merged with the top trending posts.
+
+Both sources are subqueries of one statement (timeline entries, followed
+celebrity authors and the top ``COMBINED_TRENDING_LIMIT`` trending scores,
+OR'ed in the WHERE clause), so the database deduplicates and orders the
+union and the usual ``(-created_at, -id)`` cursor pagination applies. No ID
+list is ever loaded into Python.
+"""
+from django.db.models import Q
+
+from apps.blogs.models import Post
+from .timeline import timeline_filter
+from .trending import trending_ids_queryset
+
+COMBINED_TRENDING_PERIOD = '24h'
+COMBINED_TRENDING_LIMIT = 10
+
+
+def get_combined_posts(user):
+    # Users who follow nobody get every recent post, as in the personalized feed.
+    if not user.following_count:
+        return Post.objects.is_published()
+    return Post.objects.is_published().filter(
+        timeline_filter(user)
+        | Q(pk__in=trending_ids_queryset(COMBINED_TRENDING_PERIOD, COMBINED_TRENDING_LIMIT))
+    )
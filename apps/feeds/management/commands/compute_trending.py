@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.feeds.trending import PERIODS, compute_trending_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute time-decayed trending scores for every trending period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            choices=list(PERIODS),
+            action='append',
+            dest='periods',
+            help="Only recompute this period (repeatable)."
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help="Keep running and recompute every N seconds instead of once."
+        )
+
+    def handle(self, *args, **options):
+        periods = options['periods'] or list(PERIODS)
+        interval = options['interval']
+        while True:
+            for period in periods:
+                count = compute_trending_scores(period)
+                self.stdout.write(f"{period}: {count} posts scored")
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.feeds.timeline import fan_out_pending
+
+
+class Command(BaseCommand):
+    help = "Copy newly published posts into their followers' home timelines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help="Number of queued posts claimed per batch."
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help="Keep running as a worker, polling every N seconds when idle."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+        while True:
+            fanned_out = 0
+            while True:
+                count = fan_out_pending(batch_size)
+                fanned_out += count
+                if count < batch_size:
+                    break
+            if fanned_out:
+                self.stdout.write(f"Fanned out {fanned_out} posts")
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.models import User
+from apps.feeds.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized home timelines from follows and published posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help="Only rebuild the timeline of this user ID (repeatable)."
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        rebuilt = 0
+        for user in users.iterator(chunk_size=500):
+            rebuild_timeline(user)
+            rebuilt += 1
+        self.stdout.write(f"Rebuilt {rebuilt} timelines")
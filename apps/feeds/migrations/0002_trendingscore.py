@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 12:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0009_category_posts_count_alter_post_unique_together'),
+        ('feeds', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('1h', '1 hour'), ('24h', '24 hours'), ('7d', '7 days'), ('30d', '30 days')], max_length=3)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_scores', to='blogs.post')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['period', '-score'], name='feeds_trend_period_49d471_idx')],
+                'unique_together': {('post', 'period')},
+            },
+        ),
+    ]
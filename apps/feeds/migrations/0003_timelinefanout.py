@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-17 16:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0012_post_excerpt_content_hash'),
+        ('feeds', '0002_trendingscore'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineFanout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='feeds_timel_user_id_5a525b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='feeds_timel_user_id_e0aa94_idx'),
+        ),
+        migrations.AddField(
+            model_name='timelinefanout',
+            name='post',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_fanout', to='blogs.post'),
+        ),
+    ]
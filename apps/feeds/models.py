@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import models
+
+User = settings.AUTH_USER_MODEL
+
+
+class TimelineEntry(models.Model):
+    """
+    A post materialized into a follower's home timeline when it is published
+    (fan-out on write). ``created_at`` mirrors the post so the personalized
+    feed is a range read on (user, -created_at, -id).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey('blogs.Post', on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'Timeline entries'
+        ordering = ['-created_at']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    def __str__(self):
+        return f"{self.post} in {self.user}'s timeline"
+
+
+class TimelineFanout(models.Model):
+    """
+    A published post waiting to be copied into its followers' timelines.
+    Publishing only inserts this row; the ``fan_out_timelines`` worker claims
+    rows, fans the posts out and deletes them.
+    """
+    post = models.OneToOneField('blogs.Post', on_delete=models.CASCADE, related_name='timeline_fanout')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Fan-out of {self.post}"
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed engagement score of a post for one trending period,
+    recomputed periodically by ``compute_trending`` so the trending feed is a
+    top-K scan of the (period, -score) index.
+    """
+    PERIOD_CHOICES = [
+        ('1h', '1 hour'),
+        ('24h', '24 hours'),
+        ('7d', '7 days'),
+        ('30d', '30 days'),
+    ]
+    post = models.ForeignKey('blogs.Post', on_delete=models.CASCADE, related_name='trending_scores')
+    period = models.CharField(max_length=3, choices=PERIOD_CHOICES)
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ('post', 'period')
+        indexes = [
+            models.Index(fields=['period', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.post} ({self.period}): {self.score:.2f}"
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.blogs.models import Post
+from apps.core.models import Follow
+from . import timeline
+
+
+@receiver(post_save, sender=Post)
+def update_timelines_for_post(sender, instance, **kwargs):
+    if instance.status == Post.PUBLISHED and not instance.is_deleted:
+        timeline.publish_post(instance)
+    else:
+        timeline.remove_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill_timeline(instance.follower, instance.following)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline.remove_author(instance.follower_id, instance.following_id)
@@ -1,4 +1,94 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
 
+from apps.blogs.models import Category, Post
+from apps.core.models import Follow, User
+from apps.notifications.models import Notification
+from .models import TimelineEntry, TimelineFanout
+from .timeline import fan_out_pending, get_fanout_follower_limit, get_timeline_posts, trim_timelines
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(email='reader@example.com', password='pw')
+        cls.author = User.objects.create_user(email='author@example.com', password='pw')
+        cls.star = User.objects.create_user(email='star@example.com', password='pw')
+        cls.category = Category.objects.create(name='Tech', slug='tech')
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+        User.objects.filter(pk=cls.reader.pk).update(following_count=1)
+
+    def publish(self, author, slug, created_at):
+        post = Post.objects.create(
+            author=author, category=self.category, title=slug, slug=slug, status=Post.PUBLISHED
+        )
+        Post.objects.filter(pk=post.pk).update(created_at=created_at)
+        TimelineEntry.objects.filter(post=post).update(created_at=created_at)
+        return post
+
+    def feed_slugs(self):
+        self.reader.refresh_from_db()
+        return [post.slug for post in get_timeline_posts(self.reader)]
+
+    def test_followers_get_posts_once_the_fan_out_runs(self):
+        now = timezone.now()
+        post = self.publish(self.author, 'first', now)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.author, post=post).exists())
+        self.assertEqual(self.feed_slugs(), [])
+
+        self.assertEqual(fan_out_pending(), 1)
+        self.assertFalse(TimelineFanout.objects.exists())
+        self.assertEqual(self.feed_slugs(), ['first'])
+        self.assertQuerySetEqual(
+            Notification.objects.filter(action_type='post').values_list('user', 'object_id'),
+            [(self.reader.pk, post.pk)]
+        )
+
+    def test_ties_are_ordered_and_celebrities_merged_in(self):
+        now = timezone.now()
+        self.publish(self.author, 'older', now - timedelta(hours=1))
+        for i in range(3):
+            self.publish(self.author, f'tied-{i}', now)
+        fan_out_pending()
+        self.assertEqual(self.feed_slugs(), ['tied-2', 'tied-1', 'tied-0', 'older'])
+
+        User.objects.filter(pk=self.star.pk).update(followers_count=get_fanout_follower_limit())
+        Follow.objects.create(follower=self.reader, following=self.star)
+        famous = self.publish(self.star, 'famous', now - timedelta(minutes=30))
+        self.assertEqual(self.feed_slugs(), ['tied-2', 'tied-1', 'tied-0', 'famous', 'older'])
+
+        # Celebrity posts stay out of timelines but followers are still notified.
+        fan_out_pending()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=famous).exists())
+        self.assertTrue(Notification.objects.filter(user=self.reader, action_type='post', object_id=famous.pk).exists())
+
+    def test_cursor_pages_follow_the_timeline_order(self):
+        now = timezone.now()
+        for i in range(12):
+            self.publish(self.author, f'post-{i}', now - timedelta(minutes=i // 2))
+        fan_out_pending(batch_size=20)
+
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        page = client.get('/api/feeds/personalized/?pagination=cursor').json()
+        slugs = [post['slug'] for post in page['results']]
+        while page['next']:
+            page = client.get(page['next']).json()
+            slugs += [post['slug'] for post in page['results']]
+        # Posts published in the same minute come newest first.
+        self.assertEqual(slugs, [f'post-{i ^ 1}' for i in range(12)])
+
+    @override_settings(FEED_TIMELINE_DEPTH=3)
+    def test_only_timelines_over_the_depth_are_trimmed(self):
+        now = timezone.now()
+        for i in range(4):
+            self.publish(self.author, f'post-{i}', now + timedelta(minutes=i))
+        fan_out_pending()
+        self.assertEqual(self.feed_slugs(), ['post-3', 'post-2', 'post-1'])
+
+        # Short timelines cost one count and no ranking.
+        with self.assertNumQueries(1):
+            trim_timelines([self.reader.pk, self.star.pk])
@@ -0,0 +1,224 @@
+"""
+Fan-out-on-write home timelines.
+
+Publishing a post copies it into the author's ``TimelineEntry`` right away
+and queues a ``TimelineFanout`` in the same transaction; the
+``fan_out_timelines`` worker then copies it into every follower's timeline
+and notifies them, so the author's request never waits on the followers.
+Following someone backfills their recent posts. Posts by authors with more
+than ``FEED_FANOUT_FOLLOWER_LIMIT`` followers are not copied into timelines
+and are merged into the feed at read time instead; their followers are
+still notified.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from apps.blogs.models import Post
+from apps.core.models import Follow
+from apps.notifications.utils import create_notifications
+from .models import TimelineEntry, TimelineFanout
+
+logger = logging.getLogger(__name__)
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def get_timeline_depth():
+    return getattr(settings, 'FEED_TIMELINE_DEPTH', 800)
+
+
+def get_fanout_follower_limit():
+    return getattr(settings, 'FEED_FANOUT_FOLLOWER_LIMIT', 10000)
+
+
+def is_celebrity(user):
+    return user.followers_count >= get_fanout_follower_limit()
+
+
+def trim_timelines(user_ids):
+    """
+    Drop entries beyond the configured depth for the given users. Only the
+    users actually over the depth are ranked, so a fan-out batch whose
+    timelines are all short costs a single count on the (user, ...) index.
+    """
+    depth = get_timeline_depth()
+    over_depth = list(
+        TimelineEntry.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+            entries=Count('id')
+        ).filter(entries__gt=depth).values_list('user_id', flat=True)
+    )
+    if not over_depth:
+        return
+    overflow = TimelineEntry.objects.filter(user_id__in=over_depth).annotate(
+        position=Window(
+            expression=RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('created_at').desc(), F('id').desc()]
+        )
+    ).filter(position__gt=depth).values_list('id', flat=True)
+    overflow_ids = list(overflow)
+    if overflow_ids:
+        TimelineEntry.objects.filter(id__in=overflow_ids).delete()
+
+
+def _insert_entries(post, user_ids):
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, author_id=post.author_id, created_at=post.created_at)
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True
+    )
+    trim_timelines(user_ids)
+
+
+def publish_post(post):
+    """
+    Put a newly published post in its author's timeline and queue the fan-out
+    to their followers. Saving an already published post again does nothing.
+    """
+    if TimelineEntry.objects.filter(user_id=post.author_id, post=post).exists():
+        return
+    _insert_entries(post, [post.author_id])
+    TimelineFanout.objects.get_or_create(post=post)
+
+
+def fan_out_post(post):
+    """Copy a published post into its followers' timelines and notify them."""
+    if post.status != Post.PUBLISHED or post.is_deleted:
+        return
+
+    followers = Follow.objects.filter(following_id=post.author_id)
+    create_notifications(
+        followers.values_list('follower_id', flat=True).iterator(chunk_size=FANOUT_BATCH_SIZE),
+        post.author,
+        'post',
+        target_object=post,
+        coalesce=True,
+        chunk_size=FANOUT_BATCH_SIZE
+    )
+    if is_celebrity(post.author):
+        return
+
+    follower_ids = followers.values_list('follower_id', flat=True).iterator(chunk_size=FANOUT_BATCH_SIZE)
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(follower_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            _insert_entries(post, batch)
+            batch = []
+    if batch:
+        _insert_entries(post, batch)
+
+
+def fan_out_pending(batch_size=10):
+    """
+    Claim and fan out one batch of queued posts. Returns the batch size.
+
+    Rows are claimed and deleted in a short transaction so the fan-out itself
+    holds no locks; a post whose fan-out fails is queued again.
+    """
+    with transaction.atomic():
+        fanouts = list(
+            TimelineFanout.objects.select_for_update(
+                skip_locked=True,
+                of=('self',)
+            ).select_related('post__author').order_by('created_at')[:batch_size]
+        )
+        TimelineFanout.objects.filter(pk__in=[fanout.pk for fanout in fanouts]).delete()
+    for fanout in fanouts:
+        try:
+            fan_out_post(fanout.post)
+        except Exception:
+            logger.exception("Fan-out of post %s failed, queuing it again", fanout.post_id)
+            TimelineFanout.objects.get_or_create(post=fanout.post)
+    return len(fanouts)
+
+
+def remove_post(post):
+    TimelineEntry.objects.filter(post=post).delete()
+
+
+def backfill_timeline(user, author):
+    """Add ``author``'s most recent published posts to ``user``'s timeline."""
+    if not is_celebrity(author):
+        _backfill(user, author)
+
+
+def _backfill(user, author):
+    posts = Post.objects.is_published().filter(author=author).only(
+        'id', 'author_id', 'created_at'
+    ).order_by('-created_at')[:get_timeline_depth()]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user=user, post=post, author_id=post.author_id, created_at=post.created_at)
+            for post in posts
+        ],
+        ignore_conflicts=True
+    )
+    trim_timelines([user.pk])
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild_timeline(user):
+    TimelineEntry.objects.filter(user=user).delete()
+    _backfill(user, user)
+    following = Follow.objects.filter(follower=user).select_related('following')
+    for follow in following.iterator():
+        backfill_timeline(user, follow.following)
+
+
+def timeline_filter(user):
+    """
+    A ``Q`` for the posts of ``user``'s home timeline, for combining with
+    other sources in one query: their materialized entries plus the posts
+    of followed authors that are too large to fan out.
+    """
+    celebrity_ids = Follow.objects.filter(
+        follower=user,
+        following__followers_count__gte=get_fanout_follower_limit()
+    ).values('following_id')
+    entry_post_ids = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Q(pk__in=entry_post_ids) | Q(author_id__in=celebrity_ids)
+
+
+def get_timeline_posts(user):
+    """
+    Posts for ``user``'s home timeline, newest first, annotated with the
+    ``timeline_created_at`` / ``timeline_id`` pair they are ordered by.
+
+    Usually this is a range read of the ``(user, -created_at, -id)`` index of
+    ``TimelineEntry`` joined to the posts. Only users who follow an author
+    too large to fan out need those posts merged in, which the database then
+    has to sort.
+    """
+    posts = Post.objects.is_published()
+    if not user.following_count:
+        # Users who follow nobody get every recent post instead of an empty page.
+        return _ordered_by_post(posts)
+
+    follows_celebrity = Follow.objects.filter(
+        follower=user,
+        following__followers_count__gte=get_fanout_follower_limit()
+    ).exists()
+    if follows_celebrity:
+        return _ordered_by_post(posts.filter(timeline_filter(user)))
+
+    return posts.filter(timeline_entries__user=user).annotate(
+        timeline_created_at=F('timeline_entries__created_at'),
+        timeline_id=F('timeline_entries__id')
+    ).order_by('-timeline_created_at', '-timeline_id')
+
+
+def _ordered_by_post(posts):
+    return posts.annotate(
+        timeline_created_at=F('created_at'),
+        timeline_id=F('id')
+    ).order_by('-timeline_created_at', '-timeline_id')
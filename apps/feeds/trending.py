@@ -0,0 +1,93 @@
+"""
+Precomputed trending scores.
+
+Each period keeps the top ``TRENDING_MAX_RESULTS`` posts ranked by
+engagement decayed with a half-life of a quarter of the period:
+
+    score = (reactions + comments + bookmarks + views) * 0.5 ** (age / half_life)
+
+Scores are rebuilt only by the ``compute_trending`` command (run it on a
+schedule, or with ``--interval``); requests read the stored rows as a top-K
+scan of the ``(period, -score)`` index and never recompute them.
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.blogs.models import Post
+from apps.core.response_cache import bump_resource_versions
+from .models import TrendingScore
+
+PERIODS = {
+    '1h': timedelta(hours=1),
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+DEFAULT_PERIOD = '24h'
+
+
+def get_period(value):
+    return value if value in PERIODS else DEFAULT_PERIOD
+
+
+def get_max_results():
+    return getattr(settings, 'TRENDING_MAX_RESULTS', 500)
+
+
+def decayed_score(engagement, age, half_life):
+    return engagement * 0.5 ** (age / half_life)
+
+
+def compute_trending_scores(period):
+    """Recompute and persist the top posts for ``period``. Returns the row count."""
+    now = timezone.now()
+    window = PERIODS[period]
+    half_life = window.total_seconds() / 4
+
+    candidates = Post.objects.is_published()
+    if candidates.filter(created_at__gte=now - window).exists():
+        candidates = candidates.filter(created_at__gte=now - window)
+    else:
+        # Quiet period: rank the most recent posts instead of returning nothing.
+        candidates = candidates.order_by('-created_at')[:get_max_results()]
+
+    rows = candidates.values_list(
+        'id', 'created_at', 'reaction_count', 'comment_count', 'bookmark_count', 'views_count'
+    )
+    top = heapq.nlargest(
+        get_max_results(),
+        (
+            (decayed_score(reactions + comments + bookmarks + views, (now - created_at).total_seconds(), half_life), post_id)
+            for post_id, created_at, reactions, comments, bookmarks, views in rows.iterator(chunk_size=2000)
+        )
+    )
+
+    with transaction.atomic():
+        TrendingScore.objects.filter(period=period).delete()
+        TrendingScore.objects.bulk_create([
+            TrendingScore(post_id=post_id, period=period, score=score, computed_at=now)
+            for score, post_id in top
+        ])
+
+    bump_resource_versions('trending')
+    return len(top)
+
+
+def get_trending_posts(period):
+    return Post.objects.is_published().filter(
+        trending_scores__period=get_period(period)
+    ).annotate(
+        trending_score=F('trending_scores__score')
+    ).order_by('-trending_score', '-id')
+
+
+def trending_ids_queryset(period, limit=None):
+    """Ranked post IDs for ``period`` as a queryset, usable as a subquery."""
+    return TrendingScore.objects.filter(period=period).order_by(
+        '-score', '-post_id'
+    ).values_list('post_id', flat=True)[:limit or get_max_results()]
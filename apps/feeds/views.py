@@ -1,41 +1,37 @@
-from rest_framework import generics, permissions
-from django.db.models import Q
-from django.utils import timezone
-from datetime import timedelta
+from rest_framework import permissions
 
 from apps.blogs.models import Post
-from apps.blogs.serializers import PostSerializer
-from apps.core.models import Follow
+from apps.blogs.serializers import PostCardSerializer, PostSerializer
+from apps.core.async_views import AsyncListAPIView
+from apps.core.metrics import MetricsMixin
+from apps.core.pagination import ScoreCursorPagination, TimelineCursorPagination
+from apps.core.representation import CardViewMixin
+from apps.core.response_cache import AsyncCachedResponseMixin
+from .combined import get_combined_posts
 from .throttles import FeedRateThrottle, FeedAnonRateThrottle
+from .timeline import get_timeline_posts
+from .trending import DEFAULT_PERIOD, get_trending_posts
 
 
-class PersonalizedFeedView(generics.ListAPIView):
+class PersonalizedFeedView(MetricsMixin, CardViewMixin, AsyncListAPIView):
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 10
     throttle_classes = [FeedRateThrottle]
+    pagination_class = TimelineCursorPagination
 
     def get_queryset(self):
-        user = self.request.user
-        
-        following_ids = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
-        
-        following_ids = list(following_ids) + [user.id]
-        
-        queryset = Post.objects.filter(
-            author_id__in=following_ids,
-            status='draft',
-            is_deleted=False
-        ).select_related('author', 'category').prefetch_related('tags')
-        
-        if not queryset.exists():
-            queryset = Post.objects.is_draft().select_related('author', 'category').prefetch_related('tags')
-        
-        return queryset.order_by('-created_at')
+        return get_timeline_posts(self.request.user).select_related('author', 'category').prefetch_related('tags')
 
 
-class TrendingFeedView(generics.ListAPIView):
+class TrendingFeedView(MetricsMixin, CardViewMixin, AsyncCachedResponseMixin, AsyncListAPIView):
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 18
+    pagination_class = ScoreCursorPagination
+    cache_resources = ('posts', 'trending')
     
     def get_throttles(self):
         if self.request.user.is_authenticated:
@@ -43,40 +39,16 @@ class TrendingFeedView(generics.ListAPIView):
         return [FeedAnonRateThrottle()]
 
     def get_queryset(self):
-        period = self.request.query_params.get('period', '24h')
-        
-        now = timezone.now()
-        if period == '1h':
-            threshold = now - timedelta(hours=1)
-        elif period == '7d':
-            threshold = now - timedelta(days=7)
-        elif period == '30d':
-            threshold = now - timedelta(days=30)
-        else: 
-            threshold = now - timedelta(hours=24)
-        
-        queryset = Post.objects.filter(
-            status='draft',
-            is_deleted=False,
-            created_at__gte=threshold
-        ).select_related('author', 'category').prefetch_related('tags')
-    
-        queryset = queryset.extra(
-            select={'engagement_score': 'reaction_count + comment_count + bookmark_count + views_count'}
-        ).order_by('-engagement_score', '-created_at')
-        
-        if not queryset.exists():
-            queryset = Post.objects.is_draft().select_related('author', 'category').prefetch_related('tags')
-            queryset = queryset.extra(
-                select={'engagement_score': 'reaction_count + comment_count + bookmark_count + views_count'}
-            ).order_by('-engagement_score', '-created_at')
-        
-        return queryset
+        period = self.request.query_params.get('period', DEFAULT_PERIOD)
+        return get_trending_posts(period).select_related('author', 'category').prefetch_related('tags')
 
 
-class RecentFeedView(generics.ListAPIView):
+class RecentFeedView(MetricsMixin, CardViewMixin, AsyncCachedResponseMixin, AsyncListAPIView):
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 10
+    cache_resources = ('posts',)
     
     def get_throttles(self):
         if self.request.user.is_authenticated:
@@ -84,46 +56,18 @@ class RecentFeedView(generics.ListAPIView):
         return [FeedAnonRateThrottle()]
 
     def get_queryset(self):
-        queryset = Post.objects.is_draft().select_related('author', 'category').prefetch_related('tags')
+        queryset = Post.objects.is_published().select_related('author', 'category').prefetch_related('tags')
         
         return queryset.order_by('-created_at')
 
 
-class CombinedFeedView(generics.ListAPIView):
+class CombinedFeedView(MetricsMixin, CardViewMixin, AsyncListAPIView):
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 9
     throttle_classes = [FeedRateThrottle]
 
     def get_queryset(self):
-        user = self.request.user
-        
-        following_ids = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
-        following_ids = list(following_ids) + [user.id]
-        
-        personalized_posts = Post.objects.filter(
-            author_id__in=following_ids,
-            status='published',
-            is_deleted=False
-        )
-        
-        threshold = timezone.now() - timedelta(hours=24)
-        trending_posts = Post.objects.filter(
-            status='published',
-            is_deleted=False,
-            created_at__gte=threshold
-        ).extra(
-            select={'engagement_score': 'reaction_count + comment_count + bookmark_count'}
-        ).order_by('-engagement_score')[:10]
-        
-        personalized_ids = list(personalized_posts.values_list('id', flat=True))
-        trending_ids = list(trending_posts.values_list('id', flat=True))
-
-        if personalized_ids or trending_ids:
-            all_posts = Post.objects.is_draft().filter(
-                Q(id__in=personalized_ids) | Q(id__in=trending_ids),
-            ).select_related('author', 'category').prefetch_related('tags')
-        else:
-            all_posts = Post.objects.is_draft().select_related('author', 'category').prefetch_related('tags')
-        
-        return all_posts.order_by('-created_at')
-
+        posts = get_combined_posts(self.request.user)
+        return posts.select_related('author', 'category').prefetch_related('tags').order_by('-created_at', '-id')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationOutbox, NotificationPushBatch
 
 
 @admin.register(Notification)
@@ -9,3 +9,17 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ['user__email', 'actor__email']
     readonly_fields = ['created_at']
 
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'notification', 'status', 'attempts', 'available_at', 'processed_at']
+    list_filter = ['status', 'send_push', 'send_email']
+    readonly_fields = ['created_at', 'processed_at']
+
+
+@admin.register(NotificationPushBatch)
+class NotificationPushBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'title', 'status', 'attempts', 'available_at', 'processed_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'processed_at']
@@ -0,0 +1,63 @@
+"""
+Push delivery backends, selected with ``NOTIFICATION_PUSH_BACKEND``.
+
+``FirebasePushBackend`` sends through FCM; ``LocMemPushBackend`` keeps the
+messages in memory (``backends.outbox``) for tests and local development,
+like Django's locmem email backend.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+outbox = []
+
+
+class PushResult:
+    def __init__(self, success_count=0, failure_count=0, invalid_tokens=None):
+        self.success_count = success_count
+        self.failure_count = failure_count
+        self.invalid_tokens = invalid_tokens or []
+
+
+class BasePushBackend:
+    def send_multicast(self, tokens, title, body, data):
+        """Send one message to every token and return a PushResult."""
+        raise NotImplementedError
+
+
+class FirebasePushBackend(BasePushBackend):
+    def send_multicast(self, tokens, title, body, data):
+        from firebase_admin import messaging
+
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(title=title, body=body),
+            data=data,
+            tokens=list(tokens),
+        )
+        response = messaging.send_each_for_multicast(message)
+
+        invalid_tokens = [
+            token
+            for token, resp in zip(tokens, response.responses)
+            if not resp.success and isinstance(resp.exception, messaging.UnregisteredError)
+        ]
+        return PushResult(response.success_count, response.failure_count, invalid_tokens)
+
+
+class LocMemPushBackend(BasePushBackend):
+    def send_multicast(self, tokens, title, body, data):
+        outbox.append({
+            'tokens': list(tokens),
+            'title': title,
+            'body': body,
+            'data': data,
+        })
+        return PushResult(success_count=len(tokens))
+
+
+def get_push_backend():
+    backend = getattr(
+        settings,
+        'NOTIFICATION_PUSH_BACKEND',
+        'apps.notifications.backends.FirebasePushBackend'
+    )
+    return import_string(backend)()
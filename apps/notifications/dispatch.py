@@ -0,0 +1,215 @@
+"""
+Outbox-based delivery of push and email notifications.
+
+``enqueue_notification`` (and ``PushBatcher`` for batches of notifications)
+is all a request does; ``dispatch_pending`` and ``dispatch_push_batches``
+are run by the ``dispatch_notifications`` worker. They claim due rows with
+``SELECT ... FOR UPDATE SKIP LOCKED`` so several workers can drain the outbox
+concurrently, leasing them for ``CLAIM_TIMEOUT`` (their ``available_at`` is
+pushed past the send) in a short transaction. The sends happen outside any
+transaction, and a second short one records ``push_sent`` / ``email_sent``.
+Rows of a worker that dies mid-send become due again once the lease ends.
+Failed deliveries are retried with exponential backoff up to
+``MAX_ATTEMPTS``.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .backends import get_push_backend
+from .models import Notification, NotificationOutbox, NotificationPushBatch, OutboxEntry, PushNotificationToken
+from .services import deliver_push_notification, send_email_notification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+PUSH_BATCH_SIZE = 500
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def enqueue_notification(notification, send_push=True, send_email=False):
+    if not (send_push or send_email):
+        return None
+    return NotificationOutbox.objects.create(
+        notification=notification,
+        send_push=send_push,
+        send_email=send_email
+    )
+
+
+def _deliver(entry):
+    notification = entry.notification
+    errors = []
+
+    if entry.send_push and not notification.push_sent:
+        try:
+            notification.push_sent = deliver_push_notification(notification)
+        except Exception as e:
+            errors.append(f"push: {e}")
+
+    if entry.send_email and not notification.email_sent:
+        notification.email_sent = send_email_notification(notification)
+        if not notification.email_sent:
+            errors.append("email: delivery failed")
+
+    _record_attempt(entry, errors)
+
+
+def _record_attempt(entry, errors):
+    now = timezone.now()
+    entry.attempts += 1
+    if not errors:
+        entry.status = NotificationOutbox.SENT
+        entry.processed_at = now
+        entry.last_error = ''
+    elif entry.attempts >= MAX_ATTEMPTS:
+        entry.status = NotificationOutbox.FAILED
+        entry.processed_at = now
+        entry.last_error = '; '.join(errors)
+    else:
+        entry.available_at = now + timedelta(minutes=2 ** entry.attempts)
+        entry.last_error = '; '.join(errors)
+
+
+class PushBatcher:
+    """
+    Collect the device tokens of notifications that share one message and
+    queue a ``NotificationPushBatch`` for every ``size`` tokens. Only one
+    partial batch is held in memory; call ``flush`` once done.
+    """
+
+    def __init__(self, title, body, data, size=PUSH_BATCH_SIZE):
+        self.title = title
+        self.body = body
+        self.data = data
+        self.size = size
+        self.tokens = []
+        self.notification_ids = []
+        self.queued = 0
+
+    def add(self, notifications):
+        tokens = defaultdict(list)
+        for user_id, token in PushNotificationToken.objects.filter(
+            user_id__in=[notification.user_id for notification in notifications],
+            is_active=True
+        ).values_list('user_id', 'token'):
+            tokens[user_id].append(token)
+
+        batches = []
+        for notification in notifications:
+            user_tokens = tokens.get(notification.user_id)
+            if not user_tokens:
+                continue
+            self.tokens.extend(user_tokens)
+            self.notification_ids.append(notification.pk)
+            if len(self.tokens) >= self.size:
+                batches.append(self._take())
+        NotificationPushBatch.objects.bulk_create(batches)
+        self.queued += len(batches)
+
+    def flush(self):
+        if self.tokens:
+            self._take().save()
+            self.queued += 1
+
+    def _take(self):
+        batch = NotificationPushBatch(
+            title=self.title,
+            body=self.body,
+            data=self.data,
+            tokens=self.tokens,
+            notification_ids=self.notification_ids
+        )
+        self.tokens, self.notification_ids = [], []
+        return batch
+
+
+def _claim(queryset, batch_size):
+    """Lease up to ``batch_size`` due rows of ``queryset`` to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            queryset.select_for_update(
+                skip_locked=True,
+                of=('self',)
+            ).filter(
+                status=OutboxEntry.PENDING,
+                available_at__lte=now
+            ).order_by('available_at')[:batch_size]
+        )
+        queryset.model.objects.filter(
+            pk__in=[entry.pk for entry in entries]
+        ).update(available_at=now + CLAIM_TIMEOUT)
+    return entries
+
+
+def dispatch_pending(batch_size=100):
+    """Claim and deliver one batch of due outbox rows. Returns the batch size."""
+    entries = _claim(
+        NotificationOutbox.objects.select_related(
+            'notification__user',
+            'notification__actor',
+            'notification__content_type'
+        ),
+        batch_size
+    )
+    if not entries:
+        return 0
+
+    for entry in entries:
+        _deliver(entry)
+
+    with transaction.atomic():
+        Notification.objects.bulk_update(
+            [entry.notification for entry in entries],
+            ['push_sent', 'email_sent']
+        )
+        NotificationOutbox.objects.bulk_update(
+            entries,
+            ['status', 'attempts', 'last_error', 'available_at', 'processed_at']
+        )
+
+    failed = sum(1 for entry in entries if entry.status != NotificationOutbox.SENT)
+    if failed:
+        logger.warning(f"{failed} of {len(entries)} notification deliveries failed")
+    return len(entries)
+
+
+def dispatch_push_batches(batch_size=10):
+    """Claim and send due multicast push batches. Returns the number claimed."""
+    batches = _claim(NotificationPushBatch.objects.all(), batch_size)
+    if not batches:
+        return 0
+
+    backend = get_push_backend()
+    sent_notification_ids = []
+    invalid_tokens = []
+    for batch in batches:
+        errors = []
+        try:
+            response = backend.send_multicast(batch.tokens, batch.title, batch.body, batch.data)
+        except Exception as e:
+            errors.append(f"push: {e}")
+        else:
+            invalid_tokens.extend(response.invalid_tokens)
+            if response.success_count:
+                sent_notification_ids.extend(batch.notification_ids)
+        _record_attempt(batch, errors)
+
+    with transaction.atomic():
+        if invalid_tokens:
+            PushNotificationToken.objects.filter(token__in=invalid_tokens).update(is_active=False)
+        if sent_notification_ids:
+            Notification.objects.filter(pk__in=sent_notification_ids).update(push_sent=True)
+        NotificationPushBatch.objects.bulk_update(
+            batches,
+            ['status', 'attempts', 'last_error', 'available_at', 'processed_at']
+        )
+
+    failed = sum(1 for batch in batches if batch.status != NotificationPushBatch.SENT)
+    if failed:
+        logger.warning(f"{failed} of {len(batches)} push batches failed")
+    return len(batches)
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.dispatch import dispatch_pending, dispatch_push_batches
+
+
+class Command(BaseCommand):
+    help = "Deliver queued push and email notifications and multicast push batches from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help="Number of outbox rows claimed per batch."
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help="Keep running as a worker, polling every N seconds when idle."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+        while True:
+            dispatched = 0
+            while True:
+                count = dispatch_pending(batch_size)
+                dispatched += count
+                if count < batch_size:
+                    break
+            batches = 0
+            while True:
+                count = dispatch_push_batches(batch_size)
+                batches += count
+                if count < batch_size:
+                    break
+            if dispatched:
+                self.stdout.write(f"Dispatched {dispatched} notifications")
+            if batches:
+                self.stdout.write(f"Dispatched {batches} push batches")
+            if not interval:
+                break
+            time.sleep(interval)
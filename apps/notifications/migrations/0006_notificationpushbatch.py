@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-17 13:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationPushBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the worker may (re)try this delivery')),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('data', models.JSONField(default=dict)),
+                ('tokens', models.JSONField(default=list)),
+                ('notification_ids', models.JSONField(default=list, help_text='Notifications marked push_sent once the batch is delivered')),
+            ],
+            options={
+                'verbose_name_plural': 'Notification push batches',
+                'ordering': ['available_at'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['status', 'available_at'], name='notificatio_status_3d144d_idx')],
+            },
+        ),
+    ]
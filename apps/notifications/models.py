@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
@@ -13,6 +14,7 @@ class Notification(models.Model):
         ('reply', 'Reply'),
         ('reaction', 'Reaction'),
         ('bookmark', 'Bookmark'),
+        ('post', 'New Post'),
         ('sign_up', 'Sign Up'),
         ('log_in', 'Log In'),
     ]
@@ -51,7 +53,7 @@ class Notification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'is_read']),
-            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', '-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -93,3 +95,77 @@ class PushNotificationToken(models.Model):
 
     def __str__(self):
         return f"{self.user.email} - {self.device_type}"
+
+
+class OutboxEntry(models.Model):
+    """Delivery state shared by the tables the ``dispatch_notifications`` worker drains."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the worker may (re)try this delivery"
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['available_at']
+
+
+class NotificationOutbox(OutboxEntry):
+    """
+    Pending push/email delivery for a notification. Request handlers only
+    insert a row; the ``dispatch_notifications`` worker claims pending rows
+    in batches, sends them and records the result on the notification.
+    """
+    notification = models.OneToOneField(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='outbox'
+    )
+    send_push = models.BooleanField(default=True)
+    send_email = models.BooleanField(default=False)
+
+    class Meta(OutboxEntry.Meta):
+        verbose_name_plural = 'Notification outbox'
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.notification} ({self.status})"
+
+
+class NotificationPushBatch(OutboxEntry):
+    """
+    One multicast push queued by ``create_notifications``: the same title and
+    body for up to ``PUSH_BATCH_SIZE`` device tokens of the notified users.
+    """
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    data = models.JSONField(default=dict)
+    tokens = models.JSONField(default=list)
+    notification_ids = models.JSONField(
+        default=list,
+        help_text="Notifications marked push_sent once the batch is delivered"
+    )
+
+    class Meta(OutboxEntry.Meta):
+        verbose_name_plural = 'Notification push batches'
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} to {len(self.tokens)} devices ({self.status})"
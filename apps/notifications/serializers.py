@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Notification, PushNotificationToken
-from apps.core.serializers import UserSummarySerializer
+from apps.core.serializers import UserSummarySerializer, ViewerStateListSerializer
+from apps.core.utils import aprime_following_state, prime_following_state
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -33,6 +34,19 @@ class NotificationSerializer(serializers.ModelSerializer):
             'push_sent',
             'created_at'
         ]
+        list_serializer_class = ViewerStateListSerializer
+
+    def prime_viewer_state(self, notifications):
+        prime_following_state(
+            self.context,
+            [user for notification in notifications for user in (notification.user, notification.actor)]
+        )
+
+    async def aprime_viewer_state(self, notifications):
+        await aprime_following_state(
+            self.context,
+            [user for notification in notifications for user in (notification.user, notification.actor)]
+        )
 
 
 class PushNotificationTokenSerializer(serializers.ModelSerializer):
@@ -2,9 +2,10 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
-from firebase_admin import messaging
 import logging
 
+from .backends import get_push_backend
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,6 +44,7 @@ def get_notification_subject(notification):
         'reply': f"{actor_name} replied to your comment",
         'reaction': f"{actor_name} reacted to your post",
         'bookmark': f"{actor_name} bookmarked your post",
+        'post': f"{actor_name} published a new post",
         'sign_up': "Welcome to Swirl!",
         'log_in': "Welcome back to Swirl!",
     }
@@ -89,54 +91,51 @@ def get_notification_url(notification):
 
 def send_push_notification(notification):
     try:
-        from apps.notifications.models import PushNotificationToken
-        
-        tokens = PushNotificationToken.objects.filter(
-            user=notification.user,
-            is_active=True
-        ).values_list('token', flat=True)
-        
-        if not tokens:
-            logger.info(f"No FCM tokens found for user {notification.user.email}")
-            return False
-        
-        title = get_notification_subject(notification)
-        body = get_notification_body(notification)
-        
-        message = messaging.MulticastMessage(
-            notification=messaging.Notification(
-                title=title,
-                body=body,
-            ),
-            data={
-                'notification_id': str(notification.id),
-                'action_type': notification.action_type,
-                'type': 'notification',
-            },
-            tokens=list(tokens),
-        )
-        
-        response = messaging.send_multicast(message)
-        
-        if response.failure_count > 0:
-            logger.warning(f"Failed to send {response.failure_count} push notifications")
-            for idx, resp in enumerate(response.responses):
-                if not resp.success:
-                    if resp.exception.code == 'registration-token-not-registered':
-                        token_obj = PushNotificationToken.objects.filter(
-                            token=tokens[idx]
-                        ).first()
-                        if token_obj:
-                            token_obj.is_active = False
-                            token_obj.save()
-        
-        logger.info(f"Push notification sent to {response.success_count} devices")
-        return response.success_count > 0
+        return deliver_push_notification(notification)
     except Exception as e:
         logger.error(f"Error sending push notification: {e}")
         return False
 
 
+def deliver_push_notification(notification):
+    """
+    Send ``notification`` to every active device of its user through the
+    configured push backend. Returns False when the user has no devices and
+    lets backend errors propagate so callers can retry.
+    """
+    from apps.notifications.models import PushNotificationToken
+
+    tokens = list(PushNotificationToken.objects.filter(
+        user=notification.user,
+        is_active=True
+    ).values_list('token', flat=True))
+
+    if not tokens:
+        logger.info(f"No FCM tokens found for user {notification.user.email}")
+        return False
+
+    response = get_push_backend().send_multicast(
+        tokens,
+        title=get_notification_subject(notification),
+        body=get_notification_body(notification),
+        data={
+            'notification_id': str(notification.id),
+            'action_type': notification.action_type,
+            'type': 'notification',
+        },
+    )
+
+    if response.failure_count > 0:
+        logger.warning(f"Failed to send {response.failure_count} push notifications")
+    if response.invalid_tokens:
+        PushNotificationToken.objects.filter(
+            token__in=response.invalid_tokens
+        ).update(is_active=False)
+
+    logger.info(f"Push notification sent to {response.success_count} devices")
+    return response.success_count > 0
+
+
 def get_notification_body(notification):
     actor_name = notification.actor.get_full_name() or notification.actor.email
     
@@ -146,6 +145,7 @@ def get_notification_body(notification):
         'reply': f"{actor_name} replied to your comment",
         'reaction': f"{actor_name} reacted to your post",
         'bookmark': f"{actor_name} bookmarked your post",
+        'post': f"{actor_name} published a new post",
         'sign_up': "Welcome to Swirl! Get started by exploring posts.",
         'log_in': "Welcome back! Check out what's new.",
     }
@@ -1,4 +1,138 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
+from apps.core.models import User
+from . import backends, dispatch
+from .backends import BasePushBackend
+from .models import Notification, NotificationOutbox, NotificationPushBatch, PushNotificationToken
+from .utils import create_notification, create_notifications
+
+
+class FailingPushBackend(BasePushBackend):
+    def send_multicast(self, tokens, title, body, data):
+        raise ConnectionError("FCM unavailable")
+
+
+@override_settings(NOTIFICATION_PUSH_BACKEND='apps.notifications.backends.LocMemPushBackend')
+class OutboxDispatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.actor = User.objects.create_user(email='actor@example.com', password='pw', first_name='Ada')
+        cls.user = User.objects.create_user(email='user@example.com', password='pw')
+        PushNotificationToken.objects.create(user=cls.user, token='device-1')
+
+    def setUp(self):
+        backends.outbox.clear()
+
+    def notify(self, **kwargs):
+        notification = create_notification(self.user, self.actor, 'follow', **kwargs)
+        return notification, notification.outbox
+
+    def test_requests_only_queue_the_delivery(self):
+        notification, entry = self.notify(send_email=True)
+        self.assertEqual((entry.status, entry.send_push, entry.send_email), (NotificationOutbox.PENDING, True, True))
+        self.assertEqual((backends.outbox, mail.outbox), ([], []))
+        self.assertFalse(notification.push_sent or notification.email_sent)
+
+    def test_worker_sends_and_records_the_delivery(self):
+        notification, entry = self.notify(send_email=True)
+        self.assertEqual(dispatch.dispatch_pending(), 1)
+
+        self.assertEqual([message['tokens'] for message in backends.outbox], [['device-1']])
+        self.assertEqual([message.to for message in mail.outbox], [['user@example.com']])
+        notification.refresh_from_db()
+        entry.refresh_from_db()
+        self.assertTrue(notification.push_sent and notification.email_sent)
+        self.assertEqual((entry.status, entry.attempts, entry.last_error), (NotificationOutbox.SENT, 1, ''))
+        self.assertEqual(dispatch.dispatch_pending(), 0)
+
+    def test_claimed_rows_are_leased_to_one_worker(self):
+        _, entry = self.notify()
+        claimed = dispatch._claim(NotificationOutbox.objects.all(), 10)
+        self.assertEqual([row.pk for row in claimed], [entry.pk])
+        # A worker that dies after claiming leaves the rows to the lease.
+        self.assertEqual(dispatch.dispatch_pending(), 0)
+        entry.refresh_from_db()
+        self.assertGreater(entry.available_at, timezone.now() + dispatch.CLAIM_TIMEOUT - timedelta(seconds=5))
+
+        NotificationOutbox.objects.filter(pk=entry.pk).update(available_at=timezone.now())
+        self.assertEqual(dispatch.dispatch_pending(), 1)
+        self.assertEqual(len(backends.outbox), 1)
+
+    @override_settings(NOTIFICATION_PUSH_BACKEND='apps.notifications.tests.FailingPushBackend')
+    def test_failed_deliveries_back_off_then_give_up(self):
+        notification, entry = self.notify()
+        for attempt in range(1, dispatch.MAX_ATTEMPTS + 1):
+            started = timezone.now()
+            self.assertEqual(dispatch.dispatch_pending(), 1)
+            entry.refresh_from_db()
+            self.assertEqual(entry.attempts, attempt)
+            self.assertIn('FCM unavailable', entry.last_error)
+            if attempt < dispatch.MAX_ATTEMPTS:
+                self.assertEqual(entry.status, NotificationOutbox.PENDING)
+                self.assertGreaterEqual(entry.available_at, started + timedelta(minutes=2 ** attempt))
+                # Not due again until the backoff has passed.
+                self.assertEqual(dispatch.dispatch_pending(), 0)
+                NotificationOutbox.objects.filter(pk=entry.pk).update(available_at=timezone.now())
+
+        self.assertEqual(entry.status, NotificationOutbox.FAILED)
+        self.assertIsNotNone(entry.processed_at)
+        notification.refresh_from_db()
+        self.assertFalse(notification.push_sent)
+        self.assertEqual(dispatch.dispatch_pending(), 0)
+
+
+class CreateNotificationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.actor = User.objects.create_user(email='actor@example.com', password='pw')
+        cls.users = User.objects.bulk_create(
+            User(email=f'reader-{i}@example.com') for i in range(1100)
+        )
+        PushNotificationToken.objects.bulk_create(
+            PushNotificationToken(user=user, token=f'device-{user.pk}') for user in cls.users
+        )
+
+    def readers(self):
+        return User.objects.filter(email__startswith='reader-')
+
+    def test_the_actor_and_unread_duplicates_are_skipped(self):
+        first, second = self.users[:2]
+        recipients = [self.actor.pk, first.pk, second.pk]
+        self.assertEqual(create_notifications(recipients, self.actor, 'follow', coalesce=True), 2)
+        self.assertEqual(create_notifications(recipients, self.actor, 'follow', coalesce=True), 0)
+
+        Notification.objects.filter(user=first).update(is_read=True)
+        self.assertEqual(create_notifications(recipients, self.actor, 'follow', coalesce=True), 1)
+        self.assertFalse(Notification.objects.filter(user=self.actor).exists())
+        self.assertEqual(create_notifications(recipients, self.actor, 'follow'), 2)
+
+    def test_push_is_queued_as_one_multicast_per_batch_of_tokens(self):
+        created = create_notifications(self.readers(), self.actor, 'follow', chunk_size=300)
+
+        self.assertEqual(created, 1100)
+        batches = NotificationPushBatch.objects.order_by('pk')
+        self.assertEqual([len(batch.tokens) for batch in batches], [500, 500, 100])
+        notified = {pk for batch in batches for pk in batch.notification_ids}
+        self.assertEqual(notified, set(Notification.objects.values_list('pk', flat=True)))
+        # Push goes out as batches, so no per-notification outbox rows.
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_recipients_are_read_one_chunk_at_a_time(self):
+        chunk_size = 100
+
+        def recipients():
+            for i, pk in enumerate(self.readers().values_list('pk', flat=True).iterator()):
+                if i % chunk_size == 0:
+                    # Every earlier chunk is written before the next is read.
+                    self.assertEqual(Notification.objects.count(), i)
+                yield pk
+
+        self.assertEqual(
+            create_notifications(recipients(), self.actor, 'follow', send_push=False, chunk_size=chunk_size),
+            1100
+        )
+        self.assertFalse(NotificationPushBatch.objects.exists())
@@ -1,38 +1,117 @@
+import logging
+from itertools import islice
+
 from django.contrib.contenttypes.models import ContentType
-from .models import Notification
-from .services import send_email_notification, send_push_notification
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .models import Notification, NotificationOutbox
+from .dispatch import PushBatcher, enqueue_notification
+from .services import get_notification_body, get_notification_subject
+
+logger = logging.getLogger(__name__)
 
 
-def create_notification(user, actor, action_type, target_object=None, send_push=True):
+def create_notification(user, actor, action_type, target_object=None, send_push=True, send_email=False):
+    """
+    Store a notification and queue its push/email delivery. Delivery itself
+    happens in the ``dispatch_notifications`` worker, off the request path.
+    """
     if user == actor and target_object is not None:
         return None
     
     try:
-        if target_object is None:
-            notification = Notification.objects.create(
-                user=user,
-                actor=actor,
-                action_type=action_type,
-                content_type=None,
-                object_id=None
-            )
-        else:
-            content_type = ContentType.objects.get_for_model(target_object)
+        content_type = ContentType.objects.get_for_model(target_object) if target_object is not None else None
+        # The notification and its outbox row are written together or not at all.
+        with transaction.atomic():
             notification = Notification.objects.create(
                 user=user,
                 actor=actor,
                 action_type=action_type,
                 content_type=content_type,
-                object_id=target_object.pk
+                object_id=target_object.pk if target_object is not None else None
             )
-        
-        if send_push:
-            push_sent = send_push_notification(notification)
-            if push_sent:
-                notification.push_sent = True
-                notification.save(update_fields=['push_sent'])
-        
+            enqueue_notification(notification, send_push=send_push, send_email=send_email)
         return notification
-    except Exception as e:
-        print(f"Error creating notification: {e}")
+    except Exception:
+        logger.exception("Error creating %s notification for user %s", action_type, user.pk)
         return None
+
+
+def create_notifications(recipients, actor, action_type, target_object=None, send_push=True,
+                         send_email=False, coalesce=False, chunk_size=1000):
+    """
+    Fan one notification out to many ``recipients`` (users or user ids).
+
+    Notifications are bulk-created ``chunk_size`` at a time, each chunk in its
+    own transaction, so a fan-out to a large audience holds neither every row
+    nor one long transaction at once. The actor never notifies themselves.
+    With ``coalesce``, recipients that already have the same unread
+    notification are skipped. Push delivery is queued as multicast batches of
+    up to ``PUSH_BATCH_SIZE`` device tokens; email still goes through the
+    per-notification outbox. Returns the number of notifications created.
+    """
+    if isinstance(recipients, QuerySet):
+        recipients = recipients.values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+    recipients = iter(recipients)
+
+    content_type = ContentType.objects.get_for_model(target_object) if target_object is not None else None
+    object_id = target_object.pk if target_object is not None else None
+    template = Notification(
+        actor=actor,
+        action_type=action_type,
+        content_type=content_type,
+        object_id=object_id
+    )
+    batcher = PushBatcher(
+        get_notification_subject(template),
+        get_notification_body(template),
+        {
+            'action_type': action_type,
+            'object_id': str(object_id or ''),
+            'type': 'notification',
+        }
+    ) if send_push else None
+
+    created = 0
+    while True:
+        chunk = list(islice(recipients, chunk_size))
+        if not chunk:
+            break
+        user_ids = {getattr(recipient, 'pk', recipient) for recipient in chunk}
+        user_ids.discard(actor.pk)
+        if coalesce and user_ids:
+            user_ids -= set(Notification.objects.filter(
+                user_id__in=user_ids,
+                actor=actor,
+                action_type=action_type,
+                content_type=content_type,
+                object_id=object_id,
+                is_read=False
+            ).values_list('user_id', flat=True))
+        if not user_ids:
+            continue
+
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    user_id=user_id,
+                    actor=actor,
+                    action_type=action_type,
+                    content_type=content_type,
+                    object_id=object_id
+                )
+                for user_id in sorted(user_ids)
+            ])
+            if send_email:
+                NotificationOutbox.objects.bulk_create([
+                    NotificationOutbox(notification=notification, send_push=False, send_email=True)
+                    for notification in notifications
+                ])
+            if batcher:
+                batcher.add(notifications)
+        created += len(notifications)
+
+    if batcher:
+        batcher.flush()
+    return created
@@ -3,20 +3,24 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 
+from apps.core.async_views import AsyncListAPIView
+from apps.core.metrics import MetricsMixin
+
 from .models import Notification, PushNotificationToken
 from .serializers import NotificationSerializer, PushNotificationTokenSerializer
 from .throttles import NotificationReadRateThrottle, NotificationMarkReadRateThrottle
 
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(MetricsMixin, AsyncListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 7
     throttle_classes = [NotificationReadRateThrottle]
 
     def get_queryset(self):
         return Notification.objects.filter(
             user=self.request.user
-        ).select_related('user', 'actor').order_by('-created_at')
+        ).select_related('user', 'actor', 'content_type').order_by('-created_at')
 
 
 class MarkNotificationReadView(APIView):
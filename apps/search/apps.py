@@ -5,3 +5,6 @@ class SearchConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.search'
 
+    def ready(self):
+        """Keep post search documents in sync with posts, tags and categories."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,283 @@
+"""
+Type-ahead over user names, tag names and category names.
+
+Every user, tag and category that can be suggested has an
+``AutocompleteEntry`` holding its label and a normalized form (accents
+folded, lower-cased, punctuation dropped), and two n-gram indexes over it:
+
+- ``AutocompletePrefix`` holds the edge n-grams of the label, i.e. its
+  prefixes from every word start. Looking a query up there is an index
+  seek that reads the best ``limit`` entries in weight order (followers
+  for users, posts for tags and categories), however many labels share
+  the prefix.
+- Trigrams, as in ``pg_trgm``, catch typos when no label has the query as
+  a prefix. PostgreSQL matches them with a ``gin_trgm_ops`` index and the
+  ``<%`` (word similarity) operator. Elsewhere the candidates come from the
+  prefix index (the best labels sharing the first letters of a query word)
+  and are ranked by trigram similarity in Python, which keeps the lookup
+  bounded however common those letters are, at the cost of missing typos
+  in the first letters.
+"""
+import hashlib
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, Count, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from apps.blogs.models import Category, Tag
+from apps.core.models import User
+from .models import AutocompleteEntry, AutocompletePrefix
+
+KINDS = (AutocompleteEntry.USER, AutocompleteEntry.TAG, AutocompleteEntry.CATEGORY)
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_LENGTH = 64
+MAX_PREFIX_LENGTH = AutocompletePrefix._meta.get_field('prefix').max_length
+# Typos are looked for only in queries this long that match no prefix.
+MIN_FUZZY_LENGTH = 4
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Share of the query's trigrams a label must contain (pg_trgm's default
+# word_similarity_threshold).
+SIMILARITY_THRESHOLD = 0.6
+# Rows read per result wanted for queries longer than MAX_PREFIX_LENGTH,
+# which the prefix index alone cannot tell apart.
+CANDIDATES_PER_RESULT = 8
+# Without pg_trgm, typo candidates are the FUZZY_CANDIDATES heaviest labels
+# sharing the first FUZZY_ANCHOR_LENGTH letters of one of the query's
+# FUZZY_ANCHORS longest words.
+FUZZY_ANCHOR_LENGTH = 3
+FUZZY_ANCHORS = 2
+FUZZY_CANDIDATES = 200
+REBUILD_CHUNK_SIZE = 1000
+
+NON_WORD = re.compile(r'[\W_]+')
+WORD_START = re.compile(r'\b\w')
+ENTRY_FIELDS = ['label', 'normalized', 'slug', 'image_url', 'weight', 'indexed_at']
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return ' '.join(word for word in NON_WORD.split(text) if word)
+
+
+def prefixes(normalized):
+    """The prefixes of ``normalized`` from each word start, as long as a lookup may be."""
+    found = set()
+    for match in WORD_START.finditer(normalized):
+        rest = normalized[match.start():match.start() + MAX_PREFIX_LENGTH]
+        found.update(
+            rest[:length] for length in range(MIN_QUERY_LENGTH, len(rest) + 1)
+            if rest[length - 1] != ' '
+        )
+    return found
+
+
+def trigrams(normalized, prefix=False):
+    """
+    The trigrams of ``normalized``, each word padded like ``pg_trgm`` does
+    (two spaces before, one after). With ``prefix`` the last word is left
+    open, so "smi" matches "smith".
+    """
+    words = normalized.split()
+    grams = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if prefix and i == len(words) - 1 else f"  {word} "
+        grams.update(padded[start:start + 3] for start in range(len(padded) - 2))
+    return grams
+
+
+def uses_pg_trgm():
+    return connection.vendor == 'postgresql'
+
+
+def _entry(kind, obj, label, weight, slug='', image_url=None):
+    normalized = normalize(label)[:255]
+    if not normalized:
+        return None
+    return AutocompleteEntry(
+        kind=kind,
+        object_id=obj.pk,
+        label=label[:255],
+        normalized=normalized,
+        slug=slug,
+        image_url=image_url,
+        weight=weight or 0,
+    )
+
+
+def user_entry(user):
+    if not user.is_active:
+        return None
+    label = ' '.join(filter(None, [user.first_name, user.last_name]))
+    return _entry(AutocompleteEntry.USER, user, label, user.followers_count, image_url=user.profile_pic_url)
+
+
+def tag_entry(tag):
+    return _entry(AutocompleteEntry.TAG, tag, tag.name, getattr(tag, 'post_total', 0), slug=tag.slug)
+
+
+def category_entry(category):
+    return _entry(AutocompleteEntry.CATEGORY, category, category.name, category.posts_count, slug=category.slug)
+
+
+BUILDERS = {
+    AutocompleteEntry.USER: user_entry,
+    AutocompleteEntry.TAG: tag_entry,
+    AutocompleteEntry.CATEGORY: category_entry,
+}
+
+SOURCES = {
+    AutocompleteEntry.USER: lambda: User.objects.filter(is_active=True).only(
+        'first_name', 'last_name', 'profile_pic_url', 'followers_count', 'is_active'
+    ),
+    AutocompleteEntry.TAG: lambda: Tag.objects.annotate(post_total=Count('posts')),
+    AutocompleteEntry.CATEGORY: lambda: Category.objects.all(),
+}
+
+
+def index_objects(kind, objects):
+    """
+    Add or refresh the entries of ``objects`` (users, tags or categories, as
+    ``kind`` says) and drop those that should no longer be suggested.
+    Returns the number of entries written.
+    """
+    build = BUILDERS[kind]
+    now = timezone.now()
+    entries, dropped = [], []
+    for obj in objects:
+        entry = build(obj)
+        if entry is None:
+            dropped.append(obj.pk)
+        else:
+            entry.indexed_at = now
+            entries.append(entry)
+    if dropped:
+        remove_objects(kind, dropped)
+    if not entries:
+        return 0
+
+    AutocompleteEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=ENTRY_FIELDS
+    )
+    ids = dict(
+        AutocompleteEntry.objects.filter(kind=kind, object_id__in=[entry.object_id for entry in entries])
+        .values_list('object_id', 'pk')
+    )
+    AutocompletePrefix.objects.filter(entry_id__in=ids.values()).delete()
+    AutocompletePrefix.objects.bulk_create([
+        AutocompletePrefix(prefix=prefix, entry_id=ids[entry.object_id], kind=kind, weight=entry.weight)
+        for entry in entries
+        for prefix in prefixes(entry.normalized)
+    ], batch_size=REBUILD_CHUNK_SIZE)
+    return len(entries)
+
+
+def reindex_objects(kind, object_ids):
+    """Re-read the ``kind`` objects with ``object_ids`` and refresh their entries."""
+    objects = list(SOURCES[kind]().filter(pk__in=object_ids))
+    index_objects(kind, objects)
+    missing = set(object_ids) - {obj.pk for obj in objects}
+    if missing:
+        remove_objects(kind, missing)
+
+
+def remove_objects(kind, object_ids):
+    AutocompleteEntry.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def rebuild_autocomplete_index(kinds=None, chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Re-index every user, tag and category (or only ``kinds``), streaming
+    them in chunks, then drop the entries of objects that are gone. Also
+    refreshes the weights, which are not updated as counters change.
+    Returns ``{kind: entries}``.
+    """
+    counts = {}
+    for kind in kinds or KINDS:
+        started = timezone.now()
+        counts[kind] = 0
+        chunk = []
+        for obj in SOURCES[kind]().order_by('pk').iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                counts[kind] += index_objects(kind, chunk)
+                chunk = []
+        counts[kind] += index_objects(kind, chunk)
+        AutocompleteEntry.objects.filter(kind=kind, indexed_at__lt=started).delete()
+    return counts
+
+
+def autocomplete_cache_key(query, kinds, limit):
+    """Queries that normalize alike ("Jo", " jo!") share one cache entry."""
+    key = f"{normalize(query[:MAX_QUERY_LENGTH])}|{','.join(sorted(kinds))}|{limit}"
+    return f"autocomplete:{hashlib.md5(key.encode()).hexdigest()}"
+
+
+def autocomplete(query, kinds=KINDS, limit=DEFAULT_LIMIT):
+    """
+    The best ``limit`` entries of ``kinds`` for ``query``: labels with a word
+    starting with the query, or failing that labels similar to it.
+    """
+    normalized = normalize(query[:MAX_QUERY_LENGTH])
+    if len(normalized) < MIN_QUERY_LENGTH or not kinds:
+        return []
+    entries = _prefix_matches(normalized, kinds, limit)
+    if not entries and len(normalized) >= MIN_FUZZY_LENGTH:
+        if uses_pg_trgm():
+            entries = _pg_trgm_matches(normalized, kinds, limit)
+        else:
+            entries = _anchored_similar_matches(normalized, kinds, limit)
+    return entries
+
+
+def _prefix_rows(prefix, kinds):
+    rows = AutocompletePrefix.objects.filter(prefix=prefix)
+    if set(kinds) != set(KINDS):
+        rows = rows.filter(kind__in=kinds)
+    # Read in index order, so only the rows returned are visited.
+    return rows.select_related('entry').order_by('-weight', '-entry_id')
+
+
+def _prefix_matches(normalized, kinds, limit):
+    prefix = normalized[:MAX_PREFIX_LENGTH]
+    if prefix == normalized:
+        return [row.entry for row in _prefix_rows(prefix, kinds)[:limit]]
+    rows = _prefix_rows(prefix, kinds)[:limit * CANDIDATES_PER_RESULT]
+    return [
+        row.entry for row in rows
+        if f" {row.entry.normalized}".find(f" {normalized}") >= 0
+    ][:limit]
+
+
+def _pg_trgm_matches(normalized, kinds, limit):
+    similar = RawSQL("%s <%% normalized", [normalized], output_field=BooleanField())
+    similarity = RawSQL("word_similarity(%s, normalized)", [normalized], output_field=FloatField())
+    return list(
+        AutocompleteEntry.objects.filter(similar, kind__in=kinds)
+        .annotate(similarity=similarity)
+        .order_by('-similarity', '-weight', 'label')[:limit]
+    )
+
+
+def _anchored_similar_matches(normalized, kinds, limit):
+    words = sorted(normalized.split(), key=len, reverse=True)[:FUZZY_ANCHORS]
+    anchors = dict.fromkeys(word[:FUZZY_ANCHOR_LENGTH] for word in words if len(word) >= MIN_QUERY_LENGTH)
+    candidates = {}
+    for anchor in anchors:
+        for row in _prefix_rows(anchor, kinds)[:FUZZY_CANDIDATES]:
+            candidates[row.entry_id] = row.entry
+
+    grams = trigrams(normalized, prefix=True)
+    scored = []
+    for entry in candidates.values():
+        similarity = len(grams & trigrams(entry.normalized)) / len(grams)
+        if similarity >= SIMILARITY_THRESHOLD:
+            scored.append((-similarity, -entry.weight, entry.label, entry))
+    return [entry for *_, entry in sorted(scored, key=lambda item: item[:3])][:limit]
@@ -0,0 +1,83 @@
+"""
+Full-text search over posts.
+
+Fields are weighted title > subtitle > tags/category > content. PostgreSQL
+ranks with ``ts_rank`` over a stored, GIN-indexed tsvector; SQLite uses an
+FTS5 table ranked with ``bm25``. Any other database falls back to
+``icontains`` over the search document.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import PostSearchDocument
+
+FTS_TABLE = 'search_postsearchdocument_fts'
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_document(post):
+    keywords = [tag.name for tag in post.tags.all()]
+    if post.category_id:
+        keywords.append(post.category.name)
+    return {
+        'title': post.title,
+        'subtitle': post.subtitle,
+        'keywords': ' '.join(keywords),
+        'body': post.content,
+    }
+
+
+def update_post_document(post):
+    PostSearchDocument.objects.update_or_create(post=post, defaults=build_document(post))
+
+
+def _fts5_query(query):
+    # Quote every term so user input cannot inject FTS5 syntax, and match
+    # each one as a prefix.
+    terms = WORD_RE.findall(query.lower())
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_posts(queryset, query):
+    """
+    Filter a Post queryset to documents matching ``query`` and annotate each
+    row with ``search_rank`` (higher is more relevant).
+    """
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('english', %s)"
+        matches = RawSQL(
+            f"SELECT post_id FROM search_postsearchdocument WHERE search_vector @@ {tsquery}",
+            [query]
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank(search_vector, {tsquery}) FROM search_postsearchdocument "
+            "WHERE search_postsearchdocument.post_id = blogs_post.id",
+            [query],
+            output_field=FloatField()
+        )
+    elif vendor == 'sqlite':
+        match = _fts5_query(query)
+        if match is None:
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 2.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = blogs_post.id",
+            [match],
+            output_field=FloatField()
+        )
+    else:
+        return queryset.filter(
+            Q(search_document__title__icontains=query) |
+            Q(search_document__subtitle__icontains=query) |
+            Q(search_document__keywords__icontains=query) |
+            Q(search_document__body__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.filter(pk__in=matches).annotate(search_rank=rank)
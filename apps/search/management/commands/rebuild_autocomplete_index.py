@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.search.autocomplete import KINDS, REBUILD_CHUNK_SIZE, rebuild_autocomplete_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the autocomplete index of user, tag and category names and refresh their weights."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=KINDS,
+            action='append',
+            dest='kinds',
+            help="Only rebuild this kind of entry (repeatable)."
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=REBUILD_CHUNK_SIZE,
+            help="Number of objects read and indexed per query."
+        )
+
+    def handle(self, *args, **options):
+        counts = rebuild_autocomplete_index(options['kinds'], chunk_size=options['chunk_size'])
+        for kind, count in counts.items():
+            self.stdout.write(f"{kind}: {count} entries")
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 12:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('blogs', '0010_comment_blogs_comme_post_id_cac06e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='blogs.post')),
+                ('title', models.TextField(blank=True)),
+                ('subtitle', models.TextField(blank=True)),
+                ('keywords', models.TextField(blank=True, help_text='Tag and category names.')),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
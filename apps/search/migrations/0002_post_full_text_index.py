@@ -0,0 +1,113 @@
+from django.db import migrations
+
+FTS_TABLE = 'search_postsearchdocument_fts'
+FTS_COLUMNS = 'title, subtitle, keywords, body'
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE search_postsearchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(subtitle, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(keywords, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX search_postsearchdocument_vector_idx ON search_postsearchdocument USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS search_postsearchdocument_vector_idx",
+    "ALTER TABLE search_postsearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {FTS_COLUMNS},
+        content='search_postsearchdocument',
+        content_rowid='post_id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER search_postsearchdocument_ai AFTER INSERT ON search_postsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.post_id, new.title, new.subtitle, new.keywords, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER search_postsearchdocument_ad AFTER DELETE ON search_postsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.post_id, old.title, old.subtitle, old.keywords, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER search_postsearchdocument_au AFTER UPDATE ON search_postsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.post_id, old.title, old.subtitle, old.keywords, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.post_id, new.title, new.subtitle, new.keywords, new.body);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS search_postsearchdocument_au",
+    "DROP TRIGGER IF EXISTS search_postsearchdocument_ad",
+    "DROP TRIGGER IF EXISTS search_postsearchdocument_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+def backfill_documents(apps, schema_editor):
+    Post = apps.get_model('blogs', 'Post')
+    PostSearchDocument = apps.get_model('search', 'PostSearchDocument')
+
+    posts = Post.objects.select_related('category').prefetch_related('tags').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=500):
+        keywords = [tag.name for tag in post.tags.all()] + [post.category.name]
+        batch.append(PostSearchDocument(
+            post_id=post.pk,
+            title=post.title,
+            subtitle=post.subtitle,
+            keywords=' '.join(keywords),
+            body=post.content,
+        ))
+        if len(batch) >= 500:
+            PostSearchDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PostSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
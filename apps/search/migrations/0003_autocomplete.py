@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-17 14:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX search_autocompleteentry_trgm_idx ON search_autocompleteentry "
+    "USING GIN (normalized gin_trgm_ops)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS search_autocompleteentry_trgm_idx",
+]
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_BACKWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_post_full_text_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutocompleteEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'User'), ('tag', 'Tag'), ('category', 'Category')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('label', models.CharField(max_length=255)),
+                ('normalized', models.CharField(max_length=255)),
+                ('slug', models.SlugField(blank=True)),
+                ('image_url', models.URLField(blank=True, null=True)),
+                ('weight', models.PositiveIntegerField(default=0, help_text='Followers or posts; ranks equally good matches.')),
+                ('indexed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Autocomplete entries',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AutocompletePrefix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=12)),
+                ('kind', models.CharField(choices=[('user', 'User'), ('tag', 'Tag'), ('category', 'Category')], max_length=10)),
+                ('weight', models.PositiveIntegerField(default=0)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prefixes', to='search.autocompleteentry')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['prefix', 'weight', 'entry'], name='search_auto_prefix_ddddff_idx'), models.Index(fields=['prefix', 'kind', 'weight', 'entry'], name='search_auto_prefix_069381_idx')],
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,79 @@
+from django.db import models
+
+
+class PostSearchDocument(models.Model):
+    """
+    Denormalized search text for a post, kept in sync by signals in
+    ``apps.search.signals``. The database-specific full-text index over these
+    columns (a weighted tsvector on PostgreSQL, an FTS5 table on SQLite) is
+    created by the migrations and maintained by the database itself.
+    """
+    post = models.OneToOneField(
+        'blogs.Post',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    title = models.TextField(blank=True)
+    subtitle = models.TextField(blank=True)
+    keywords = models.TextField(blank=True, help_text="Tag and category names.")
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for {self.post_id}"
+
+
+class AutocompleteEntry(models.Model):
+    """
+    A user, tag or category as offered by the autocomplete endpoint, kept in
+    sync by signals in ``apps.search.signals``. ``normalized`` is what is
+    matched: by prefix through ``AutocompletePrefix``, and by similarity
+    through a ``pg_trgm`` GIN index created by the migrations on PostgreSQL.
+    """
+    USER = 'user'
+    TAG = 'tag'
+    CATEGORY = 'category'
+    KIND_CHOICES = [
+        (USER, "User"),
+        (TAG, "Tag"),
+        (CATEGORY, "Category"),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    label = models.CharField(max_length=255)
+    normalized = models.CharField(max_length=255)
+    slug = models.SlugField(blank=True)
+    image_url = models.URLField(blank=True, null=True)
+    weight = models.PositiveIntegerField(default=0, help_text="Followers or posts; ranks equally good matches.")
+    indexed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        verbose_name_plural = 'Autocomplete entries'
+
+    def __str__(self):
+        return f"{self.kind}: {self.label}"
+
+
+class AutocompletePrefix(models.Model):
+    """
+    A prefix of an entry's ``normalized`` text taken at a word start ("jo",
+    "john s", "sm"...), so a prefix query reads its best entries straight off
+    the index in weight order. ``kind`` and ``weight`` are copied from the
+    entry for that purpose.
+    """
+    prefix = models.CharField(max_length=12)
+    entry = models.ForeignKey(AutocompleteEntry, on_delete=models.CASCADE, related_name='prefixes')
+    kind = models.CharField(max_length=10, choices=AutocompleteEntry.KIND_CHOICES)
+    weight = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['prefix', 'weight', 'entry']),
+            models.Index(fields=['prefix', 'kind', 'weight', 'entry']),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix!r} -> {self.entry_id}"
+
@@ -1,4 +1,12 @@
-# Serializers for search app
-# Currently using PostSerializer from apps.blogs.serializers
-# This file is kept for future extensibility
+from rest_framework import serializers
 
+from .models import AutocompleteEntry
+
+
+class AutocompleteEntrySerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField(source='object_id')
+
+    class Meta:
+        model = AutocompleteEntry
+        fields = ['type', 'id', 'label', 'slug', 'image_url']
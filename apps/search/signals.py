@@ -0,0 +1,71 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.blogs.models import Category, Post, Tag
+from apps.core.models import User
+from .autocomplete import reindex_objects, remove_objects
+from .index import update_post_document
+from .models import AutocompleteEntry
+
+REINDEX_CHUNK_SIZE = 500
+AUTOCOMPLETE_USER_FIELDS = {'first_name', 'last_name', 'profile_pic_url', 'is_active'}
+
+
+def _reindex(posts):
+    posts = posts.select_related('category').prefetch_related('tags')
+    for post in posts.iterator(chunk_size=REINDEX_CHUNK_SIZE):
+        update_post_document(post)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    update_post_document(instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Tag side of the relation: ``instance`` is a Tag.
+        _reindex(Post.objects.filter(pk__in=pk_set or []))
+    else:
+        update_post_document(instance)
+
+
+@receiver(post_save, sender=Category)
+def index_category_posts(sender, instance, created, **kwargs):
+    if not created:
+        _reindex(instance.posts.all())
+
+
+@receiver(post_save, sender=Tag)
+def index_tag_posts(sender, instance, created, **kwargs):
+    if not created:
+        _reindex(instance.posts.all())
+
+
+@receiver(post_save, sender=User)
+def index_user_autocomplete(sender, instance, update_fields=None, **kwargs):
+    # Logins and counter updates save other fields only.
+    if update_fields is not None and not AUTOCOMPLETE_USER_FIELDS & set(update_fields):
+        return
+    reindex_objects(AutocompleteEntry.USER, [instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def index_tag_autocomplete(sender, instance, **kwargs):
+    reindex_objects(AutocompleteEntry.TAG, [instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def index_category_autocomplete(sender, instance, **kwargs):
+    reindex_objects(AutocompleteEntry.CATEGORY, [instance.pk])
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def remove_autocomplete_entry(sender, instance, **kwargs):
+    kind = {User: AutocompleteEntry.USER, Tag: AutocompleteEntry.TAG, Category: AutocompleteEntry.CATEGORY}[sender]
+    remove_objects(kind, [instance.pk])
@@ -1,4 +1,99 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.blogs.models import Category, Post, Tag
+from apps.blogs.services import resolve_tags
+from apps.core.models import User
+from .autocomplete import autocomplete, normalize, rebuild_autocomplete_index
+from .models import AutocompleteEntry
+from .views import AutocompleteView
 
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.smith = User.objects.create_user(email='smith@example.com', password='pw', first_name='Jöhn', last_name='Smith')
+        cls.smithers = User.objects.create_user(email='smithers@example.com', password='pw', first_name='Waylon', last_name='Smithers')
+        User.objects.filter(pk=cls.smithers.pk).update(followers_count=50)
+        User.objects.create_user(email='jonathan@example.com', password='pw', first_name='Jonathan', last_name='Ive')
+        Category.objects.create(name='Smart Home', slug='smart-home', posts_count=3)
+        resolve_tags(['Smalltalk'])
+        # Weights come from counters, which are refreshed by a rebuild.
+        rebuild_autocomplete_index()
+
+    def setUp(self):
+        cache.clear()
+
+    def labels(self, query, **kwargs):
+        return [entry.label for entry in autocomplete(query, **kwargs)]
+
+    def test_word_prefixes_rank_before_fuzzy_matches(self):
+        self.assertEqual(normalize('  Jöhn_SMITH! '), 'john smith')
+        self.assertEqual(self.labels('smith'), ['Waylon Smithers', 'Jöhn Smith'])
+        self.assertEqual(self.labels('sm', kinds=['category', 'tag']), ['Smart Home', 'smalltalk'])
+        self.assertEqual(self.labels('jonathon'), ['Jonathan Ive'])
+        self.assertEqual(self.labels('j'), [])
+
+    def test_entries_follow_renames_and_deactivation(self):
+        self.smith.last_name = 'Doe'
+        self.smith.save()
+        self.assertEqual(self.labels('doe'), ['Jöhn Doe'])
+        self.smith.is_active = False
+        self.smith.save(update_fields=['is_active'])
+        self.assertEqual(self.labels('doe'), [])
+        Tag.objects.get(name='smalltalk').delete()
+        self.assertFalse(AutocompleteEntry.objects.filter(kind=AutocompleteEntry.TAG).exists())
+
+    def test_endpoint_caches_per_normalized_query(self):
+        client = APIClient()
+        response = client.get('/api/search/autocomplete/?q=Smi&type=user&limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'type': 'user', 'id': self.smithers.pk, 'label': 'Waylon Smithers', 'slug': '', 'image_url': None}
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            cached = client.get('/api/search/autocomplete/?q=smi!&type=user&limit=1')
+        self.assertEqual(cached.json(), response.json())
+        self.assertLess(len(queries), AutocompleteView.query_budget - 1)
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', password='pw')
+        cls.category = Category.objects.create(name='Tech', slug='tech')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def search(self, query):
+        response = self.client.get('/api/search/posts/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [post['slug'] for post in response.json()['results']]
+
+    def test_posts_are_found_by_the_tags_set_through_the_api(self):
+        response = self.client.post('/api/posts/', {
+            'title': 'Shipping containers',
+            'slug': 'shipping-containers',
+            'content': 'Notes from the cluster.',
+            'category_id': self.category.pk,
+            'status': 'published',
+            'tags': ['Kubernetes', 'ops'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.search('kubernetes'), ['shipping-containers'])
+
+        post_id = response.json()['id']
+        response = self.client.patch(f'/api/posts/{post_id}/update/', {'tags': ['nomad']}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.search('kubernetes'), [])
+        self.assertEqual(self.search('nomad'), ['shipping-containers'])
+
+    def test_queries_without_words_return_nothing(self):
+        Post.objects.create(author=self.author, category=self.category, title='Hello', slug='hello', status='published')
+        self.assertEqual(self.search('!!!'), [])
@@ -1,4 +1,4 @@
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
+from apps.core.throttling import UserRateThrottle, AnonRateThrottle
 
 
 class SearchRateThrottle(UserRateThrottle):
@@ -16,3 +16,18 @@ class SearchAnonRateThrottle(AnonRateThrottle):
     """
     rate = '10/min'
 
+
+class AutocompleteRateThrottle(UserRateThrottle):
+    """
+    Rate limit for autocomplete, which is called as the user types.
+    120 requests per minute for authenticated users.
+    """
+    rate = '120/min'
+
+
+class AutocompleteAnonRateThrottle(AnonRateThrottle):
+    """
+    Rate limit for anonymous autocomplete.
+    60 requests per minute.
+    """
+    rate = '60/min'
@@ -7,5 +7,6 @@ urlpatterns = [
     path('comments/', views.CommentSearchView.as_view(), name='search-comments'),
     path('bookmarks/', views.BookmarkSearchView.as_view(), name='search-bookmarks'),
     path('users/', views.UserSearchView.as_view(), name='search-users'),
+    path('autocomplete/', views.AutocompleteView.as_view(), name='search-autocomplete'),
 ]
 
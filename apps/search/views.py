@@ -1,27 +1,39 @@
 from rest_framework import generics, filters, permissions
+from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Q
 
 from apps.blogs.models import Post, Comment, Bookmark, Category
-from apps.blogs.serializers import PostSerializer, CommentSerializer, BookmarkSerializer, CategorySerializer
+from apps.blogs.serializers import PostCardSerializer, PostSerializer, CommentSerializer, BookmarkSerializer, CategorySerializer
+from apps.core.metrics import MetricsMixin
 from apps.core.models import User
+from apps.core.representation import CardViewMixin
 from apps.core.serializers import UserSerializer
-from .throttles import SearchRateThrottle, SearchAnonRateThrottle
+from .autocomplete import DEFAULT_LIMIT, KINDS, MAX_LIMIT, autocomplete, autocomplete_cache_key
+from .index import search_posts
+from .serializers import AutocompleteEntrySerializer
+from .throttles import AutocompleteAnonRateThrottle, AutocompleteRateThrottle, SearchRateThrottle, SearchAnonRateThrottle
 
 
-class PostSearchView(generics.ListAPIView):
+class PostSearchView(MetricsMixin, CardViewMixin, generics.ListAPIView):
     """
     Search endpoint for posts with advanced filtering options.
     
     Query parameters:
-    - q: Search query (searches in title, content, author name, category name, tags)
+    - q: Full-text query over title, subtitle, tags, category and content,
+      ranked by relevance unless ``ordering`` is given
     - status: Filter by status (draft/published)
     - category: Filter by category ID or slug
     - author: Filter by author ID
     - tags: Filter by tag names (comma-separated)
     - ordering: Order results (e.g., '-created_at', 'title', '-reaction_count')
+    - view=card / fields: Compact or sparse results (see apps.core.representation)
     """
     serializer_class = PostSerializer
+    card_serializer_class = PostCardSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 10
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     
     def get_throttles(self):
@@ -31,7 +43,12 @@ class PostSearchView(generics.ListAPIView):
     search_fields = ['title', 'content', 'author__email', 'author__first_name', 'author__last_name', 
                      'category__name', 'tags__name']
     ordering_fields = ['created_at', 'updated_at', 'title', 'reaction_count', 'comment_count', 'bookmark_count']
-    ordering = ['-created_at']
+
+    @property
+    def ordering(self):
+        if self.request.query_params.get('q'):
+            return ['-search_rank', '-id']
+        return ['-created_at']
 
     def get_queryset(self):
         queryset = Post.objects.active().select_related('author', 'category').prefetch_related('tags')
@@ -43,15 +60,7 @@ class PostSearchView(generics.ListAPIView):
         tags = self.request.query_params.get('tags', None)
         
         if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) |
-                Q(content__icontains=search_query) |
-                Q(author__first_name__icontains=search_query) |
-                Q(author__last_name__icontains=search_query) |
-                Q(author__email__icontains=search_query) |
-                Q(category__name__icontains=search_query) |
-                Q(tags__name__icontains=search_query)
-            ).distinct()
+            queryset = search_posts(queryset, search_query)
         
         if status:
             queryset = queryset.filter(status=status)
@@ -73,7 +82,7 @@ class PostSearchView(generics.ListAPIView):
         return queryset
 
 
-class CommentSearchView(generics.ListAPIView):
+class CommentSearchView(MetricsMixin, generics.ListAPIView):
     """
     Search endpoint for comments with advanced filtering options.
     
@@ -86,6 +95,7 @@ class CommentSearchView(generics.ListAPIView):
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 8
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     
     def get_throttles(self):
@@ -127,7 +137,7 @@ class CommentSearchView(generics.ListAPIView):
         return queryset
 
 
-class BookmarkSearchView(generics.ListAPIView):
+class BookmarkSearchView(MetricsMixin, generics.ListAPIView):
     """
     Search endpoint for user bookmarks with advanced filtering options.
     
@@ -138,6 +148,7 @@ class BookmarkSearchView(generics.ListAPIView):
     """
     serializer_class = BookmarkSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 10
     throttle_classes = [SearchRateThrottle]
 
     def get_queryset(self):
@@ -162,9 +173,10 @@ class BookmarkSearchView(generics.ListAPIView):
         
         return queryset
 
-class CategorySearchView(generics.ListAPIView):
+class CategorySearchView(MetricsMixin, generics.ListAPIView):
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 6
     throttle_classes = [SearchRateThrottle]
 
     def get_queryset(self):
@@ -182,9 +194,10 @@ class CategorySearchView(generics.ListAPIView):
         
         return queryset
 
-class UserSearchView(generics.ListAPIView):
+class UserSearchView(MetricsMixin, generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 7
     throttle_classes = [SearchRateThrottle]
 
     def get_queryset(self):
@@ -204,3 +217,42 @@ class UserSearchView(generics.ListAPIView):
         
         return queryset
 
+
+class AutocompleteView(MetricsMixin, generics.GenericAPIView):
+    """
+    Type-ahead suggestions for users, tags and categories, matched on word
+    prefixes and trigram similarity (see apps.search.autocomplete).
+
+    Query parameters:
+    - q: What has been typed so far (at least 2 characters)
+    - type: Only suggest these kinds: user, tag, category (comma-separated)
+    - limit: Number of suggestions (default 8, at most 20)
+
+    Results are cached per normalized query for AUTOCOMPLETE_CACHE_TIMEOUT
+    seconds, for all users alike.
+    """
+    serializer_class = AutocompleteEntrySerializer
+    permission_classes = [permissions.AllowAny]
+    query_budget = 5
+
+    def get_throttles(self):
+        if self.request.user.is_authenticated:
+            return [AutocompleteRateThrottle()]
+        return [AutocompleteAnonRateThrottle()]
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        types = request.query_params.get('type')
+        kinds = [kind for kind in KINDS if not types or kind in types.split(',')]
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = DEFAULT_LIMIT
+
+        cache_key = autocomplete_cache_key(query, kinds, limit)
+        results = cache.get(cache_key)
+        if results is None:
+            serializer = self.get_serializer(autocomplete(query, kinds, limit), many=True)
+            results = [dict(item) for item in serializer.data]
+            cache.set(cache_key, results, settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+        return Response({'results': results})
@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from datetime import timedelta
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,15 +55,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.metrics.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.staticfiles.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.core.response_cache.ResourceVersionMiddleware',
+    'apps.core.db_router.ReplicaRoutingMiddleware',
 ]
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
@@ -93,7 +96,7 @@ ROOT_URLCONF = 'config.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -121,6 +124,27 @@ DATABASES = {
     # }
 }
 
+# Read replicas, e.g. DATABASE_REPLICA_URLS=postgres://...,postgres://...
+# Safe requests to feed, search and list views read from a random replica
+# (see apps/core/db_router.py); clients that just wrote stay on the primary
+# for REPLICA_STICKY_SECONDS, which needs the shared (Redis) cache when there
+# are several workers. Locally two SQLite files work as well:
+# DATABASE_URL=sqlite:///primary.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+# with replica.sqlite3 a copy of primary.sqlite3 taken after migrating.
+DATABASE_REPLICAS = []
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['apps.core.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
+# Bearer token Prometheus sends to scrape /api/metrics/ (see apps/core/metrics.py).
+# Without it only staff users can read the endpoint.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -177,11 +201,11 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
     "DEFAULT_PAGINATION_CLASS":
-        "rest_framework.pagination.PageNumberPagination",
+        "apps.core.pagination.OptionalCursorPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "apps.core.throttling.AnonRateThrottle",
+        "apps.core.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/hour",
@@ -189,6 +213,70 @@ REST_FRAMEWORK = {
     },
 }
 
+# Set REDIS_URL to share the cache between workers. Without it each worker
+# has its own in-memory cache.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Throttle counters must be shared by all workers (see apps/core/throttling.py):
+# in the cache when it is Redis, otherwise in the database.
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_STORE = config(
+    'THROTTLE_STORE',
+    default='apps.core.throttling.CacheThrottleStore' if REDIS_URL else 'apps.core.throttling.DatabaseThrottleStore'
+)
+
+# Anonymous responses of read endpoints are cached for this many seconds and
+# invalidated on writes (see apps/core/response_cache.py). 0 disables it.
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# With a shared cache, post/comment views are counted there and written back
+# to the database in batches by the flush_view_counts command (see
+# apps/blogs/view_counts.py); otherwise each view updates the database.
+VIEW_COUNT_CACHE_ALIAS = 'default'
+VIEW_COUNT_BUFFERED = config('VIEW_COUNT_BUFFERED', default=bool(REDIS_URL), cast=bool)
+
+# Home timelines are materialized on write by the fan_out_timelines worker
+# and capped at this many posts. Authors with at least
+# FEED_FANOUT_FOLLOWER_LIMIT followers are merged in at read time instead of
+# being fanned out (see apps/feeds/timeline.py).
+FEED_TIMELINE_DEPTH = config('FEED_TIMELINE_DEPTH', default=800, cast=int)
+FEED_FANOUT_FOLLOWER_LIMIT = config('FEED_FANOUT_FOLLOWER_LIMIT', default=10000, cast=int)
+
+# Trending feeds read time-decayed scores precomputed by the compute_trending
+# command, which should run on a schedule (apps/feeds/trending.py).
+TRENDING_MAX_RESULTS = 500
+
+# Push/email notifications are queued in an outbox and delivered by the
+# dispatch_notifications worker. Use LocMemPushBackend in tests.
+NOTIFICATION_PUSH_BACKEND = config(
+    'NOTIFICATION_PUSH_BACKEND',
+    default='apps.notifications.backends.FirebasePushBackend'
+)
+
+# Autocomplete suggestions are cached per normalized query for this many
+# seconds (apps/search/autocomplete.py); new names show up once it expires.
+AUTOCOMPLETE_CACHE_TIMEOUT = config('AUTOCOMPLETE_CACHE_TIMEOUT', default=60, cast=int)
+
+# Authenticated users are cached for this many seconds (0 disables the
+# cache). Entries are dropped whenever the user is saved or deleted, which
+# only reaches every worker when the cache is shared, so it is off without
+# Redis.
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60 if REDIS_URL else 0, cast=int)
+
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "USER_ID_CLAIM": "user_id",
@@ -196,4 +284,5 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_OBTAIN_SERIALIZER": "apps.core.tokens.VersionedTokenObtainPairSerializer",
 }